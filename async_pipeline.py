@@ -0,0 +1,332 @@
+import asyncio
+import http
+import logging
+import time
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from diff import StatusDiff, homework_key
+from error_aggregator import ErrorAggregator
+from exceptions import ApiStatusError, CircuitOpenError, RetryAfterError
+from metrics import PipelineMetrics
+from schema import rejected
+from sender import RateLimiter
+from state import MemoryStateStore
+from tenants import TenantState, token_digest
+
+TELEGRAM_API_URL = 'https://api.telegram.org'
+TOO_MANY_REQUESTS = 429
+
+
+class Transitions:
+    """Изменения одного ответа API, которые ещё обрабатываются.
+
+    Курсор подписки сдвигается на current_date, только когда все
+    изменения обработаны и ни одно уведомление не потеряно; иначе
+    следующий опрос запросит их заново с прежнего курсора.
+    """
+
+    def __init__(self, subscription, current_date, pending):
+        self.subscription = subscription
+        self.current_date = current_date
+        self.pending = pending
+        self.failed = False
+
+
+class AsyncPipeline:
+    """Асинхронный конвейер: получение, проверка, разбор и отправка.
+
+    Стадии работают параллельно и связаны ограниченными очередями,
+    поэтому медленная отправка в Телеграм не задерживает опрос API,
+    а переполненная очередь притормаживает предыдущую стадию.
+    Проверка и разбор ответа выполняются теми же функциями
+    check_response и parse_status, что и в синхронном режиме.
+
+    Отправка ограничена тем же RateLimiter, что и в SendQueue:
+    global_rate сообщений в секунду на бота и chat_rate на чат,
+    а на ответ 429 чат блокируется на retry_after секунд
+    и сообщение повторяется (не больше max_attempts попыток).
+    Статус работы записывается в хранилище после отправки
+    уведомления, а курсор - после всех изменений ответа
+    (Transitions); неотправленное изменение забывается и находится
+    заново следующим опросом.
+    """
+
+    def __init__(self, subscriptions, endpoint, telegram_token, check, parse,
+                 retry_time, queue_size=100, fetch_workers=10,
+                 send_workers=5, telegram_url=TELEGRAM_API_URL,
+                 timeout=30, store=None, metrics=None, breakers=None,
+                 aggregator=None, global_rate=30, chat_rate=1,
+                 max_attempts=5):
+        if aiohttp is None:
+            raise ImportError('Для асинхронного режима нужен пакет aiohttp')
+        self.subscriptions = list(subscriptions)
+        self.endpoint = endpoint
+        self.send_url = f'{telegram_url}/bot{telegram_token}/sendMessage'
+        self.metrics = metrics if metrics is not None else PipelineMetrics()
+        self.check = self.metrics.instrument('check', check)
+        self.parse = self.metrics.instrument('parse', parse)
+        self.retry_time = retry_time
+        self.queue_size = queue_size
+        self.fetch_workers = fetch_workers
+        self.send_workers = send_workers
+        self.timeout = timeout
+        self.limiter = RateLimiter(global_rate, chat_rate)
+        self.max_attempts = max_attempts
+        self.breakers = breakers
+        if aggregator is None:
+            aggregator = ErrorAggregator()
+        self.aggregator = aggregator
+        self.store = store if store is not None else MemoryStateStore()
+        now = int(time.time())
+        self.states = {}
+        for subscription in self.subscriptions:
+            key = subscription.key
+            self.aggregator.restore(key, self.store.get_error(key))
+            self.states[key] = TenantState(
+                timestamp=self.store.get_cursor(key, now),
+                statuses=StatusDiff(self.store.statuses(key)),
+            )
+        self.by_key = {
+            subscription.key: subscription
+            for subscription in self.subscriptions
+        }
+        self.session = None
+        self._queues = None
+        self._tasks = []
+
+    async def fetch(self, subscription):
+        """Получаем ответ от API, если цепи breakers замкнуты."""
+        if self.breakers is None:
+            return await self._request(subscription)
+        key = token_digest(subscription.practicum_token)
+        self.breakers.allow(key)
+        try:
+            response = await self._request(subscription)
+        except Exception as error:
+            self.breakers.record(key, error)
+            raise
+        self.breakers.record(key)
+        return response
+
+    async def _request(self, subscription):
+        state = self.states[subscription.key]
+        params = {'from_date': state.timestamp or int(time.time())}
+        headers = {'Authorization': f'OAuth {subscription.practicum_token}'}
+        try:
+            async with self.session.get(
+                self.endpoint, headers=headers, params=params
+            ) as response:
+                if response.status != http.HTTPStatus.OK:
+                    logging.error('API не отвечает на запрос')
+                    raise ApiStatusError(
+                        'API не отвечает на запрос', response.status
+                    )
+                logging.info('Отправлен API запрос')
+                return await response.json(content_type=None)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+            logging.error(f'Ошибка доступа к сайту: {error}')
+            raise ConnectionError('Ошибка доступа к сайту') from error
+
+    async def send(self, chat_id, message):
+        """Отправляем сообщение в чат через Bot API."""
+        payload = {'chat_id': chat_id, 'text': message}
+        async with self.session.post(self.send_url, json=payload) as response:
+            result = await response.json(content_type=None)
+        if not result.get('ok'):
+            description = result.get('description')
+            message = f'Ошибка отправки сообщения в телеграм: {description}'
+            retry_after = (result.get('parameters') or {}).get('retry_after')
+            if result.get('error_code') == TOO_MANY_REQUESTS and retry_after:
+                logging.warning(message)
+                raise RetryAfterError(message, retry_after)
+            logging.error(message)
+            raise ConnectionError(message)
+        logging.info('Сообщение отправлено в Телеграм')
+        return True
+
+    async def deliver(self, chat_id, message):
+        """Отправляем с лимитами скорости и повтором после 429."""
+        for attempt in range(1, self.max_attempts + 1):
+            while True:
+                delay = self.limiter.acquire(chat_id, time.monotonic())
+                if delay <= 0:
+                    break
+                await asyncio.sleep(delay)
+            try:
+                return await self.send(chat_id, message)
+            except RetryAfterError as error:
+                if attempt == self.max_attempts:
+                    raise
+                self.limiter.block(
+                    chat_id, time.monotonic() + error.retry_after
+                )
+
+    async def _fail(self, subscription, error):
+        if isinstance(error, CircuitOpenError):
+            logging.debug(f'[{subscription.key}] Опрос пропущен: {error}')
+            return
+        fingerprint = self.aggregator.report(subscription.key, error)
+        if fingerprint is None:
+            return
+        self.store.set_error(subscription.key, fingerprint)
+        message = f'Сбой в работе программы: {error}'
+        await self._queues['send'].put((subscription.chat_id, message, None))
+
+    def _advance(self, subscription, current_date):
+        if isinstance(current_date, int):
+            self.states[subscription.key].timestamp = current_date
+            self.store.set_cursor(subscription.key, current_date)
+
+    def _handled(self, transitions, homework, delivered):
+        """Учитываем обработку одного изменения из transitions."""
+        key = transitions.subscription.key
+        if delivered:
+            self.store.set_status(
+                key, homework_key(homework), homework.get('status')
+            )
+        else:
+            self.states[key].statuses.statuses.pop(
+                homework_key(homework), None
+            )
+            transitions.failed = True
+        transitions.pending -= 1
+        if transitions.pending == 0 and not transitions.failed:
+            self._advance(transitions.subscription, transitions.current_date)
+
+    async def _fetch_stage(self):
+        queue, next_queue = self._queues['fetch'], self._queues['check']
+        while True:
+            subscription = await queue.get()
+            started = time.perf_counter()
+            try:
+                response = await self.fetch(subscription)
+                self.metrics.observe('fetch', time.perf_counter() - started)
+                await next_queue.put((subscription, response))
+            except Exception as error:
+                self.metrics.observe(
+                    'fetch', time.perf_counter() - started,
+                    type(error).__name__,
+                )
+                await self._fail(subscription, error)
+            finally:
+                queue.task_done()
+
+    async def _check_stage(self):
+        queue, next_queue = self._queues['check'], self._queues['parse']
+        while True:
+            subscription, response = await queue.get()
+            try:
+                state = self.states[subscription.key]
+                homeworks = self.check(response)
+                current_date = response.get('current_date')
+                transitions = state.statuses.changes(homeworks)
+                error = rejected(homeworks)
+                if error is not None:
+                    await self._fail(subscription, error)
+                if not transitions:
+                    logging.debug('Статус проверки работы не изменился')
+                    self._advance(subscription, current_date)
+                    continue
+                pending = Transitions(
+                    subscription, current_date, len(transitions)
+                )
+                for homework in transitions:
+                    await next_queue.put((pending, homework))
+            except Exception as error:
+                await self._fail(subscription, error)
+            finally:
+                queue.task_done()
+
+    async def _parse_stage(self):
+        queue, next_queue = self._queues['parse'], self._queues['send']
+        while True:
+            transitions, homework = await queue.get()
+            subscription = transitions.subscription
+            try:
+                message = self.parse(homework)
+            except Exception as error:
+                self._handled(transitions, homework, True)
+                await self._fail(subscription, error)
+            else:
+                await next_queue.put((
+                    subscription.chat_id, message, (transitions, homework)
+                ))
+            finally:
+                queue.task_done()
+
+    async def _send_stage(self):
+        queue = self._queues['send']
+        while True:
+            chat_id, message, source = await queue.get()
+            started = time.perf_counter()
+            delivered = False
+            try:
+                await self.deliver(chat_id, message)
+                delivered = True
+                self.metrics.observe('send', time.perf_counter() - started)
+            except Exception as error:
+                self.metrics.observe(
+                    'send', time.perf_counter() - started,
+                    type(error).__name__,
+                )
+                logging.error(f'[{chat_id}] Сообщение не отправлено: {error}')
+            finally:
+                if source is not None:
+                    self._handled(*source, delivered)
+                queue.task_done()
+
+    async def start(self):
+        """Открываем HTTP-сессию и запускаем стадии конвейера."""
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        self.session = aiohttp.ClientSession(timeout=timeout)
+        self._queues = {
+            stage: asyncio.Queue(maxsize=self.queue_size)
+            for stage in ('fetch', 'check', 'parse', 'send')
+        }
+        workers = (
+            [self._fetch_stage] * self.fetch_workers
+            + [self._check_stage, self._parse_stage]
+            + [self._send_stage] * self.send_workers
+        )
+        self._tasks = [asyncio.create_task(worker()) for worker in workers]
+
+    async def stop(self):
+        """Останавливаем стадии и закрываем сессию."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self.session.close()
+        self.store.close()
+
+    async def run_once(self):
+        """Прогоняем все подписки через конвейер и ждём отправки."""
+        for subscription in self.subscriptions:
+            await self._queues['fetch'].put(subscription)
+        for stage in ('fetch', 'check', 'parse', 'send'):
+            await self._queues[stage].join()
+        for key, digest in self.aggregator.digests():
+            chat_id = self.by_key[key].chat_id
+            await self._queues['send'].put((chat_id, digest, None))
+        await self._queues['send'].join()
+        self.store.maybe_flush()
+
+    async def run_forever(self):
+        """Запускаем опрос подписок каждые retry_time секунд."""
+        await self.start()
+        try:
+            while True:
+                started = time.monotonic()
+                await self.run_once()
+                elapsed = time.monotonic() - started
+                self.metrics.loop_iteration.observe(elapsed)
+                delay = max(0.0, self.retry_time - elapsed)
+                await asyncio.sleep(delay)
+                drift = time.monotonic() - started - elapsed - delay
+                self.metrics.sleep_drift.observe(max(0.0, drift))
+        finally:
+            await self.stop()
@@ -0,0 +1,142 @@
+"""Симулятор: задержка уведомлений против числа запросов к API.
+
+Генерирует истории статусов для подписок и воспроизводит их
+с фиксированным и адаптивным расписанием без обращений к сети.
+
+Запуск: python -m benchmarks.bench_adaptive --tenants 200 --days 14
+"""
+import argparse
+import bisect
+import random
+from dataclasses import dataclass
+
+from scheduler import DAY, AdaptivePolicy, FixedPolicy, Scheduler
+
+HOUR = 60 * 60
+
+
+@dataclass
+class SimulatedState:
+    """Та же часть TenantState, которую читает политика."""
+
+    last_change: float = 0.0
+    last_status: str = None
+    unchanged: int = 0
+    errors: int = 0
+
+
+def daytime(rng, moment, utc_offset=3):
+    """Сдвигаем момент на дневные часы (9-23 по utc_offset)."""
+    hour = (moment / HOUR + utc_offset) % 24
+    if 9 <= hour < 23:
+        return moment
+    shift = (9 - hour) % 24
+    return moment + shift * HOUR + rng.uniform(0, 2 * HOUR)
+
+
+def make_trace(rng, days, active):
+    """История статусов одной подписки: [(момент, статус)]."""
+    trace = []
+    if not active:
+        return trace
+    moment = rng.uniform(0, DAY)
+    while moment < days * DAY:
+        moment = daytime(rng, moment + rng.expovariate(1 / (4 * HOUR)))
+        trace.append((moment, 'reviewing'))
+        moment = daytime(rng, moment + rng.expovariate(1 / (2 * HOUR)))
+        verdict = rng.choice(('approved', 'rejected'))
+        trace.append((moment, verdict))
+        pause = 6 * HOUR if verdict == 'rejected' else 2 * DAY
+        moment += rng.expovariate(1 / pause)
+    return trace
+
+
+def simulate(traces, days, scheduler):
+    """Воспроизводим истории и считаем задержки и запросы."""
+    states = {key: SimulatedState() for key in traces}
+    seen = {key: None for key in traces}
+    times = {key: [moment for moment, _ in trace]
+             for key, trace in traces.items()}
+    latencies = []
+    calls = 0
+    missed = 0
+    for key in traces:
+        scheduler.add(key, random.uniform(0, 600))
+
+    end = days * DAY
+    while True:
+        now = scheduler.next_time()
+        if now is None or now > end:
+            break
+        for key in scheduler.pop_due(now):
+            calls += 1
+            state = states[key]
+            index = bisect.bisect_right(times[key], now)
+            previous = bisect.bisect_right(times[key], seen[key] or -1)
+            if index > previous:
+                missed += index - previous - 1
+                changed_at, status = traces[key][index - 1]
+                latencies.append(now - changed_at)
+                state.last_change = now
+                state.last_status = status
+                state.unchanged = 0
+                seen[key] = changed_at
+            else:
+                state.unchanged += 1
+            scheduler.reschedule(key, state, now)
+    return calls, latencies, missed
+
+
+def percentile(values, share):
+    """Перцентиль по отсортированной копии."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(share * len(ordered)))]
+
+
+def run(args):
+    """Сравниваем фиксированное и адаптивное расписание."""
+    rng = random.Random(args.seed)
+    traces = {
+        str(number): make_trace(
+            rng, args.days, active=rng.random() < args.active_share
+        )
+        for number in range(args.tenants)
+    }
+    budget = args.budget or None
+    scenarios = [
+        ('fixed 600 с', Scheduler(FixedPolicy(600), start=0)),
+        (
+            'adaptive',
+            Scheduler(AdaptivePolicy(rng=random.Random(1)), start=0),
+        ),
+        (
+            f'adaptive, бюджет {budget} запросов/ч',
+            Scheduler(
+                AdaptivePolicy(rng=random.Random(1)), budget=budget, start=0
+            ),
+        ),
+    ]
+    for name, scheduler in scenarios:
+        if 'бюджет' in name and budget is None:
+            continue
+        random.seed(args.seed)
+        calls, latencies, missed = simulate(traces, args.days, scheduler)
+        mean = sum(latencies) / len(latencies) if latencies else 0.0
+        print(
+            f'{name}: запросов {calls} ({calls / args.days / 24:.0f}/ч), '
+            f'уведомлений {len(latencies)}, пропущено промежуточных {missed}, '
+            f'задержка средняя {mean:.0f} с, '
+            f'p95 {percentile(latencies, 0.95):.0f} с'
+        )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tenants', type=int, default=200)
+    parser.add_argument('--days', type=int, default=14)
+    parser.add_argument('--active-share', type=float, default=0.3)
+    parser.add_argument('--budget', type=int, default=0)
+    parser.add_argument('--seed', type=int, default=42)
+    run(parser.parse_args())
@@ -0,0 +1,73 @@
+"""Накладные расходы логирования на вызов: синхронный вывод и очередь.
+
+Пишет записи в поток-заглушку, который тратит --sink-latency секунд
+на каждую запись, как медленный сборщик логов, и сравнивает время
+вызова logging.debug в потоке опроса.
+
+Запуск: python -m benchmarks.bench_logging --records 20000
+"""
+import argparse
+import logging
+import time
+
+from structured_logging import configure_logging, stage_extra
+
+
+class SlowSink:
+    """Поток вывода с задержкой на каждую запись."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.lines = 0
+
+    def write(self, text):
+        """Считаем записи и ждём, как медленный сборщик."""
+        self.lines += text.count('\n')
+        if self.latency:
+            time.sleep(self.latency)
+
+    def flush(self):
+        """Сброс не нужен."""
+
+
+def measure(mode, args):
+    """Среднее время вызова в микросекундах, записано и отброшено."""
+    root = logging.getLogger()
+    root.handlers = []
+    sink = SlowSink(args.sink_latency)
+    listener = configure_logging(
+        mode, stream=sink, queue_size=args.queue_size,
+        sample_rate=args.sample_rate,
+    )
+    handler = root.handlers[0]
+    started = time.perf_counter()
+    for number in range(args.records):
+        logging.debug(
+            f'[tenant-{number % 100}] Статус проверки не изменился',
+            extra=stage_extra(f'tenant-{number % 100}', 'check', started),
+        )
+    elapsed = time.perf_counter() - started
+    if listener is not None:
+        listener.stop()
+    root.handlers = []
+    dropped = getattr(handler, 'dropped', 0)
+    return elapsed / args.records * 10 ** 6, sink.lines, dropped
+
+
+def run(args):
+    """Сравниваем режимы plain и queue."""
+    for mode in ('plain', 'queue'):
+        per_call, written, dropped = measure(mode, args)
+        print(
+            f'{mode}: {per_call:.1f} мкс на вызов, '
+            f'записано {written}, отброшено {dropped}'
+        )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--records', type=int, default=20000)
+    parser.add_argument('--sink-latency', type=float, default=0.0001)
+    parser.add_argument('--queue-size', type=int, default=10000)
+    parser.add_argument('--sample-rate', type=float, default=0.1)
+    run(parser.parse_args())
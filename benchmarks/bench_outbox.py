@@ -0,0 +1,46 @@
+"""Пропускная способность outbox: commit на каждую запись и пачкой.
+
+Добавляет --records уведомлений в outbox на диске и фиксирует их
+либо по одному (как при записи сразу в момент изменения), либо
+пачками по --batch (group commit в конце цикла опроса).
+
+Запуск: python -m benchmarks.bench_outbox --records 2000 --batch 100
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from outbox import Outbox
+
+
+def measure(batch, args):
+    """Записей в секунду при фиксации пачками по batch."""
+    with tempfile.TemporaryDirectory() as directory:
+        outbox = Outbox(
+            os.path.join(directory, 'outbox.db'),
+            send=lambda chat_id, message, callback: callback(True),
+        )
+        started = time.perf_counter()
+        for number in range(args.records):
+            outbox.append(f'key-{number}', number % 100, 'Статус изменился')
+            if (number + 1) % batch == 0:
+                outbox.commit()
+        outbox.commit()
+        elapsed = time.perf_counter() - started
+        outbox.connection.close()
+    return args.records / elapsed
+
+
+def run(args):
+    """Сравниваем фиксацию по одной записи и пачками."""
+    for batch in (1, args.batch):
+        rate = measure(batch, args)
+        print(f'commit каждые {batch}: {rate:.0f} записей/с')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--records', type=int, default=2000)
+    parser.add_argument('--batch', type=int, default=100)
+    run(parser.parse_args())
@@ -0,0 +1,67 @@
+"""Память на хранение работ: словари из ответа и записи Homework.
+
+Для --homeworks работ в отдельном процессе строит список словарей,
+как после response.json(), или список компактных записей Homework
+через validate_response и считает память, которую занимает список
+после того, как разобранный ответ освобождён (tracemalloc).
+
+Запуск: python -m benchmarks.bench_records --homeworks 1000000
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+PROBE = '''
+import json, sys, tracemalloc
+import homework
+from benchmarks.bench_streaming import body_chunks
+
+count, mode = int(sys.argv[1]), sys.argv[2]
+body = b''.join(body_chunks(count))
+tracemalloc.start()
+response = json.loads(body)
+del body
+if mode == 'compact':
+    records = homework.validate_response(response)
+    del response
+else:
+    records = response['homeworks']
+    del response
+current, _ = tracemalloc.get_traced_memory()
+tracemalloc.stop()
+print(json.dumps({
+    'records': len(records),
+    'mb': current / 2 ** 20,
+}))
+'''
+
+
+def probe(count, mode):
+    """Память списка работ в отдельном процессе."""
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE, str(count), mode],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def run(args):
+    """Сравниваем словари и компактные записи."""
+    for count in args.homeworks:
+        measured = {mode: probe(count, mode) for mode in ('dict', 'compact')}
+        for mode, result in measured.items():
+            print(
+                f'{count} работ, {mode}: {result["mb"]:.1f} МБ '
+                f'({result["mb"] * 2 ** 20 / count:.0f} байт на работу)'
+            )
+        ratio = measured['dict']['mb'] / measured['compact']['mb']
+        print(f'экономия: x{ratio:.1f}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--homeworks', type=int, nargs='+', default=[100000, 1000000]
+    )
+    run(parser.parse_args())
@@ -0,0 +1,128 @@
+"""Проверка пачки записей: прежние ветвления и скомпилированная схема.
+
+Сравнивает на --records записях (доля --bad-share некорректных)
+прежнюю проверку check_response + parse_status, где каждая запись
+проверяется цепочкой isinstance и homework.get(...), со схемой
+HOMEWORK_SCHEMA: validate_response проверяет пачку за один проход
+и собирает компактные записи Homework, поэтому "только схема" дороже
+прежних проверок, которые записей не строили.
+
+Запуск: python -m benchmarks.bench_schema --records 100000
+"""
+import argparse
+import gc
+import logging
+import time
+
+import homework
+from exceptions import HomeworkStatusError
+
+
+def legacy_check_response(response):
+    """check_response до перехода на схему."""
+    if not isinstance(response, dict):
+        logging.error('Ответ API не является словарем')
+        raise TypeError('Ответ API не является словарем')
+    elif not isinstance(response.get('homeworks'), list):
+        logging.error('Список домашних работ не является списком')
+        raise TypeError('Список домашних работ не является списком')
+    else:
+        homeworks = response.get('homeworks')
+    return homeworks
+
+
+def legacy_parse_status(homework_item):
+    """parse_status до перехода на схему."""
+    if homework_item.get('homework_name') is None:
+        logging.error('В ответе API отсутствет ключ homework_name')
+    homework_name = homework_item.get('homework_name')
+    if homework_item.get('status') is None:
+        logging.error('В ответе API отсутствует ключ status')
+        raise HomeworkStatusError('В ответе API отсутствует ключ status')
+    homework_status = homework_item.get('status')
+    if homework_item.get('status') not in homework.HOMEWORK_STATUSES:
+        logging.error('Недокументированный статус работы')
+    verdict = homework.HOMEWORK_STATUSES[homework_status]
+    return f'Изменился статус проверки работы "{homework_name}". {verdict}'
+
+
+def make_response(count, bad_share):
+    """Ответ API с долей некорректных записей."""
+    every = int(1 / bad_share) if bad_share else count + 1
+    homeworks = []
+    for number in range(count):
+        record = {
+            'id': number,
+            'homework_name': f'hw_{number}.zip',
+            'status': ('approved', 'rejected', 'reviewing')[number % 3],
+            'date_updated': '2021-11-01T10:00:00Z',
+        }
+        if number % every == every - 1:
+            record['status'] = 'unknown' if number % 2 else None
+        homeworks.append(record)
+    return {'homeworks': homeworks, 'current_date': 1}
+
+
+def legacy(response):
+    """Прежний путь: проверка и разбор каждой записи по отдельности."""
+    valid, errors = 0, 0
+    for homework_item in legacy_check_response(response):
+        try:
+            legacy_parse_status(homework_item)
+            valid += 1
+        except (KeyError, HomeworkStatusError):
+            errors += 1
+    return valid, errors
+
+
+def compiled(response):
+    """Проверка пачки схемой и разбор прошедших записей."""
+    records = homework.validate_response(response)
+    for homework_item in records:
+        homework.parse_status(homework_item)
+    return len(records), len(records.errors)
+
+
+def validate_only(response):
+    """Только проверка пачки схемой."""
+    records = homework.validate_response(response)
+    return len(records), len(records.errors)
+
+
+def measure(function, response, repeat):
+    """Лучшее время из repeat прогонов."""
+    best = None
+    gc.collect()
+    gc.disable()
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function(response)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    gc.enable()
+    return best, result
+
+
+def run(args):
+    """Сравниваем прежнюю проверку и схему."""
+    logging.disable(logging.CRITICAL)
+    response = make_response(args.records, args.bad_share)
+    for name, function in (
+        ('прежние функции', legacy),
+        ('схема + parse_status', compiled),
+        ('только схема', validate_only),
+    ):
+        elapsed, (valid, errors) = measure(function, response, args.repeat)
+        print(
+            f'{name}: {elapsed * 1000:.1f} мс, '
+            f'{elapsed / args.records * 10 ** 9:.0f} нс на запись, '
+            f'годных {valid}, ошибок {errors}'
+        )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--records', type=int, default=100000)
+    parser.add_argument('--bad-share', type=float, default=0.01)
+    parser.add_argument('--repeat', type=int, default=20)
+    run(parser.parse_args())
@@ -0,0 +1,110 @@
+"""Очередь отправки против локального Telegram Bot API с лимитами.
+
+Запуск: python -m benchmarks.bench_sender --chats 20 --messages 5
+"""
+import argparse
+import functools
+import threading
+import time
+
+import telegram
+from telegram.utils.request import Request
+
+import homework
+from benchmarks.mock_telegram import MockTelegramServer
+from sender import SendQueue
+
+
+def make_bot(server, workers):
+    """Бот, который ходит в локальный сервер вместо api.telegram.org."""
+    return telegram.Bot(
+        token='1234:abcdefg',
+        base_url=f'{server.url}/bot',
+        request=Request(con_pool_size=workers + 1),
+    )
+
+
+def send_directly(bot, items, workers):
+    """Отправляем без очереди: пул потоков шлёт сразу."""
+    failures = []
+
+    def worker(part):
+        for chat_id, message in part:
+            try:
+                homework.send_chat_message(bot, chat_id, message)
+            except Exception as error:
+                failures.append(error)
+
+    threads = [
+        threading.Thread(target=worker, args=(items[number::workers],))
+        for number in range(workers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return len(failures)
+
+
+def send_with_queue(bot, items, args):
+    """Отправляем через SendQueue и следим за глубиной очереди."""
+    queue = SendQueue(
+        send=functools.partial(homework.send_chat_message, bot),
+        global_rate=args.global_rate,
+        chat_rate=args.chat_rate,
+        workers=args.workers,
+    ).start()
+    for chat_id, message in items:
+        queue.put(chat_id, message)
+    max_depth = queue.stats()['depth']
+    while not queue.join(timeout=0.1):
+        max_depth = max(max_depth, queue.stats()['depth'])
+    stats = queue.stats()
+    queue.stop()
+    stats['max_depth'] = max_depth
+    return stats
+
+
+def run(args):
+    """Сравниваем прямую отправку и отправку через очередь."""
+    items = [
+        (str(chat), f'Сообщение {number}')
+        for number in range(args.messages)
+        for chat in range(args.chats)
+    ]
+    for mode in ('direct', 'queue'):
+        with MockTelegramServer(
+            global_rate=args.global_rate,
+            chat_rate=args.chat_rate,
+            retry_after=args.retry_after,
+        ) as server:
+            bot = make_bot(server, args.workers)
+            started = time.perf_counter()
+            if mode == 'direct':
+                failed = send_directly(bot, items, args.workers)
+                extra = f'потеряно: {failed}'
+            else:
+                stats = send_with_queue(bot, items, args)
+                extra = (
+                    f'потеряно: {stats["failed"]}, '
+                    f'повторов после 429: {stats["retried"]}, '
+                    f'макс. глубина очереди: {stats["max_depth"]}'
+                )
+            elapsed = time.perf_counter() - started
+        delivered = len(server.messages)
+        print(
+            f'{mode}: доставлено {delivered}/{len(items)} за {elapsed:.2f} с '
+            f'({delivered / elapsed:.1f} сообщений/с), '
+            f'ответов 429: {server.rejected}, {extra}'
+        )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--chats', type=int, default=20)
+    parser.add_argument('--messages', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--global-rate', type=float, default=30)
+    parser.add_argument('--chat-rate', type=float, default=5)
+    parser.add_argument('--retry-after', type=int, default=1)
+    run(parser.parse_args())
@@ -0,0 +1,101 @@
+"""Масштабирование опроса по числу воркеров шардов.
+
+Запускает --workers процессов с общим координатором и общим
+хранилищем состояния, каждый опрашивает свою часть подписок против
+локального API с задержкой --latency и печатает суммарную скорость.
+
+Запуск: python -m benchmarks.bench_sharding --tenants 400 --workers 1 2 4
+"""
+import argparse
+import functools
+import multiprocessing
+import os
+import tempfile
+import time
+
+import homework
+from benchmarks.mock_api import MockPracticumServer
+from http_client import ApiClient
+from sharding import ShardCoordinator
+from state import SQLiteStateStore
+from tenants import PollingEngine, Subscription
+
+
+def worker(number, directory, args, barrier, results):
+    """Один воркер: берёт свою часть подписок и опрашивает её."""
+    client = ApiClient()
+    shard = ShardCoordinator(
+        os.path.join(directory, 'shards.db'), f'worker-{number}', ttl=600
+    )
+    engine = PollingEngine(
+        [
+            Subscription(f'token-{tenant}', str(tenant))
+            for tenant in range(args.tenants)
+        ],
+        fetch=functools.partial(
+            homework.request_homework_statuses, session=client
+        ),
+        check=homework.check_response,
+        parse=homework.parse_status,
+        send=lambda chat_id, message: None,
+        retry_time=homework.RETRY_TIME,
+        store=SQLiteStateStore(os.path.join(directory, 'state.db')),
+        shard=shard,
+        coalesce_ttl=0,
+    )
+    shard.heartbeat()
+    barrier.wait()
+    engine.rebalance(time.time())
+    barrier.wait()
+    started = time.perf_counter()
+    for _ in range(args.rounds):
+        engine.run_once()
+    elapsed = time.perf_counter() - started
+    results.put((len(engine.active) * args.rounds, elapsed))
+    client.close()
+
+
+def measure(workers, args):
+    """Суммарные опросы в секунду для workers процессов."""
+    context = multiprocessing.get_context('fork')
+    barrier = context.Barrier(workers)
+    results = context.Queue()
+    with tempfile.TemporaryDirectory() as directory:
+        processes = [
+            context.Process(
+                target=worker,
+                args=(number, directory, args, barrier, results),
+            )
+            for number in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        measured = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+    polls = sum(count for count, _ in measured)
+    return polls, polls / max(elapsed for _, elapsed in measured)
+
+
+def run(args):
+    """Сравниваем скорость опроса для разного числа воркеров."""
+    with MockPracticumServer(latency=args.latency) as server:
+        homework.ENDPOINT = server.url
+        baseline = None
+        for workers in args.workers:
+            polls, rate = measure(workers, args)
+            baseline = baseline or rate / workers
+            print(
+                f'воркеров: {workers}, опросов: {polls}, '
+                f'{rate:.0f} опросов/с '
+                f'(x{rate / baseline:.2f} к одному воркеру)'
+            )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tenants', type=int, default=400)
+    parser.add_argument('--rounds', type=int, default=2)
+    parser.add_argument('--latency', type=float, default=0.01)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    run(parser.parse_args())
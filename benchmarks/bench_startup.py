@@ -0,0 +1,78 @@
+"""Время запуска воркера: импорт homework и первый опрос API.
+
+Каждый замер - отдельный процесс python с чистым кешем модулей:
+время импорта homework, время до ответа первого опроса локального
+API и пиковый RSS к этому моменту. Сравниваются обычный запуск
+и fast_start, берётся медиана --repeat запусков. С --json результат
+сохраняется в файл, чтобы следить за ним от версии к версии.
+
+Запуск: python -m benchmarks.bench_startup --repeat 5 --json startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from benchmarks.mock_api import MockPracticumServer
+
+PROBE = '''
+import json, resource, sys, time
+started = time.perf_counter()
+import homework
+imported = time.perf_counter()
+homework.ENDPOINT = sys.argv[1]
+homework.get_api_answer(0)
+polled = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'first_poll_ms': (polled - started) * 1000,
+    'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'modules': len(sys.modules),
+}))
+'''
+
+
+def probe(url, fast_start):
+    """Один запуск воркера в отдельном процессе."""
+    env = dict(os.environ, pr_token='token', tel_token='token',
+               tel_chat_id='1')
+    env.pop('fast_start', None)
+    if fast_start:
+        env['fast_start'] = '1'
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE, url],
+        env=env, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def run(args):
+    """Медианы замеров для обычного запуска и fast_start."""
+    result = {}
+    with MockPracticumServer() as server:
+        for mode, fast_start in (('default', False), ('fast_start', True)):
+            runs = [probe(server.url, fast_start) for _ in range(args.repeat)]
+            result[mode] = {
+                name: round(statistics.median(item[name] for item in runs), 1)
+                for name in runs[0]
+            }
+            measured = result[mode]
+            print(
+                f'{mode}: импорт {measured["import_ms"]} мс, '
+                f'первый опрос через {measured["first_poll_ms"]} мс, '
+                f'RSS {measured["rss_mb"]} МБ, '
+                f'модулей {measured["modules"]:.0f}'
+            )
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(result, file, indent=2)
+    return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', help='сохранить результат в файл')
+    run(parser.parse_args())
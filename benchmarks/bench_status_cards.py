@@ -0,0 +1,103 @@
+"""Отдельные сообщения против карточек статусов на локальном Bot API.
+
+--chats чатов, в каждом --homeworks работ, каждая проходит --transitions
+смен статуса (reviewing -> rejected -> approved...) с паузой --interval
+между сменами; все изменения одной смены приходят разом. Сравнивает
+отправку сообщения на каждое изменение и карточки статусов (на работу
+и на чат) с окном --debounce: число вызовов API, сообщений в чатах
+и время до доставки всего через SendQueue с лимитами Телеграма.
+
+Запуск: python -m benchmarks.bench_status_cards --chats 20 --homeworks 5
+"""
+import argparse
+import functools
+import time
+
+import homework
+from benchmarks.bench_sender import make_bot
+from benchmarks.mock_telegram import MockTelegramServer
+from sender import SendQueue
+from state import MemoryStateStore
+from status_cards import CHAT, HOMEWORK, StatusCards
+
+STATUSES = ('reviewing', 'rejected', 'approved')
+
+
+def transitions(args):
+    """Изменения статусов по сменам."""
+    return [
+        [
+            (str(chat), f'hw{number}', homework.parse_status({
+                'homework_name': f'hw{number}',
+                'status': STATUSES[step % len(STATUSES)],
+            }))
+            for chat in range(args.chats)
+            for number in range(args.homeworks)
+        ]
+        for step in range(args.transitions)
+    ]
+
+
+def deliver(mode, changes, server, args):
+    """Доставляем изменения и ждём, пока очередь опустеет."""
+    bot = make_bot(server, args.workers)
+    queue = SendQueue(
+        send=functools.partial(homework.deliver_message, bot),
+        global_rate=args.global_rate,
+        chat_rate=args.chat_rate,
+        workers=args.workers,
+    ).start()
+    cards = None
+    if mode != 'messages':
+        cards = StatusCards(
+            MemoryStateStore(), queue.put, mode=mode, debounce=args.debounce
+        ).start()
+    for step, batch in enumerate(changes):
+        if step:
+            time.sleep(args.interval)
+        for chat_id, key, message in batch:
+            if cards is None:
+                queue.put(chat_id, message)
+            else:
+                cards.update(chat_id, chat_id, key, message)
+    if cards is not None:
+        time.sleep(args.debounce)
+        while cards.next_time() is not None or not queue.join(timeout=0.1):
+            time.sleep(0.05)
+        cards.stop()
+    queue.join()
+    stats = queue.stats()
+    queue.stop()
+    return stats
+
+
+def run(args):
+    """Сравниваем сообщения на каждое изменение и карточки."""
+    changes = transitions(args)
+    for mode in ('messages', HOMEWORK, CHAT):
+        with MockTelegramServer(
+            global_rate=args.global_rate, chat_rate=args.chat_rate,
+        ) as server:
+            started = time.perf_counter()
+            stats = deliver(mode, changes, server, args)
+            elapsed = time.perf_counter() - started
+        calls = len(server.messages) + server.edits
+        print(
+            f'{mode}: изменений {sum(map(len, changes))}, вызовов API {calls} '
+            f'(сообщений {len(server.messages)}, правок {server.edits}), '
+            f'ответов 429: {server.rejected}, потеряно: {stats["failed"]}, '
+            f'{elapsed:.2f} с'
+        )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--chats', type=int, default=20)
+    parser.add_argument('--homeworks', type=int, default=5)
+    parser.add_argument('--transitions', type=int, default=3)
+    parser.add_argument('--interval', type=float, default=2.0)
+    parser.add_argument('--debounce', type=float, default=0.5)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--global-rate', type=float, default=30)
+    parser.add_argument('--chat-rate', type=float, default=5)
+    run(parser.parse_args())
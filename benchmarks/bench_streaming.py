@@ -0,0 +1,112 @@
+"""Пиковый RSS и время разбора больших ответов API.
+
+Сравнивает разбор целиком (как response.json()) и потоковый разбор
+HomeworkStream на синтетических ответах, сжатых gzip. Каждый замер
+идёт в отдельном процессе, чтобы пиковый RSS не смешивался.
+
+Запуск: python -m benchmarks.bench_streaming --homeworks 10000 100000 1000000
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+import zlib
+
+import homework
+from streaming import HomeworkStream
+
+CHUNK_SIZE = 64 * 1024
+
+
+def body_chunks(count, records_per_chunk=500):
+    """Тело ответа на count работ кусками текста, без сборки целиком."""
+    yield b'{"homeworks": ['
+    for start in range(0, count, records_per_chunk):
+        records = (
+            json.dumps({
+                'id': number,
+                'homework_name': f'username__hw_{number}.zip',
+                'status': ('approved', 'rejected', 'reviewing')[number % 3],
+                'reviewer_comment': 'Замечаний нет, отличная работа!',
+                'date_updated': '2021-11-01T10:00:00Z',
+                'lesson_name': 'Финальный проект',
+            }, ensure_ascii=False)
+            for number in range(start, min(count, start + records_per_chunk))
+        )
+        prefix = ', ' if start else ''
+        yield (prefix + ', '.join(records)).encode()
+    yield b'], "current_date": 1637000000}'
+
+
+def gzip_chunks(chunks):
+    """Сжимаем поток кусков gzip, как это делает сервер."""
+    compressor = zlib.compressobj(5, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def gunzip_chunks(chunks):
+    """Распаковываем поток кусками, как iter_content у requests."""
+    decompressor = zlib.decompressobj(31)
+    for chunk in chunks:
+        data = decompressor.decompress(chunk)
+        if data:
+            yield data
+
+
+def parse_full(count):
+    """Весь ответ в памяти: распаковка и json.loads."""
+    compressed = b''.join(gzip_chunks(body_chunks(count)))
+    response = json.loads(zlib.decompress(compressed, 31))
+    homeworks = homework.check_response(response)
+    return sum(1 for item in homeworks if homework.parse_status(item))
+
+
+def parse_stream(count):
+    """Потоковый разбор по мере распаковки."""
+    stream = HomeworkStream(gunzip_chunks(gzip_chunks(body_chunks(count))))
+    homeworks = homework.check_response(stream)
+    return sum(1 for item in homeworks if homework.parse_status(item))
+
+
+def measure(mode, count):
+    """Один замер в текущем процессе."""
+    parse = parse_stream if mode == 'stream' else parse_full
+    started = time.perf_counter()
+    parsed = parse(count)
+    elapsed = time.perf_counter() - started
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({'parsed': parsed, 'seconds': elapsed, 'rss_mb': peak}))
+
+
+def run(args):
+    """Запускаем каждый замер в отдельном процессе."""
+    for count in args.homeworks:
+        for mode in ('full', 'stream'):
+            output = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.bench_streaming',
+                 '--measure', mode, '--homeworks', str(count)],
+                capture_output=True, check=True, text=True,
+            ).stdout
+            result = json.loads(output)
+            print(
+                f'{count} работ, {mode}: {result["seconds"]:.2f} с, '
+                f'пиковый RSS {result["rss_mb"]:.0f} МБ'
+            )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--homeworks', type=int, nargs='+',
+                        default=[10000, 100000, 1000000])
+    parser.add_argument('--measure', choices=('full', 'stream'))
+    arguments = parser.parse_args()
+    if arguments.measure:
+        measure(arguments.measure, arguments.homeworks[0])
+    else:
+        run(arguments)
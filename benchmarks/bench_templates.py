@@ -0,0 +1,94 @@
+"""Скорость подготовки уведомлений при рассылке по многим чатам.
+
+Для --changes изменений статусов, каждое из которых рассылается
+в --chats чатов с языками из --locales, сравнивает parse_status
+на каждый чат (только русский), str.format шаблона из каталога,
+скомпилированные шаблоны без кеша и MessageTemplates.render
+с кешем готовых сообщений.
+
+Запуск: python -m benchmarks.bench_templates --changes 1000 --chats 50
+"""
+import argparse
+import itertools
+import time
+
+import homework
+from records import Homework
+from templates import MessageTemplates
+
+STATUSES = ('approved', 'reviewing', 'rejected')
+
+
+def changes(count):
+    """Изменения статусов; у отклонённых работ есть комментарий."""
+    return [
+        Homework(
+            STATUSES[number % 3], f'hw{number}', number, None,
+            'Поправьте тесты' if STATUSES[number % 3] == 'rejected' else None,
+        )
+        for number in range(count)
+    ]
+
+
+def formatted(catalog, record):
+    """Сообщение через str.format без компиляции."""
+    return catalog['message'].format(
+        homework_name=record.homework_name,
+        verdict=catalog['verdicts'][record.status],
+        reviewer_comment=record.reviewer_comment or '',
+    )
+
+
+def run(args):
+    """Сравниваем три способа на одной рассылке."""
+    records = changes(args.changes)
+    chats = list(itertools.islice(itertools.cycle(args.locales), args.chats))
+    templates = MessageTemplates.load(
+        homework.LOCALES_DIR,
+        base={'ru': {
+            'message': homework.MESSAGE_TEMPLATE,
+            'verdicts': homework.HOMEWORK_STATUSES,
+        }},
+        cache_size=args.changes * len(args.locales),
+    )
+    raw = {
+        locale: {
+            'message': templates.templates[locale, 'approved'][0].source
+            .replace('[[', '').replace(']]', ''),
+            'verdicts': {
+                status: templates.templates[locale, status][1]
+                for status in STATUSES
+            },
+        }
+        for locale in templates.locales
+    }
+
+    def by_format(record, locale):
+        return formatted(raw[locale], record)
+
+    modes = {
+        'parse_status': lambda record, locale: homework.parse_status(record),
+        'str.format': by_format,
+        'compiled': templates.format,
+        'cached': templates.render,
+    }
+    total = len(records) * len(chats)
+    for mode, render in modes.items():
+        started = time.perf_counter()
+        for record in records:
+            for locale in chats:
+                render(record, locale)
+        elapsed = time.perf_counter() - started
+        print(
+            f'{mode}: {total / elapsed:,.0f} сообщений/с '
+            f'({elapsed / total * 1e9:.0f} нс на сообщение)'
+        )
+    print(f'кеш: {templates.hits} попаданий, {templates.misses} промахов')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--changes', type=int, default=1000)
+    parser.add_argument('--chats', type=int, default=50)
+    parser.add_argument('--locales', nargs='+', default=['ru', 'en'])
+    run(parser.parse_args())
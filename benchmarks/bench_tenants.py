@@ -0,0 +1,72 @@
+"""Сколько подписок обслуживает одно ядро.
+
+Запуск: python -m benchmarks.bench_tenants --tenants 500
+"""
+import argparse
+import functools
+import time
+
+import homework
+from benchmarks.mock_api import MockPracticumServer
+from http_client import ApiClient
+from tenants import PollingEngine, Subscription
+
+
+def run(tenants, rounds, pooled):
+    """Прогоняем несколько циклов опроса против локального API."""
+    sent = []
+    client = ApiClient() if pooled else None
+    subscriptions = [
+        Subscription(f'token-{number}', str(number))
+        for number in range(tenants)
+    ]
+
+    with MockPracticumServer() as server:
+        homework.ENDPOINT = server.url
+        engine = PollingEngine(
+            subscriptions,
+            fetch=functools.partial(
+                homework.request_homework_statuses, session=client
+            ),
+            check=homework.check_response,
+            parse=homework.parse_status,
+            send=lambda chat_id, message: sent.append(chat_id),
+            retry_time=homework.RETRY_TIME,
+        )
+        cpu_started = time.process_time()
+        started = time.perf_counter()
+        for _ in range(rounds):
+            engine.run_once()
+        elapsed = time.perf_counter() - started
+        cpu = time.process_time() - cpu_started
+
+    polls = tenants * rounds
+    rate = polls / elapsed
+    print(f'подписок: {tenants}, циклов: {rounds}')
+    print(f'опросов: {polls} за {elapsed:.2f} с ({rate:.0f} опросов/с)')
+    print(f'CPU на опрос: {cpu / polls * 1000:.2f} мс')
+    print(f'уведомлений: {len(sent)}')
+    print(
+        'подписок на ядро при RETRY_TIME='
+        f'{homework.RETRY_TIME} с: ~{int(rate * homework.RETRY_TIME)}'
+    )
+    if client is not None:
+        stats = client.stats()
+        client.close()
+        print(
+            f'соединений: {stats["connections"]}, '
+            f'переиспользование: {stats["reuse_rate"]:.1%}, '
+            f'средняя задержка: {stats["avg_latency"] * 1000:.2f} мс'
+        )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tenants', type=int, default=200)
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument(
+        '--no-pool', action='store_true',
+        help='запросы через requests.get без пула соединений',
+    )
+    args = parser.parse_args()
+    run(args.tenants, args.rounds, pooled=not args.no_pool)
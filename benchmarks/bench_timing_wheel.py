@@ -0,0 +1,88 @@
+"""Вставка, отмена и срабатывание таймеров: колесо против кучи.
+
+Запуск: python -m benchmarks.bench_timing_wheel --entries 100000 1000000
+"""
+import argparse
+import heapq
+import random
+import time
+
+from timing_wheel import TimingWheel
+
+HORIZON = 3600
+
+
+def bench_wheel(deadlines, cancelled):
+    """Колесо таймеров с шагом 1 с."""
+    wheel = TimingWheel(tick=1.0, start=0)
+    started = time.perf_counter()
+    for key, when in enumerate(deadlines):
+        wheel.insert(key, when)
+    inserted = time.perf_counter()
+    for key in cancelled:
+        wheel.cancel(key)
+    cancelled_at = time.perf_counter()
+    fired = 0
+    for now in range(1, HORIZON + 2):
+        fired += len(wheel.advance(now))
+    finished = time.perf_counter()
+    return (
+        inserted - started,
+        cancelled_at - inserted,
+        finished - cancelled_at,
+        fired,
+    )
+
+
+def bench_heap(deadlines, cancelled):
+    """Куча с ленивой отменой, как прежний планировщик."""
+    heap = []
+    alive = {}
+    started = time.perf_counter()
+    for key, when in enumerate(deadlines):
+        alive[key] = when
+        heapq.heappush(heap, (when, key))
+    inserted = time.perf_counter()
+    for key in cancelled:
+        alive.pop(key, None)
+    cancelled_at = time.perf_counter()
+    fired = 0
+    for now in range(1, HORIZON + 2):
+        while heap and heap[0][0] <= now:
+            when, key = heapq.heappop(heap)
+            if alive.get(key) == when:
+                del alive[key]
+                fired += 1
+    finished = time.perf_counter()
+    return (
+        inserted - started,
+        cancelled_at - inserted,
+        finished - cancelled_at,
+        fired,
+    )
+
+
+def run(entries_list, seed):
+    """Печатаем скорость операций для каждого размера."""
+    for entries in entries_list:
+        rng = random.Random(seed)
+        deadlines = [rng.uniform(0, HORIZON) for _ in range(entries)]
+        cancelled = rng.sample(range(entries), entries // 10)
+        for name, bench in (('wheel', bench_wheel), ('heap', bench_heap)):
+            insert, cancel, fire, fired = bench(deadlines, cancelled)
+            print(
+                f'{name} {entries}: '
+                f'вставка {entries / insert:,.0f}/с, '
+                f'отмена {len(cancelled) / cancel:,.0f}/с, '
+                f'срабатывание {fired / fire:,.0f}/с ({fired} таймеров)'
+            )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--entries', type=int, nargs='+', default=[100000, 1000000]
+    )
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    run(args.entries, args.seed)
@@ -0,0 +1,90 @@
+"""Пропускная способность приёма push-уведомлений.
+
+Поднимает WebhookServer над движком опроса и шлёт статусы из
+нескольких потоков keep-alive сессиями requests.
+
+Запуск: python -m benchmarks.bench_webhook --tenants 100 --pushes 5000
+"""
+import argparse
+import threading
+import time
+
+import requests
+
+import homework
+from tenants import PollingEngine, Subscription
+from webhook import WebhookServer
+
+STATUSES = ('reviewing', 'approved', 'rejected')
+
+
+def push_worker(url, subscriptions, pushes, offset, latencies):
+    """Шлём pushes уведомлений по кругу подписок."""
+    session = requests.Session()
+    for number in range(pushes):
+        subscription = subscriptions[(offset + number) % len(subscriptions)]
+        payload = {'homeworks': [{
+            'id': 1,
+            'homework_name': 'hw',
+            'status': STATUSES[(offset + number) % len(STATUSES)],
+        }]}
+        started = time.perf_counter()
+        response = session.post(
+            url,
+            json=payload,
+            headers={'Authorization': f'OAuth {subscription.practicum_token}'},
+        )
+        latencies.append(time.perf_counter() - started)
+        response.raise_for_status()
+    session.close()
+
+
+def run(args):
+    """Замеряем push/с и задержку ответа."""
+    subscriptions = [
+        Subscription(f'token-{number}', str(number))
+        for number in range(args.tenants)
+    ]
+    sent = []
+    engine = PollingEngine(
+        subscriptions,
+        fetch=lambda token, timestamp: {'homeworks': []},
+        check=homework.check_response,
+        parse=homework.parse_status,
+        send=lambda chat_id, message: sent.append(chat_id),
+        retry_time=0,
+    )
+    server = WebhookServer(engine, '127.0.0.1', 0).start()
+    latencies = []
+    per_client = args.pushes // args.clients
+    threads = [
+        threading.Thread(
+            target=push_worker,
+            args=(server.url, subscriptions, per_client, number * 7,
+                  latencies),
+        )
+        for number in range(args.clients)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    server.stop()
+
+    latencies.sort()
+    p99 = latencies[int(0.99 * (len(latencies) - 1))] * 1000
+    print(
+        f'push: {server.received} за {elapsed:.2f} с '
+        f'({server.received / elapsed:.0f}/с), p99 {p99:.1f} мс, '
+        f'уведомлений {len(sent)}'
+    )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tenants', type=int, default=100)
+    parser.add_argument('--pushes', type=int, default=5000)
+    parser.add_argument('--clients', type=int, default=4)
+    run(parser.parse_args())
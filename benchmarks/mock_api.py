@@ -0,0 +1,213 @@
+import gzip
+import hashlib
+import json
+import random
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+API_PATH = '/api/user_api/homework_statuses/'
+STATUSES = ('reviewing', 'approved', 'rejected')
+
+
+def entity_tag(body):
+    """ETag тела ответа."""
+    return '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+
+
+class MockPracticumHandler(BaseHTTPRequestHandler):
+    """Локальная замена API Практикума."""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        """Отдаём список домашних работ."""
+        url = urlparse(self.path)
+        if url.path != API_PATH:
+            self.send_error(404)
+            return
+        authorization = self.headers.get('Authorization', '')
+        if not authorization.startswith('OAuth '):
+            self.send_error(401)
+            return
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if self.server.take_failure():
+            self.send_error(503)
+            return
+
+        query = parse_qs(url.query)
+        from_date = int(query.get('from_date', ['0'])[0])
+        token = authorization[len('OAuth '):]
+        body = json.dumps({
+            'homeworks': self.server.homeworks(from_date, token),
+            'current_date': int(self.server.clock()),
+        }).encode()
+        if self.server.conditional and self.not_modified(body):
+            self.server.body_sizes.append(0)
+            return
+        validators = body
+        body, encoding = self.encode(body)
+        self.server.body_sizes.append(len(body))
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        if self.server.conditional:
+            self.send_validators(validators)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def encode(self, body):
+        """Сжимаем тело, если сервер и клиент это поддерживают."""
+        if not self.server.compress:
+            return body, None
+        accepted = self.headers.get('Accept-Encoding', '')
+        if brotli is not None and 'br' in accepted:
+            return brotli.compress(body), 'br'
+        if 'gzip' in accepted:
+            return gzip.compress(body, compresslevel=5), 'gzip'
+        return body, None
+
+    def send_validators(self, body):
+        """Заголовки ETag и Last-Modified для условных запросов."""
+        self.send_header('ETag', entity_tag(body))
+        self.send_header(
+            'Last-Modified',
+            formatdate(self.server.last_modified(), usegmt=True),
+        )
+
+    def not_modified(self, body):
+        """Отвечаем 304, если клиент уже получил это тело."""
+        if_none_match = self.headers.get('If-None-Match')
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_none_match is not None:
+            fresh = if_none_match == entity_tag(body)
+        elif if_modified_since is not None:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+            fresh = self.server.last_modified() <= since
+        else:
+            fresh = False
+        if fresh:
+            self.send_response(304)
+            self.send_validators(body)
+            self.end_headers()
+        return fresh
+
+    def log_message(self, format, *args):
+        """Не засоряем вывод бенчмарка логами сервера."""
+
+
+class MockPracticumServer(ThreadingHTTPServer):
+    """HTTP-сервер, отвечающий как ENDPOINT.
+
+    homeworks_count - сколько работ в каждом ответе (размер ответа),
+    failures - сколько первых запросов получат 503, error_rate - доля
+    случайных ответов 503, latency - задержка ответа в секундах,
+    changing - статус первой работы меняется при каждом запросе
+    с тем же токеном, conditional - сервер отдаёт ETag и Last-Modified
+    и отвечает 304 на условные запросы, compress - сжимает ответ
+    gzip или br по Accept-Encoding.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, homeworks_count=1, failures=0, clock=time.time,
+                 latency=0.0, error_rate=0.0, changing=False, seed=None,
+                 conditional=False, compress=False, host='127.0.0.1',
+                 port=0):
+        super().__init__((host, port), MockPracticumHandler)
+        self.homeworks_count = homeworks_count
+        self.failures = failures
+        self.clock = clock
+        self.latency = latency
+        self.error_rate = error_rate
+        self.changing = changing
+        self.conditional = conditional
+        self.compress = compress
+        self.random = random.Random(seed)
+        self.updates = []
+        self.body_sizes = []
+        self.requests_count = 0
+        self._requests_by_token = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self):
+        """Адрес, который подставляется вместо ENDPOINT."""
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}{API_PATH}'
+
+    def take_failure(self):
+        """Считаем запрос и решаем, ответить ли ошибкой 503."""
+        with self._lock:
+            self.requests_count += 1
+            if self.failures > 0:
+                self.failures -= 1
+                return True
+            return self.random.random() < self.error_rate
+
+    def add_update(self, homework, updated_at):
+        """Добавляем изменение статуса, видимое с from_date <= updated_at."""
+        with self._lock:
+            self.updates.append((updated_at, homework))
+
+    def last_modified(self):
+        """Время последнего изменения из add_update."""
+        with self._lock:
+            return max((moment for moment, _ in self.updates), default=0)
+
+    def homeworks(self, from_date, token=None):
+        """Список работ, который вернёт сервер.
+
+        Постоянные работы возвращаются всегда и задают размер ответа,
+        изменения из add_update - только начиная с from_date.
+        """
+        with self._lock:
+            updates = list(self.updates)
+            served = self._requests_by_token.get(token, 0)
+            self._requests_by_token[token] = served + 1
+        homeworks = [
+            {
+                'id': number,
+                'homework_name': f'hw{number}',
+                'status': 'reviewing',
+                'date_updated': '2021-11-01T10:00:00Z',
+            }
+            for number in range(self.homeworks_count)
+        ]
+        if self.changing and homeworks:
+            homeworks[0]['status'] = STATUSES[served % len(STATUSES)]
+        homeworks.extend(
+            homework for updated_at, homework in reversed(updates)
+            if updated_at >= from_date
+        )
+        return homeworks
+
+    def start(self):
+        """Запускаем сервер в фоновом потоке."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Останавливаем сервер."""
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
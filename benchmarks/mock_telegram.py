@@ -0,0 +1,158 @@
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MockTelegramHandler(BaseHTTPRequestHandler):
+    """Локальная замена Telegram Bot API."""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        """Обрабатываем вызов метода Bot API."""
+        length = int(self.headers.get('Content-Length', 0))
+        raw = self.rfile.read(length) if length else b'{}'
+        try:
+            payload = json.loads(raw or b'{}')
+        except ValueError:
+            payload = {}
+        method = self.path.rstrip('/').rsplit('/', 1)[-1]
+        status, result = self.server.handle(method, payload)
+        body = json.dumps(result).encode()
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Не засоряем вывод бенчмарка логами сервера."""
+
+
+class MockTelegramServer(ThreadingHTTPServer):
+    """HTTP-сервер, отвечающий как api.telegram.org.
+
+    global_rate и chat_rate - лимиты сообщений в секунду, сверх
+    которых сервер отвечает 429 с retry_after; latency - задержка
+    ответа в секундах, error_rate - доля случайных ответов 502.
+    Кроме sendMessage понимает editMessageText: правки считаются
+    в edits, а текст сообщения в messages заменяется.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, global_rate=None, chat_rate=None, retry_after=1,
+                 latency=0.0, error_rate=0.0, seed=None,
+                 host='127.0.0.1', port=0):
+        super().__init__((host, port), MockTelegramHandler)
+        self.global_rate = global_rate
+        self.chat_rate = chat_rate
+        self.retry_after = retry_after
+        self.latency = latency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.messages = []
+        self.edits = 0
+        self.rejected = 0
+        self._recent = []
+        self._last_by_chat = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self):
+        """Адрес API без пути /bot<token>."""
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def _limited(self, chat_id, now):
+        if self.chat_rate is not None:
+            last = self._last_by_chat.get(chat_id)
+            if last is not None and now - last < 1 / self.chat_rate:
+                return True
+        if self.global_rate is not None:
+            self._recent = [sent for sent in self._recent if now - sent < 1]
+            if len(self._recent) >= self.global_rate:
+                return True
+        self._last_by_chat[chat_id] = now
+        self._recent.append(now)
+        return False
+
+    def handle(self, method, payload):
+        """Возвращаем HTTP-статус и тело ответа для метода."""
+        if method not in ('sendMessage', 'editMessageText'):
+            return 404, {'ok': False, 'description': 'Not Found'}
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            if self.random.random() < self.error_rate:
+                return 502, {'ok': False, 'error_code': 502,
+                             'description': 'Bad Gateway'}
+            if self._limited(payload.get('chat_id'), time.monotonic()):
+                self.rejected += 1
+                return 429, {
+                    'ok': False,
+                    'error_code': 429,
+                    'description': 'Too Many Requests: retry after '
+                                   f'{self.retry_after}',
+                    'parameters': {'retry_after': self.retry_after},
+                }
+            if method == 'editMessageText':
+                return self._edit(payload)
+            self.messages.append(payload)
+            message_id = len(self.messages)
+        return 200, {'ok': True, 'result': {
+            'message_id': message_id,
+            'date': int(time.time()),
+            'chat': {'id': int(payload.get('chat_id', 0)), 'type': 'private'},
+            'text': payload.get('text'),
+        }}
+
+    def _edit(self, payload):
+        try:
+            message_id = int(payload.get('message_id'))
+        except (TypeError, ValueError):
+            message_id = 0
+        if (
+            not 0 < message_id <= len(self.messages)
+            or str(self.messages[message_id - 1].get('chat_id'))
+            != str(payload.get('chat_id'))
+        ):
+            return 400, {'ok': False, 'error_code': 400,
+                         'description': 'Bad Request: message to edit '
+                                        'not found'}
+        message = self.messages[message_id - 1]
+        if message.get('text') == payload.get('text'):
+            return 400, {'ok': False, 'error_code': 400,
+                         'description': 'Bad Request: message is not '
+                                        'modified'}
+        message['text'] = payload.get('text')
+        self.edits += 1
+        return 200, {'ok': True, 'result': {
+            'message_id': message_id,
+            'date': int(time.time()),
+            'edit_date': int(time.time()),
+            'chat': {'id': int(payload.get('chat_id', 0)), 'type': 'private'},
+            'text': payload.get('text'),
+        }}
+
+    def start(self):
+        """Запускаем сервер в фоновом потоке."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Останавливаем сервер."""
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
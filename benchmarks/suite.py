@@ -0,0 +1,197 @@
+"""Сквозной бенчмарк бота против локальных API Практикума и Телеграма.
+
+Поднимает заглушки обоих API с настраиваемыми задержкой, долей ошибок
+и размером ответа, гоняет движок опроса с пулом соединений и очередью
+отправки и печатает опросы/с, отправки/с, p50/p99 задержек и RSS.
+Работает без сети; с порогами --min-* возвращает код 1 при регрессии.
+
+Запуск: python -m benchmarks.suite --tenants 200 --rounds 5
+"""
+import argparse
+import functools
+import json
+import logging
+import resource
+import sys
+import threading
+import time
+
+import telegram
+from telegram.utils.request import Request
+
+import homework
+from benchmarks.mock_api import MockPracticumServer
+from benchmarks.mock_telegram import MockTelegramServer
+from http_client import ApiClient
+from sender import SendQueue
+from tenants import PollingEngine, Subscription
+
+
+class Timings:
+    """Потокобезопасный сбор длительностей вызовов."""
+
+    def __init__(self):
+        self.values = []
+        self._lock = threading.Lock()
+
+    def wrap(self, function):
+        """Оборачиваем функцию замером длительности."""
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                with self._lock:
+                    self.values.append(elapsed)
+        return timed
+
+    def percentile(self, share):
+        """Перцентиль длительности в миллисекундах."""
+        if not self.values:
+            return 0.0
+        ordered = sorted(self.values)
+        index = min(len(ordered) - 1, int(share * len(ordered)))
+        return ordered[index] * 1000
+
+
+def rss_mb():
+    """Текущий RSS процесса в мегабайтах."""
+    try:
+        with open('/proc/self/statm') as file:
+            pages = int(file.read().split()[1])
+        return pages * resource.getpagesize() / 2 ** 20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run(args):
+    """Прогоняем сценарий и возвращаем словарь с результатами."""
+    subscriptions = [
+        Subscription(f'token-{number}', str(number))
+        for number in range(args.tenants)
+    ]
+    polls = Timings()
+    sends = Timings()
+    client = ApiClient(retries=0)
+    api = MockPracticumServer(
+        homeworks_count=args.homeworks,
+        latency=args.api_latency,
+        error_rate=args.api_error_rate,
+        changing=True,
+        seed=args.seed,
+    )
+    bot_api = MockTelegramServer(
+        latency=args.telegram_latency,
+        error_rate=args.telegram_error_rate,
+        seed=args.seed,
+    )
+    with api, bot_api:
+        original_endpoint = homework.ENDPOINT
+        homework.ENDPOINT = api.url
+        bot = telegram.Bot(
+            token='1234:abcdefg',
+            base_url=f'{bot_api.url}/bot',
+            request=Request(con_pool_size=args.send_workers + 1),
+        )
+        queue = SendQueue(
+            send=sends.wrap(
+                functools.partial(homework.send_chat_message, bot)
+            ),
+            global_rate=10 ** 6,
+            chat_rate=10 ** 6,
+            workers=args.send_workers,
+        ).start()
+        engine = PollingEngine(
+            subscriptions,
+            fetch=polls.wrap(functools.partial(
+                homework.request_homework_statuses, session=client
+            )),
+            check=homework.check_response,
+            parse=homework.parse_status,
+            send=queue.put,
+            retry_time=0,
+        )
+        try:
+            started = time.perf_counter()
+            for _ in range(args.rounds):
+                engine.run_once()
+            polled = time.perf_counter() - started
+            queue.join()
+            elapsed = time.perf_counter() - started
+        finally:
+            queue.stop()
+            client.close()
+            homework.ENDPOINT = original_endpoint
+
+    return {
+        'polls': len(polls.values),
+        'polls_per_second': len(polls.values) / polled,
+        'poll_p50_ms': polls.percentile(0.5),
+        'poll_p99_ms': polls.percentile(0.99),
+        'sends': len(sends.values),
+        'delivered': len(bot_api.messages),
+        'sends_per_second': len(sends.values) / elapsed,
+        'send_p50_ms': sends.percentile(0.5),
+        'send_p99_ms': sends.percentile(0.99),
+        'rss_mb': rss_mb(),
+    }
+
+
+def check_thresholds(result, args):
+    """Список нарушенных порогов."""
+    failures = []
+    if result['polls_per_second'] < args.min_polls_per_second:
+        failures.append('polls_per_second')
+    if result['sends_per_second'] < args.min_sends_per_second:
+        failures.append('sends_per_second')
+    if args.max_poll_p99_ms and result['poll_p99_ms'] > args.max_poll_p99_ms:
+        failures.append('poll_p99_ms')
+    if args.max_rss_mb and result['rss_mb'] > args.max_rss_mb:
+        failures.append('rss_mb')
+    return failures
+
+
+def make_parser():
+    """Аргументы командной строки бенчмарка."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tenants', type=int, default=200)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--homeworks', type=int, default=10,
+                        help='работ в каждом ответе API')
+    parser.add_argument('--api-latency', type=float, default=0.0)
+    parser.add_argument('--api-error-rate', type=float, default=0.0)
+    parser.add_argument('--telegram-latency', type=float, default=0.0)
+    parser.add_argument('--telegram-error-rate', type=float, default=0.0)
+    parser.add_argument('--send-workers', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', help='сохранить результат в файл')
+    parser.add_argument('--log-level', default='CRITICAL')
+    parser.add_argument('--min-polls-per-second', type=float, default=0)
+    parser.add_argument('--min-sends-per-second', type=float, default=0)
+    parser.add_argument('--max-poll-p99-ms', type=float, default=0)
+    parser.add_argument('--max-rss-mb', type=float, default=0)
+    return parser
+
+
+def main(argv=None):
+    """Запускаем бенчмарк и проверяем пороги."""
+    args = make_parser().parse_args(argv)
+    logging.basicConfig(level=args.log_level)
+    result = run(args)
+    for name, value in result.items():
+        print(f'{name}: {value:.2f}' if isinstance(value, float)
+              else f'{name}: {value}')
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(result, file, indent=2)
+    failures = check_thresholds(result, args)
+    if failures:
+        print(f'Регрессия: {", ".join(failures)}')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,213 @@
+import logging
+import threading
+import time
+
+from exceptions import ApiStatusError, CircuitOpenError
+from tenants import token_digest
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+TOO_MANY_REQUESTS = 429
+
+
+def is_outage(error):
+    """Говорит ли ошибка о недоступности API целиком.
+
+    Это ошибки соединения и ответы 5xx и 429. Остальные коды,
+    например 401 и 403 отозванного токена, касаются одной подписки.
+    """
+    if isinstance(error, ApiStatusError):
+        return (
+            error.status_code >= 500
+            or error.status_code == TOO_MANY_REQUESTS
+        )
+    return isinstance(error, ConnectionError)
+
+
+class CircuitBreaker:
+    """Автомат closed -> open -> half_open -> closed.
+
+    После failure_threshold сбоев подряд цепь размыкается, и запросы
+    не выполняются reset_timeout секунд. Затем цепь полуоткрыта:
+    проходит один пробный запрос. Успех замыкает цепь, сбой снова
+    размыкает её на reset_timeout. on_change(breaker, old, new)
+    вызывается при каждой смене состояния.
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=60.0,
+                 on_change=None, clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.on_change = on_change
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def _set_state(self, state):
+        old, self.state = self.state, state
+        if old != state and self.on_change is not None:
+            self.on_change(self, old, state)
+
+    def allow(self):
+        """Можно ли сейчас выполнить запрос."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                if self.clock() - self.opened_at < self.reset_timeout:
+                    return False
+                self._set_state(HALF_OPEN)
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def release(self):
+        """Отказываемся от выданного пробного запроса без результата."""
+        with self._lock:
+            self._probing = False
+
+    def record_success(self):
+        """Запрос прошёл успешно."""
+        with self._lock:
+            self.failures = 0
+            self._probing = False
+            if self.state != CLOSED:
+                self._set_state(CLOSED)
+
+    def record_failure(self):
+        """Запрос завершился сбоем."""
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == HALF_OPEN or (
+                self.state == CLOSED
+                and self.failures >= self.failure_threshold
+            ):
+                self.opened_at = self.clock()
+                self._set_state(OPEN)
+
+
+class ApiCircuitBreakers:
+    """Глобальная цепь для ENDPOINT и отдельные цепи для токенов.
+
+    Глобальная цепь считает сбои подряд по всем подпискам и защищает
+    от шторма повторов, когда API недоступен целиком. Цепь токена
+    отключает одну подписку, например с отозванным токеном, не мешая
+    остальным. Сбоем считается только ConnectionError: ошибки формата
+    ответа к доступности API отношения не имеют. Глобальной цепи
+    засчитываются только ошибки соединения и ответы 5xx и 429
+    (is_outage), а, например, 401 и 403 - только цепи токена, чтобы
+    несколько отозванных токенов подряд не останавливали опрос всех.
+
+    Смены состояния попадают в метрики; о размыкании и восстановлении
+    глобальной цепи один раз сообщается через alert(message).
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=300.0,
+                 global_threshold=20, global_reset_timeout=60.0,
+                 metrics=None, alert=None, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.alert = alert
+        self.tenants = {}
+        self.global_breaker = CircuitBreaker(
+            'global', global_threshold, global_reset_timeout,
+            on_change=self._on_change, clock=clock,
+        )
+        self.transitions = self.state_gauge = None
+        if metrics is not None:
+            self.transitions = metrics.registry.counter(
+                'homework_circuit_transitions_total',
+                'Смены состояния цепей API',
+                labels=('scope', 'state'),
+            )
+            self.state_gauge = metrics.registry.gauge(
+                'homework_circuit_state',
+                'Состояние глобальной цепи API: 0 closed, 1 half_open, '
+                '2 open',
+            )
+
+    def _tenant(self, key):
+        breaker = self.tenants.get(key)
+        if breaker is None:
+            breaker = self.tenants[key] = CircuitBreaker(
+                key, self.failure_threshold, self.reset_timeout,
+                on_change=self._on_change, clock=self.clock,
+            )
+        return breaker
+
+    def _on_change(self, breaker, old, new):
+        is_global = breaker is self.global_breaker
+        scope = 'global' if is_global else 'tenant'
+        log = logging.warning if new == OPEN else logging.info
+        log(f'Цепь API [{breaker.name}]: {old} -> {new}')
+        if self.transitions is not None:
+            self.transitions.labels(scope, new).inc()
+        if not is_global:
+            return
+        if self.state_gauge is not None:
+            self.state_gauge.set(STATE_VALUES[new])
+        if self.alert is None:
+            return
+        if new == OPEN:
+            message = (
+                f'API Практикума недоступен: опросы приостановлены '
+                f'после {breaker.failures} сбоев подряд'
+            )
+        elif new == CLOSED:
+            message = 'API Практикума снова доступен: опросы возобновлены'
+        else:
+            return
+        try:
+            self.alert(message)
+        except Exception as error:
+            logging.error(f'Не удалось отправить оповещение: {error}')
+
+    def allow(self, key):
+        """Проверяем обе цепи перед запросом для подписки key.
+
+        Если запрос выполнять нельзя, выбрасываем CircuitOpenError,
+        не обращаясь к сети.
+        """
+        tenant = self._tenant(key)
+        if not tenant.allow():
+            raise CircuitOpenError(f'Цепь подписки {key} разомкнута')
+        if not self.global_breaker.allow():
+            tenant.release()
+            raise CircuitOpenError('Цепь API разомкнута')
+
+    def record(self, key, error=None):
+        """Учитываем результат запроса для подписки key."""
+        tenant = self._tenant(key)
+        if is_outage(error):
+            tenant.record_failure()
+            self.global_breaker.record_failure()
+        elif isinstance(error, ConnectionError):
+            tenant.record_failure()
+            self.global_breaker.release()
+        else:
+            tenant.record_success()
+            self.global_breaker.record_success()
+
+    def wrap(self, fetch):
+        """Оборачиваем fetch(token, timestamp) проверкой цепей."""
+        def guarded(token, timestamp):
+            key = token_digest(token)
+            self.allow(key)
+            try:
+                response = fetch(token, timestamp)
+            except Exception as error:
+                self.record(key, error)
+                raise
+            self.record(key)
+            return response
+
+        return guarded
@@ -0,0 +1,102 @@
+import threading
+import time
+
+
+class Flight:
+    """Запрос к API, который уже выполняется для токена."""
+
+    def __init__(self, from_date):
+        self.from_date = from_date
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+
+class CachedResponse:
+    """Последний ответ API для токена."""
+
+    def __init__(self, from_date, response, expires):
+        self.from_date = from_date
+        self.response = response
+        self.expires = expires
+        current_date = (
+            response.get('current_date') if isinstance(response, dict)
+            else None
+        )
+        self.current_date = (
+            current_date if isinstance(current_date, int) else None
+        )
+
+    def covers(self, timestamp, now):
+        """Подходит ли ответ подписке с курсором timestamp.
+
+        Ответ содержит все изменения начиная с from_date, поэтому он
+        годится курсору не раньше from_date. Подписка с курсором не
+        меньше current_date этот ответ уже видела и должна получить
+        новый.
+        """
+        return (
+            now < self.expires
+            and self.current_date is not None
+            and self.from_date <= timestamp < self.current_date
+        )
+
+
+class CoalescingFetcher:
+    """Один запрос к API на токен для всех подписок этого токена.
+
+    Если запрос по токену уже выполняется, остальные вызовы ждут его
+    результат (single-flight). Успешный ответ ещё ttl секунд отдаётся
+    подпискам того же токена, чьи курсоры он покрывает. Ошибки
+    не кешируются. Реальные обращения к API считаются в metrics.
+    """
+
+    def __init__(self, fetch, ttl=30.0, metrics=None, clock=time.monotonic):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.metrics = metrics
+        self.clock = clock
+        self.calls = 0
+        self.coalesced = 0
+        self._cache = {}
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, token, timestamp):
+        """Ответ API для токена с курсором timestamp."""
+        with self._lock:
+            cached = self._cache.get(token)
+            if cached is not None and cached.covers(timestamp, self.clock()):
+                self.coalesced += 1
+                return cached.response
+            flight = self._flights.get(token)
+            leader = flight is None or flight.from_date > timestamp
+            if leader:
+                flight = self._flights[token] = Flight(timestamp)
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.response
+
+        try:
+            self.calls += 1
+            if self.metrics is not None:
+                self.metrics.api_calls.inc()
+            flight.response = self.fetch(token, timestamp)
+            return flight.response
+        except Exception as error:
+            flight.error = error
+            raise
+        finally:
+            with self._lock:
+                if self._flights.get(token) is flight:
+                    del self._flights[token]
+                if flight.error is None and self.ttl > 0:
+                    self._cache[token] = CachedResponse(
+                        timestamp, flight.response, self.clock() + self.ttl
+                    )
+            flight.done.set()
@@ -0,0 +1,49 @@
+def homework_key(homework):
+    """Ключ домашней работы: id, а если его нет - название.
+
+    Ключ приводится к строке, чтобы совпадать с ключами,
+    восстановленными из хранилища состояния.
+    """
+    key = homework.get('id')
+    if key is None:
+        key = homework.get('homework_name')
+    return str(key)
+
+
+class StatusDiff:
+    """Индекс последних известных статусов домашних работ.
+
+    Изменения находятся за один проход по списку из check_response:
+    на каждую работу приходится одно обращение к словарю, поэтому
+    ответ с тысячами работ обрабатывается за O(n).
+    """
+
+    def __init__(self, statuses=None):
+        self.statuses = dict(statuses or {})
+
+    def changes(self, homeworks):
+        """Возвращаем работы, статус которых изменился, и запоминаем его.
+
+        API отдаёт работы от новых к старым, поэтому при повторе
+        одной работы в ответе учитывается первая запись. Статусы
+        запоминаются только после всего списка: если потоковый ответ
+        оборвался, ни одно его изменение не считается увиденным.
+        """
+        statuses = self.statuses
+        seen = set()
+        transitions = []
+        updates = []
+        for homework in homeworks:
+            key = homework_key(homework)
+            if key in seen:
+                continue
+            seen.add(key)
+            status = homework.get('status')
+            if key not in statuses or statuses[key] != status:
+                updates.append((key, status))
+                transitions.append(homework)
+        statuses.update(updates)
+        return transitions
+
+    def __len__(self):
+        return len(self.statuses)
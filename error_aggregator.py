@@ -0,0 +1,129 @@
+import re
+import time
+from dataclasses import dataclass
+
+VOLATILE = re.compile(
+    r'0x[0-9a-fA-F]+'
+    r'|\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?Z?'
+    r'|\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?'
+    r'|\d+(?:\.\d+)?'
+)
+HOUR = 60 * 60
+
+
+def normalize_message(message):
+    """Убираем из текста ошибки адреса, время и числа."""
+    return VOLATILE.sub('#', message)
+
+
+def source_function(error):
+    """Имя функции, в которой было выброшено исключение."""
+    traceback = error.__traceback__
+    if traceback is None:
+        return ''
+    while traceback.tb_next is not None:
+        traceback = traceback.tb_next
+    return traceback.tb_frame.f_code.co_name
+
+
+def fingerprint(error):
+    """Отпечаток ошибки: тип, функция-источник и нормализованный текст."""
+    return ':'.join((
+        type(error).__name__,
+        source_function(error),
+        normalize_message(str(error)),
+    ))
+
+
+def describe_period(seconds):
+    """Период сводки словами."""
+    if seconds == HOUR:
+        return 'за последний час'
+    if seconds % HOUR == 0:
+        return f'за последние {seconds // HOUR:g} ч'
+    return f'за последние {seconds // 60:.0f} мин'
+
+
+@dataclass
+class ErrorEntry:
+    """Повторы одной ошибки одной подписки."""
+
+    error_type: str
+    summary: str
+    last_sent: float
+    suppressed: int = 0
+    occurrences: int = 0
+
+
+class ErrorAggregator:
+    """Подавление повторных уведомлений об ошибках и сводки.
+
+    Ошибки сравниваются по отпечатку, а не по полному тексту, поэтому
+    адреса сокетов и время в сообщении не делают ошибку новой.
+    Ошибка с тем же отпечатком отправляется не чаще раза в window
+    секунд даже при чередовании A/B/A/B, а подавленные повторы раз
+    в digest_interval собираются в сводку вида
+    «ConnectionError ×37 за последний час».
+    """
+
+    def __init__(self, window=HOUR, digest_interval=HOUR, clock=time.time):
+        self.window = window
+        self.digest_interval = digest_interval
+        self.clock = clock
+        self._entries = {}
+        self._next_digest = clock() + digest_interval
+
+    def restore(self, tenant, error_fingerprint):
+        """Считаем ошибку уже отправленной, например после перезапуска."""
+        if error_fingerprint:
+            error_type, _, rest = error_fingerprint.partition(':')
+            self._entries[(tenant, error_fingerprint)] = ErrorEntry(
+                error_type, rest.partition(':')[2], self.clock()
+            )
+
+    def report(self, tenant, error):
+        """Учитываем ошибку; возвращаем отпечаток, если её надо отправить."""
+        key = (tenant, fingerprint(error))
+        now = self.clock()
+        entry = self._entries.get(key)
+        if entry is None:
+            self._entries[key] = ErrorEntry(
+                type(error).__name__, normalize_message(str(error)), now,
+                occurrences=1,
+            )
+            return key[1]
+        entry.occurrences += 1
+        if now - entry.last_sent >= self.window:
+            entry.last_sent = now
+            return key[1]
+        entry.suppressed += 1
+        return None
+
+    def digests(self):
+        """Сводки подавленных ошибок по подпискам, если пора.
+
+        Возвращает список пар (подписка, текст). Между сводками метод
+        только сравнивает время, поэтому его можно вызывать на каждой
+        итерации цикла опроса.
+        """
+        now = self.clock()
+        if now < self._next_digest:
+            return []
+        self._next_digest = now + self.digest_interval
+        period = describe_period(self.digest_interval)
+        lines = {}
+        for key, entry in list(self._entries.items()):
+            tenant = key[0]
+            if entry.suppressed:
+                lines.setdefault(tenant, []).append(
+                    f'{entry.error_type} ×{entry.occurrences} {period}: '
+                    f'{entry.summary}'
+                )
+            if entry.suppressed or now - entry.last_sent < self.window:
+                entry.suppressed = entry.occurrences = 0
+            else:
+                del self._entries[key]
+        return [
+            (tenant, 'Сводка ошибок:\n' + '\n'.join(tenant_lines))
+            for tenant, tenant_lines in lines.items()
+        ]
@@ -8,3 +8,41 @@ class HomeworkStatusError(Exception):
     """
     Выбрасывает исключение, если в ответе API отсутствует ключ status.
     """
+
+
+class CircuitOpenError(ConnectionError):
+    """
+    Выбрасывает исключение, если запрос к API пропущен: цепь разомкнута.
+    """
+
+
+class InvalidRecordError(ValueError):
+    """
+    Выбрасывает исключение, если записи ответа API не прошли проверку схемы.
+    """
+
+
+class NotShardOwnerError(Exception):
+    """
+    Выбрасывает исключение, если подписку обслуживает другой воркер шардов.
+    """
+
+
+class ApiStatusError(ConnectionError):
+    """
+    Выбрасывает исключение, если API ответил кодом, отличным от 200.
+    """
+
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class RetryAfterError(ConnectionError):
+    """
+    Выбрасывает исключение, если Телеграм просит подождать (ответ 429).
+    """
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
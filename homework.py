@@ -1,27 +1,87 @@
+import functools
 import http
 import logging
 import os
 import sys
 import time
 
-import requests
-import telegram
 from dotenv import load_dotenv
-from telegram import TelegramError
-
-from exceptions import EnvVariableError, HomeworkStatusError
 
+from circuit_breaker import ApiCircuitBreakers
+from error_aggregator import ErrorAggregator
+from exceptions import ApiStatusError, EnvVariableError, HomeworkStatusError
+from http_client import CHUNK_SIZE, ApiClient
+from lazy_imports import FAST_START, lazy_import
+from metrics import MetricsServer, PipelineMetrics
+from outbox import Outbox
+from records import Homework
+from scheduler import AdaptivePolicy, FixedPolicy, Scheduler
+from schema import MISSING, Field, Schema
+from sender import SendQueue
+from sharding import ShardCoordinator, default_worker_id
+from state import open_state_store
+from status_cards import CardUpdate, StatusCards
+from streaming import HomeworkStream
+from structured_logging import configure_logging
+from templates import MessageTemplates
+from tenants import PollingEngine, Subscription, load_subscriptions
+from webhook import WebhookServer
+
+asyncio = lazy_import('asyncio')
+requests = lazy_import('requests')
+telegram = lazy_import('telegram')
+async_pipeline = lazy_import('async_pipeline')
 
 load_dotenv()
 
 PRACTICUM_TOKEN = os.getenv('pr_token')
 TELEGRAM_TOKEN = os.getenv('tel_token')
 TELEGRAM_CHAT_ID = os.getenv('tel_chat_id')
+SUBSCRIPTIONS_FILE = os.getenv('subscriptions_file')
+ASYNC_MODE = os.getenv('async_mode')
+TELEGRAM_GLOBAL_RATE = float(os.getenv('telegram_global_rate', 30))
+TELEGRAM_CHAT_RATE = float(os.getenv('telegram_chat_rate', 1))
+TELEGRAM_SEND_WORKERS = int(os.getenv('telegram_send_workers', 4))
+POLL_POLICY = os.getenv('poll_policy', 'fixed')
+POLL_BUDGET = int(os.getenv('poll_budget', 0))
+STATE_BACKEND = os.getenv('state_backend', 'sqlite')
+STATE_PATH = os.getenv('state_path', 'homework_state.db')
+STATE_FLUSH_INTERVAL = float(os.getenv('state_flush_interval', 5))
+LOCALES_DIR = os.getenv(
+    'locales_dir', os.path.join(os.path.dirname(__file__), 'locales')
+)
+STATUS_CARDS = os.getenv('status_cards')
+STATUS_CARD_DEBOUNCE = float(os.getenv('status_card_debounce', 2))
+OUTBOX_PATH = os.getenv('outbox_path', 'homework_outbox.db')
+SHARD_COORDINATOR = os.getenv('shard_coordinator')
+SHARD_ID = os.getenv('shard_id') or default_worker_id()
+SHARD_TTL = float(os.getenv('shard_ttl', 30))
+COALESCE_TTL = float(os.getenv('coalesce_ttl', 30))
+API_STREAMING = os.getenv('api_streaming')
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('circuit_failure_threshold', 5))
+CIRCUIT_RESET_TIMEOUT = float(os.getenv('circuit_reset_timeout', 1800))
+CIRCUIT_GLOBAL_THRESHOLD = int(os.getenv('circuit_global_threshold', 20))
+CIRCUIT_GLOBAL_RESET_TIMEOUT = float(
+    os.getenv('circuit_global_reset_timeout', 60)
+)
+ERROR_WINDOW = float(os.getenv('error_window', 3600))
+ERROR_DIGEST_INTERVAL = float(os.getenv('error_digest_interval', 3600))
+LOG_MODE = os.getenv('log_mode', 'plain')
+LOG_QUEUE_SIZE = int(os.getenv('log_queue_size', 10000))
+LOG_SAMPLE_RATE = float(os.getenv('log_sample_rate', 0.1))
+WEBHOOK_HOST = os.getenv('webhook_host', '0.0.0.0')
+WEBHOOK_PORT = int(os.getenv('webhook_port', 0))
+WEBHOOK_PATH = os.getenv('webhook_path', '/webhook')
+WEBHOOK_SECRET = os.getenv('webhook_secret')
+METRICS_HOST = os.getenv('metrics_host', '0.0.0.0')
+METRICS_PORT = int(os.getenv('metrics_port', 0))
 
 
 RETRY_TIME = 600
+API_CONNECT_TIMEOUT = float(os.getenv('api_connect_timeout', 5))
+API_READ_TIMEOUT = float(os.getenv('api_read_timeout', 30))
+API_RETRIES = int(os.getenv('api_retries', 3))
 ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
-HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
 
 
 HOMEWORK_STATUSES = {
@@ -30,74 +90,199 @@ HOMEWORK_STATUSES = {
     'rejected': 'Работа проверена: у ревьюера есть замечания.'
 }
 
+MESSAGE_TEMPLATE = (
+    'Изменился статус проверки работы "{homework_name}". {verdict}'
+)
+TEMPLATES = MessageTemplates.load(
+    LOCALES_DIR,
+    base={'ru': {'message': MESSAGE_TEMPLATE, 'verdicts': HOMEWORK_STATUSES}},
+)
+
+HOMEWORK_FIELDS = {
+    'status': Field(str, required=True, choices=HOMEWORK_STATUSES),
+    'homework_name': Field(str, required=True),
+    'id': Field((int, str)),
+    'date_updated': Field(str),
+}
+if 'reviewer_comment' in TEMPLATES.fields:
+    HOMEWORK_FIELDS['reviewer_comment'] = Field(str)
+HOMEWORK_SCHEMA = Schema(HOMEWORK_FIELDS, factory=Homework)
+HOMEWORK_VALIDATOR = HOMEWORK_SCHEMA.compile()
+
 
 def send_message(bot, message):
     """Отправляем сообщение в чат."""
+    return send_chat_message(bot, TELEGRAM_CHAT_ID, message)
+
+
+def send_chat_message(bot, chat_id, message):
+    """Отправляем сообщение в указанный чат."""
     try:
-        bot.send_message(chat_id=TELEGRAM_CHAT_ID, text=message)
+        bot.send_message(chat_id=chat_id, text=message)
         message_sent = True
         logging.info('Сообщение отправлено в Телеграм')
+    except telegram.error.RetryAfter as error:
+        logging.warning(f'Превышен лимит отправки в телеграм: {error}')
+        raise
     except telegram.error.TelegramError as error:
         logging.error(f'Ошибка отправки сообщения в телеграм: {error}')
-        raise TelegramError(f'Ошибка отправки сообщения в телеграм: {error}')
+        raise telegram.TelegramError(
+            f'Ошибка отправки сообщения в телеграм: {error}'
+        )
     except Exception as error:
         raise Exception(f'Непредвиденная ошибка: {error}')
 
     return message_sent
 
 
+def send_status_card(bot, chat_id, card):
+    """Отправляем карточку статусов или правим её на месте.
+
+    id нового сообщения записывается в card.message_id. Если
+    сообщение карточки удалено, отправляется новое.
+    """
+    if card.message_id is not None:
+        try:
+            bot.edit_message_text(
+                text=card.text, chat_id=chat_id, message_id=card.message_id
+            )
+            logging.info('Карточка статусов обновлена')
+            return True
+        except telegram.error.BadRequest as error:
+            description = str(error).lower()
+            if 'message is not modified' in description:
+                return True
+            if 'message to edit not found' not in description:
+                logging.error(f'Ошибка правки карточки статусов: {error}')
+                raise
+            logging.warning('Сообщение карточки удалено, отправляем новое')
+    try:
+        message = bot.send_message(chat_id=chat_id, text=card.text)
+    except telegram.error.RetryAfter as error:
+        logging.warning(f'Превышен лимит отправки в телеграм: {error}')
+        raise
+    card.message_id = message.message_id
+    logging.info('Карточка статусов отправлена в Телеграм')
+    return True
+
+
+def deliver_message(bot, chat_id, message):
+    """Отправляем текст или карточку статусов (CardUpdate)."""
+    if isinstance(message, CardUpdate):
+        return send_status_card(bot, chat_id, message)
+    return send_chat_message(bot, chat_id, message)
+
+
 def get_api_answer(current_timestamp):
     """Получаем ответ от API."""
+    return request_homework_statuses(PRACTICUM_TOKEN, current_timestamp)
+
+
+def request_homework_statuses(token, current_timestamp, session=None,
+                              stream=False):
+    """Получаем ответ от API для токена конкретного студента.
+
+    session - пул соединений ApiClient; без него запрос идёт через
+    requests.get без переиспользования соединений. С stream=True тело
+    не буферизуется: возвращается HomeworkStream, записи homeworks
+    которого разбираются по мере чтения сжатого ответа, поэтому
+    память не зависит от размера истории.
+    """
     timestamp = current_timestamp or int(time.time())
     params = {'from_date': timestamp}
+    headers = {'Authorization': f'OAuth {token}'}
+    client = session or requests
+    options = {'stream': True} if stream else {}
 
     try:
-        response = requests.get(ENDPOINT, headers=HEADERS, params=params)
+        response = client.get(
+            ENDPOINT,
+            headers=headers,
+            params=params,
+            timeout=(API_CONNECT_TIMEOUT, API_READ_TIMEOUT),
+            **options,
+        )
     except Exception as error:
         logging.error(f'Ошибка доступа к сайту: {error}')
         raise ConnectionError('Ошибка доступа к сайту') from error
-    else:
-        if response.status_code == http.HTTPStatus.OK:
-            logging.info('Отправлен API запрос')
-            response = response.json()
-        else:
-            logging.error('API не отвечает на запрос')
-            raise ConnectionError('API не отвечает на запрос')
+    if response.status_code != http.HTTPStatus.OK:
+        if stream:
+            response.close()
+        logging.error('API не отвечает на запрос')
+        raise ApiStatusError('API не отвечает на запрос', response.status_code)
 
-    return response
+    logging.info('Отправлен API запрос')
+    if stream:
+        return HomeworkStream(
+            response.iter_content(CHUNK_SIZE), close=response.close
+        )
+    return response.json()
 
 
 def check_response(response):
     """Проверяем ответ от API."""
+    if isinstance(response, HomeworkStream):
+        return response
     if not isinstance(response, dict):
         logging.error('Ответ API не является словарем')
         raise TypeError('Ответ API не является словарем')
-    elif not isinstance(response.get('homeworks'), list):
+    homeworks = response.get('homeworks')
+    if not isinstance(homeworks, list):
         logging.error('Список домашних работ не является списком')
         raise TypeError('Список домашних работ не является списком')
-    else:
-        homeworks = response.get('homeworks')
-
     return homeworks
 
 
+def validate_response(response):
+    """Проверяем ответ и все его записи по схеме HOMEWORK_SCHEMA.
+
+    Пачка проверяется за один проход скомпилированным валидатором:
+    неподходящие записи отбрасываются, остальные возвращаются списком
+    компактных записей Homework с ошибками отброшенных записей
+    в атрибуте errors. Потоковый ответ проверяется по мере чтения.
+    """
+    homeworks = check_response(response)
+    if isinstance(homeworks, HomeworkStream):
+        return HOMEWORK_VALIDATOR.stream(homeworks)
+    records = HOMEWORK_VALIDATOR.validate(homeworks)
+    for error in records.errors:
+        logging.error(f'Запись {error.index} отброшена: {error.message}')
+    return records
+
+
 def parse_status(homework):
-    """Получаем данные о домашней работе."""
-    if homework.get('homework_name') is None:
-        logging.error('В ответе API отсутствет ключ homework_name')
-    homework_name = homework.get('homework_name')
+    """Получаем данные о домашней работе.
 
-    if homework.get('status') is None:
-        logging.error('В ответе API отсутствует ключ status')
-        raise HomeworkStatusError('В ответе API отсутствует ключ status')
-    homework_status = homework.get('status')
+    Одно сообщение на языке по умолчанию: шаблон с уже подставленным
+    вердиктом, без кеша готовых сообщений.
+    """
+    if type(homework) is not Homework:
+        check_homework(homework)
+    return TEMPLATES.format(homework)
 
-    if homework.get('status') not in HOMEWORK_STATUSES:
-        logging.error('Недокументированный статус работы')
 
-    verdict = HOMEWORK_STATUSES[homework_status]
+def render_status(homework, locale=None):
+    """Сообщение об изменении статуса на языке подписки.
 
-    return f'Изменился статус проверки работы "{homework_name}". {verdict}'
+    Готовые сообщения кешируются, поэтому рассылка одного изменения
+    во много чатов форматирует текст один раз на язык.
+    """
+    if type(homework) is not Homework:
+        check_homework(homework)
+    return TEMPLATES.render(homework, locale)
+
+
+def check_homework(homework):
+    """Проверяем запись, не прошедшую validate_response.
+
+    Так сохраняются прежние ошибки: HomeworkStatusError без статуса
+    и KeyError при недокументированном статусе.
+    """
+    error = HOMEWORK_VALIDATOR.check(homework)
+    if error is not None:
+        logging.error(error.message)
+        if error.field == 'status' and error.code == MISSING:
+            raise HomeworkStatusError('В ответе API отсутствует ключ status')
 
 
 def check_tokens():
@@ -105,50 +290,170 @@ def check_tokens():
     return all((PRACTICUM_TOKEN, TELEGRAM_TOKEN, TELEGRAM_CHAT_ID))
 
 
+def get_subscriptions():
+    """Получаем список подписок из реестра или переменных окружения."""
+    if SUBSCRIPTIONS_FILE:
+        return load_subscriptions(SUBSCRIPTIONS_FILE)
+    return [Subscription(PRACTICUM_TOKEN, TELEGRAM_CHAT_ID)]
+
+
+def get_scheduler():
+    """Создаём планировщик опросов по настройке poll_policy."""
+    if POLL_POLICY == 'adaptive':
+        policy = AdaptivePolicy(base_interval=RETRY_TIME)
+    else:
+        policy = FixedPolicy(RETRY_TIME)
+    return Scheduler(policy, budget=POLL_BUDGET or None)
+
+
+def create_bot():
+    """Создаём бота с пулом соединений на все потоки отправки."""
+    from telegram.utils.request import Request
+
+    return telegram.Bot(
+        token=TELEGRAM_TOKEN,
+        request=Request(con_pool_size=TELEGRAM_SEND_WORKERS + 1),
+    )
+
+
+def get_shard_coordinator():
+    """Создаём координатор шардов, если задан shard_coordinator."""
+    if not SHARD_COORDINATOR:
+        return None
+    if STATE_BACKEND != 'sqlite':
+        logging.critical('Шардам нужно общее хранилище state_backend=sqlite')
+        raise ValueError('Шардам нужно общее хранилище state_backend=sqlite')
+    logging.info(f'Воркер шардов {SHARD_ID}')
+    return ShardCoordinator(SHARD_COORDINATOR, SHARD_ID, ttl=SHARD_TTL)
+
+
+def get_outbox_path():
+    """Путь outbox; у каждого воркера шардов свой файл."""
+    if not SHARD_COORDINATOR:
+        return OUTBOX_PATH
+    root, extension = os.path.splitext(OUTBOX_PATH)
+    return f'{root}.{SHARD_ID}{extension}'
+
+
+def get_circuit_breakers(metrics, alert=None):
+    """Создаём цепи API по настройкам circuit_*."""
+    return ApiCircuitBreakers(
+        failure_threshold=CIRCUIT_FAILURE_THRESHOLD,
+        reset_timeout=CIRCUIT_RESET_TIMEOUT,
+        global_threshold=CIRCUIT_GLOBAL_THRESHOLD,
+        global_reset_timeout=CIRCUIT_GLOBAL_RESET_TIMEOUT,
+        metrics=metrics,
+        alert=alert,
+    )
+
+
 def main():
     """Основная логика работы бота."""
-    bot = telegram.Bot(token=TELEGRAM_TOKEN)
-    current_timestamp = int(time.time())
-    status_message = ''
-    error_message = ''
-
-    while True:
-        try:
-            is_tokens = check_tokens()
-            if not is_tokens:
-                logging.critical('Отсутствует переменная окружения!')
-                raise EnvVariableError('Отсутствует переменная окружения!')
-
-            response = get_api_answer(current_timestamp)
-            homework = check_response(response)
-
-            if not homework:
-                logging.error('Список домашних работ пуст')
-            else:
-                homework = homework[0]
-                message = parse_status(homework)
-                if status_message != message:
-                    status_message = message
-                    send_message(bot, message)
-                else:
-                    logging.debug('Статус проверки работы не изменился')
-
-            current_timestamp = current_timestamp
-
-        except Exception as error:
-            message = f'Сбой в работе программы: {error}'
-            if error_message != message:
-                error_message = message
-                send_message(bot, message)
-                logging.info('Сообщение об ошибке отправлено в Телеграм')
-        finally:
-            time.sleep(RETRY_TIME)
+    if not TELEGRAM_TOKEN or not (SUBSCRIPTIONS_FILE or check_tokens()):
+        logging.critical('Отсутствует переменная окружения!')
+        raise EnvVariableError('Отсутствует переменная окружения!')
+
+    subscriptions = get_subscriptions()
+    logging.info(f'Загружено подписок: {len(subscriptions)}')
+    store = open_state_store(STATE_BACKEND, STATE_PATH, STATE_FLUSH_INTERVAL)
+    metrics = PipelineMetrics()
+    if METRICS_PORT:
+        MetricsServer(metrics.registry, METRICS_HOST, METRICS_PORT).start()
+        logging.info(f'Метрики доступны на порту {METRICS_PORT}: /metrics')
+    aggregator = ErrorAggregator(ERROR_WINDOW, ERROR_DIGEST_INTERVAL)
+
+    if ASYNC_MODE:
+        pipeline = async_pipeline.AsyncPipeline(
+            subscriptions,
+            endpoint=ENDPOINT,
+            telegram_token=TELEGRAM_TOKEN,
+            check=validate_response,
+            parse=parse_status,
+            retry_time=RETRY_TIME,
+            store=store,
+            metrics=metrics,
+            breakers=get_circuit_breakers(metrics),
+            aggregator=aggregator,
+            global_rate=TELEGRAM_GLOBAL_RATE,
+            chat_rate=TELEGRAM_CHAT_RATE,
+        )
+        asyncio.run(pipeline.run_forever())
+        return
+
+    shard = get_shard_coordinator()
+    get_bot = functools.lru_cache(maxsize=None)(create_bot)
+    if not FAST_START:
+        get_bot()
+    send_queue = SendQueue(
+        send=metrics.instrument(
+            'send',
+            lambda chat_id, message: deliver_message(
+                get_bot(), chat_id, message
+            ),
+        ),
+        global_rate=TELEGRAM_GLOBAL_RATE,
+        chat_rate=TELEGRAM_CHAT_RATE,
+        workers=TELEGRAM_SEND_WORKERS,
+    ).start()
+    metrics.track_send_queue(send_queue)
+    client = ApiClient(
+        connect_timeout=API_CONNECT_TIMEOUT,
+        read_timeout=API_READ_TIMEOUT,
+        retries=API_RETRIES,
+    )
+    metrics.track_api_client(client)
+    alert = None
+    if TELEGRAM_CHAT_ID:
+        alert = functools.partial(send_queue.put, TELEGRAM_CHAT_ID)
+    breakers = get_circuit_breakers(metrics, alert)
+    outbox = None
+    if OUTBOX_PATH:
+        outbox = Outbox(get_outbox_path(), send=send_queue.put).start()
+        logging.info(f'Уведомления проходят через outbox: {outbox.stats()}')
+    cards = None
+    if STATUS_CARDS:
+        cards = StatusCards(
+            store, send_queue.put,
+            mode=STATUS_CARDS, debounce=STATUS_CARD_DEBOUNCE,
+        ).start()
+        logging.info(f'Уведомления правят карточки статусов: {STATUS_CARDS}')
+    engine = PollingEngine(
+        subscriptions,
+        fetch=breakers.wrap(functools.partial(
+            request_homework_statuses, session=client, stream=API_STREAMING,
+        )),
+        check=validate_response,
+        parse=parse_status,
+        render=render_status,
+        send=send_queue.put,
+        retry_time=RETRY_TIME,
+        store=store,
+        scheduler=get_scheduler(),
+        metrics=metrics,
+        aggregator=aggregator,
+        coalesce_ttl=COALESCE_TTL,
+        outbox=outbox,
+        shard=shard,
+        cards=cards,
+    )
+    if WEBHOOK_PORT:
+        WebhookServer(
+            engine, WEBHOOK_HOST, WEBHOOK_PORT, WEBHOOK_PATH, WEBHOOK_SECRET
+        ).start()
+        logging.info(f'Приём push-уведомлений на порту {WEBHOOK_PORT}')
+    engine.run_forever()
 
 
 if __name__ == '__main__':
-    logging.basicConfig(
+    listener = configure_logging(
+        LOG_MODE,
         level=logging.DEBUG,
-        format='%(asctime)s - %(levelname)s - %(message)s - %(name)s',
-        handlers=[logging.StreamHandler(sys.stdout)]
+        stream=sys.stdout,
+        queue_size=LOG_QUEUE_SIZE,
+        sample_rate=LOG_SAMPLE_RATE,
     )
-    main()
+    try:
+        main()
+    finally:
+        if listener is not None:
+            listener.stop()
@@ -0,0 +1,269 @@
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+from lazy_imports import lazy_import
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+requests = lazy_import('requests')
+urllib3 = lazy_import('urllib3')
+
+RETRY_STATUSES = (500, 502, 503, 504)
+ACCEPT_ENCODING = 'gzip, deflate'
+if brotli is not None:
+    ACCEPT_ENCODING = 'br, ' + ACCEPT_ENCODING
+CHUNK_SIZE = 64 * 1024
+NOT_MODIFIED = 304
+CURRENT_DATE = re.compile(rb'"current_date"\s*:\s*(-?\d+)')
+
+
+def homeworks_digest(content):
+    """Хеш тела ответа без current_date и значение current_date.
+
+    Ответ API - это homeworks и current_date, который меняется
+    на каждом запросе; поэтому хеш остального тела совпадает, пока
+    не изменился список работ, и JSON для сравнения не разбирается.
+    """
+    match = CURRENT_DATE.search(content)
+    if match is None:
+        return hashlib.blake2b(content, digest_size=16).digest(), None
+    stripped = content[:match.start()] + content[match.end():]
+    return (
+        hashlib.blake2b(stripped, digest_size=16).digest(),
+        int(match.group(1)),
+    )
+
+
+def wire_size(response):
+    """Сколько байт тела пришло по сети, до распаковки."""
+    tell = getattr(response.raw, 'tell', None)
+    if tell is not None:
+        try:
+            return int(tell())
+        except (TypeError, ValueError, OSError):
+            pass
+    length = response.headers.get('Content-Length')
+    if length is not None and length.isdigit():
+        return int(length)
+    return len(response.content)
+
+
+class CacheEntry:
+    """Последний ответ для одного токена.
+
+    Тело разбирается при первом вызове json() и дальше хранится
+    только разобранным.
+    """
+
+    def __init__(self, url, headers, digest, content):
+        self.url = url
+        self.etag = headers.get('ETag')
+        self.last_modified = headers.get('Last-Modified')
+        self.headers = headers
+        self.digest = digest
+        self.content = content
+        self.data = None
+
+    def json(self):
+        """Разобранное тело ответа."""
+        if self.content is not None:
+            self.data = json.loads(self.content)
+            self.content = None
+        return self.data
+
+    def refresh(self, headers, content, current_date):
+        """Тот же список работ пришёл с новыми заголовками и датой.
+
+        Разобранный объект остаётся прежним, в нём обновляется только
+        current_date, чтобы курсор опроса двигался дальше.
+        """
+        self.etag = headers.get('ETag')
+        self.last_modified = headers.get('Last-Modified')
+        self.headers = headers
+        if self.content is not None:
+            self.content = content
+        elif current_date is not None and isinstance(self.data, dict):
+            self.data['current_date'] = current_date
+
+
+class CachedResponse:
+    """Ответ 200, тело которого хранится в кеше ApiClient.
+
+    json() возвращает один и тот же объект, пока тело ответа
+    не изменилось, поэтому вызывающий может сравнить ответы по is.
+    """
+
+    status_code = 200
+
+    def __init__(self, entry, from_cache):
+        self.entry = entry
+        self.headers = entry.headers
+        self.from_cache = from_cache
+
+    def json(self):
+        """Разобранное тело ответа."""
+        return self.entry.json()
+
+
+class ApiClient:
+    """Пул keep-alive сессий requests с таймаутами и повторами.
+
+    На каждый хост заводится своя сессия, поэтому соединения
+    переиспользуются между опросами и не требуют нового TCP+TLS
+    рукопожатия. Повторы с экспоненциальной задержкой выполняются
+    для ошибок соединения и ответов 5xx.
+
+    Для cache_size последних токенов хранится последний ответ. Следующий
+    запрос с тем же токеном отправляется с If-None-Match
+    и If-Modified-Since, если сервер прислал ETag или Last-Modified:
+    from_date меняется на каждом опросе, поэтому валидаторы привязаны
+    к токену, а не к параметрам запроса. На ответ 304 и на ответ
+    с прежним списком работ (хеш тела без current_date) возвращается
+    прежний разобранный объект без повторного разбора JSON.
+    bytes_received считает байты, пришедшие по сети, до распаковки.
+
+    Сессии просят сжатый ответ: gzip, а при установленном пакете
+    brotli - ещё и br. Запросы со stream=True идут мимо кеша.
+    """
+
+    def __init__(self, connect_timeout=5.0, read_timeout=30.0, retries=3,
+                 backoff_factor=0.5, pool_maxsize=10, cache_size=1024):
+        self.timeout = (connect_timeout, read_timeout)
+        self.retry = urllib3.util.retry.Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(['GET']),
+            raise_on_status=False,
+        )
+        self.pool_maxsize = pool_maxsize
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self.requests_count = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self.bytes_received = 0
+        self.not_modified = 0
+        self.unchanged = 0
+        self.changed = 0
+
+    def session(self, url):
+        """Возвращаем сессию для хоста из url."""
+        parts = urlsplit(url)
+        host = f'{parts.scheme}://{parts.netloc}'
+        session = self._sessions.get(host)
+        if session is None:
+            with self._lock:
+                session = self._sessions.get(host)
+                if session is None:
+                    session = self._new_session(host)
+                    self._sessions[host] = session
+        return session
+
+    def _new_session(self, host):
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.pool_maxsize,
+            max_retries=self.retry,
+        )
+        session.mount(host, adapter)
+        session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+        return session
+
+    def get(self, url, **kwargs):
+        """Выполняем GET-запрос через пул соединений."""
+        kwargs.setdefault('timeout', self.timeout)
+        started = time.perf_counter()
+        try:
+            if not self.cache_size or kwargs.get('stream'):
+                return self.session(url).get(url, **kwargs)
+            return self._cached_get(url, **kwargs)
+        finally:
+            latency = time.perf_counter() - started
+            self.requests_count += 1
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+
+    def _cached_get(self, url, headers=None, **kwargs):
+        headers = dict(headers or {})
+        key = headers.get('Authorization', '')
+        session = self.session(url)
+        with self._lock:
+            entry = self._cache.get(key)
+        if entry is not None and entry.url == url:
+            if entry.etag:
+                headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                headers['If-Modified-Since'] = entry.last_modified
+
+        response = session.get(url, headers=headers, **kwargs)
+        self.bytes_received += wire_size(response)
+        if response.status_code == NOT_MODIFIED and entry is not None:
+            self.not_modified += 1
+            return CachedResponse(entry, from_cache=True)
+        if response.status_code != 200:
+            return response
+
+        digest, current_date = homeworks_digest(response.content)
+        if entry is not None and entry.url == url and entry.digest == digest:
+            self.unchanged += 1
+            entry.refresh(response.headers, response.content, current_date)
+            return CachedResponse(entry, from_cache=True)
+        self.changed += 1
+        entry = CacheEntry(url, response.headers, digest, response.content)
+        with self._lock:
+            self._cache[key] = entry
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return CachedResponse(entry, from_cache=False)
+
+    def stats(self):
+        """Счётчики задержек и переиспользования соединений."""
+        connections = 0
+        pool_requests = 0
+        for session in list(self._sessions.values()):
+            for adapter in session.adapters.values():
+                for key in list(adapter.poolmanager.pools.keys()):
+                    pool = adapter.poolmanager.pools.get(key)
+                    if pool is not None:
+                        connections += pool.num_connections
+                        pool_requests += pool.num_requests
+        reuse_rate = 0.0
+        if pool_requests:
+            reuse_rate = 1 - connections / pool_requests
+        average = 0.0
+        if self.requests_count:
+            average = self.total_latency / self.requests_count
+        return {
+            'requests': self.requests_count,
+            'connections': connections,
+            'reuse_rate': reuse_rate,
+            'avg_latency': average,
+            'max_latency': self.max_latency,
+            'bytes_received': self.bytes_received,
+            'not_modified': self.not_modified,
+            'unchanged': self.unchanged,
+            'changed': self.changed,
+        }
+
+    def close(self):
+        """Закрываем все сессии."""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
@@ -0,0 +1,32 @@
+import importlib
+import importlib.util
+import os
+import sys
+
+FAST_START = bool(os.getenv('fast_start'))
+
+
+def lazy_import(name, enabled=None):
+    """Импортируем модуль сразу или при первом обращении к атрибуту.
+
+    В режиме fast_start модуль регистрируется в sys.modules через
+    importlib.util.LazyLoader, а его код выполняется, только когда
+    он действительно понадобится. Модуль из sys.modules возвращается
+    как есть, без обращения к его атрибутам. Отсутствующий модуль
+    даёт ModuleNotFoundError сразу, как и обычный import.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    if enabled is None:
+        enabled = FAST_START
+    if not enabled:
+        return importlib.import_module(name)
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f'No module named {name!r}', name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
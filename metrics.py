@@ -0,0 +1,404 @@
+import bisect
+import functools
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+    30.0,
+)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (
+        name + '="' + str(value).replace('\\', '\\\\').replace(
+            '"', '\\"').replace('\n', '\\n') + '"'
+        for name, value in pairs
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """Монотонный счётчик.
+
+    Каждый поток пишет в свою ячейку, поэтому инкремент обходится
+    без блокировок: под GIL запись в словарь по своему ключу атомарна,
+    а сумма ячеек считается только при чтении.
+    """
+
+    def __init__(self):
+        self._cells = {}
+        self._function = None
+
+    def inc(self, amount=1):
+        """Увеличиваем счётчик."""
+        ident = threading.get_ident()
+        self._cells[ident] = self._cells.get(ident, 0) + amount
+
+    def set_function(self, function):
+        """Берём значение из function при чтении.
+
+        Так публикуется счётчик, который уже ведёт другой объект,
+        например SendQueue.sent.
+        """
+        self._function = function
+
+    @property
+    def value(self):
+        """Текущее значение счётчика."""
+        if self._function is not None:
+            return self._function()
+        return sum(list(self._cells.values()))
+
+    def samples(self, name, names, values):
+        """Строки экспозиции для этого счётчика."""
+        labels = _format_labels(names, values)
+        return [f'{name}{labels} {_format_value(self.value)}']
+
+
+class Gauge:
+    """Значение, которое может расти и убывать."""
+
+    def __init__(self):
+        self._value = 0.0
+        self._function = None
+
+    def set(self, value):
+        """Запоминаем значение."""
+        self._value = value
+
+    def set_function(self, function):
+        """Берём значение из function при чтении, например глубину очереди."""
+        self._function = function
+
+    @property
+    def value(self):
+        """Текущее значение."""
+        if self._function is not None:
+            return self._function()
+        return self._value
+
+    def samples(self, name, names, values):
+        """Строки экспозиции для этого значения."""
+        labels = _format_labels(names, values)
+        return [f'{name}{labels} {_format_value(self.value)}']
+
+
+class Histogram:
+    """Гистограмма с фиксированными границами корзин.
+
+    Как и Counter, хранит отдельные ячейки для каждого потока:
+    наблюдение - это bisect и три записи в свой список.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._cells = {}
+
+    def _cell(self):
+        ident = threading.get_ident()
+        cell = self._cells.get(ident)
+        if cell is None:
+            cell = self._cells[ident] = [0] * (len(self.buckets) + 3)
+        return cell
+
+    def observe(self, value):
+        """Добавляем наблюдение."""
+        cell = self._cell()
+        cell[bisect.bisect_left(self.buckets, value)] += 1
+        cell[-2] += value
+        cell[-1] += 1
+
+    def snapshot(self):
+        """Счётчики корзин (не накопленные), сумма и число наблюдений."""
+        total = [0] * (len(self.buckets) + 3)
+        for cell in list(self._cells.values()):
+            for index, value in enumerate(cell):
+                total[index] += value
+        return total[:len(self.buckets) + 1], total[-2], total[-1]
+
+    @property
+    def count(self):
+        """Число наблюдений."""
+        return self.snapshot()[2]
+
+    def samples(self, name, names, values):
+        """Строки экспозиции: накопленные корзины, сумма и число."""
+        counts, total, count = self.snapshot()
+        lines = []
+        cumulative = 0
+        bounds = self.buckets + (float('inf'),)
+        for bound, bucket_count in zip(bounds, counts):
+            cumulative += bucket_count
+            labels = _format_labels(
+                names, values, [('le', _format_value(bound))]
+            )
+            lines.append(f'{name}_bucket{labels} {cumulative}')
+        labels = _format_labels(names, values)
+        lines.append(f'{name}_sum{labels} {_format_value(total)}')
+        lines.append(f'{name}_count{labels} {count}')
+        return lines
+
+
+class MetricFamily:
+    """Метрика с метками: по экземпляру на каждый набор значений."""
+
+    TYPES = {Counter: 'counter', Gauge: 'gauge', Histogram: 'histogram'}
+
+    def __init__(self, name, documentation, kind, label_names=(), **options):
+        self.name = name
+        self.documentation = documentation
+        self.kind = kind
+        self.label_names = tuple(label_names)
+        self.options = options
+        self._children = {}
+        self._lock = threading.Lock()
+        if not self.label_names:
+            self._children[()] = kind(**options)
+
+    def labels(self, *values):
+        """Экземпляр метрики для значений меток."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.label_names):
+                raise ValueError(
+                    f'Метрика {self.name} ожидает метки {self.label_names}'
+                )
+            with self._lock:
+                child = self._children.setdefault(
+                    values, self.kind(**self.options)
+                )
+        return child
+
+    def __getattr__(self, name):
+        if name.startswith('_') or self.label_names:
+            raise AttributeError(name)
+        return getattr(self._children[()], name)
+
+    def render(self):
+        """Описание и значения метрики в текстовом формате Prometheus."""
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.TYPES[self.kind]}',
+        ]
+        for values, child in sorted(self._children.items()):
+            lines.extend(child.samples(self.name, self.label_names, values))
+        return lines
+
+
+class Registry:
+    """Набор метрик процесса."""
+
+    def __init__(self):
+        self._families = {}
+        self._lock = threading.Lock()
+
+    def _register(self, name, documentation, kind, labels, **options):
+        with self._lock:
+            family = self._families.get(name)
+            if family is None:
+                family = self._families[name] = MetricFamily(
+                    name, documentation, kind, labels, **options
+                )
+            elif family.kind is not kind:
+                raise ValueError(f'Метрика {name} уже зарегистрирована')
+        return family
+
+    def counter(self, name, documentation, labels=()):
+        """Регистрируем счётчик."""
+        return self._register(name, documentation, Counter, labels)
+
+    def gauge(self, name, documentation, labels=()):
+        """Регистрируем значение."""
+        return self._register(name, documentation, Gauge, labels)
+
+    def histogram(self, name, documentation, labels=(),
+                  buckets=DEFAULT_BUCKETS):
+        """Регистрируем гистограмму."""
+        return self._register(
+            name, documentation, Histogram, labels, buckets=buckets
+        )
+
+    def render(self):
+        """Все метрики в текстовом формате Prometheus."""
+        with self._lock:
+            families = list(self._families.values())
+        lines = []
+        for family in families:
+            lines.extend(family.render())
+        return '\n'.join(lines) + '\n'
+
+
+class PipelineMetrics:
+    """Метрики стадий опроса: fetch, check, parse и send.
+
+    instrument(stage, function) оборачивает функцию стадии: длительность
+    попадает в гистограмму, а исход (ok или имя класса исключения,
+    например ConnectionError, TypeError, HomeworkStatusError,
+    TelegramError) - в счётчик.
+    """
+
+    def __init__(self, registry=None):
+        self.registry = registry if registry is not None else Registry()
+        self.stage_latency = self.registry.histogram(
+            'homework_stage_duration_seconds',
+            'Длительность стадии обработки',
+            labels=('stage',),
+        )
+        self.outcomes = self.registry.counter(
+            'homework_stage_outcomes_total',
+            'Исходы стадий обработки',
+            labels=('stage', 'outcome'),
+        )
+        self.loop_iteration = self.registry.histogram(
+            'homework_loop_iteration_seconds',
+            'Длительность одной итерации цикла опроса',
+        )
+        self.sleep_drift = self.registry.histogram(
+            'homework_loop_sleep_drift_seconds',
+            'Насколько позже запланированного проснулся цикл опроса',
+        )
+        self.api_calls = self.registry.counter(
+            'homework_api_calls_total', 'Запросы к API Практикума'
+        )
+        self.notifications = self.registry.counter(
+            'homework_notifications_total',
+            'Отправленные уведомления об изменении статуса',
+        )
+        self.calls_per_notification = self.registry.gauge(
+            'homework_api_calls_per_notification',
+            'Запросов к API на одно уведомление',
+        )
+
+    def update_efficiency(self):
+        """Пересчитываем число запросов к API на одно уведомление."""
+        notifications = self.notifications.value
+        if notifications:
+            self.calls_per_notification.set(
+                self.api_calls.value / notifications
+            )
+
+    def track_send_queue(self, queue):
+        """Публикуем глубину очереди отправки и исходы сообщений.
+
+        Значения читаются из queue при каждом запросе /metrics;
+        пропускная способность - rate() счётчика с outcome="sent".
+        """
+        self.registry.gauge(
+            'homework_send_queue_depth',
+            'Сообщения в очереди отправки и в отправке',
+        ).set_function(lambda: queue.stats()['depth'])
+        messages = self.registry.counter(
+            'homework_send_queue_messages_total',
+            'Сообщения очереди отправки по исходу',
+            labels=('outcome',),
+        )
+        for outcome in ('sent', 'failed', 'retried'):
+            messages.labels(outcome).set_function(
+                functools.partial(getattr, queue, outcome)
+            )
+
+    def track_api_client(self, client):
+        """Публикуем задержки и переиспользование соединений ApiClient."""
+        gauges = (
+            ('homework_api_connection_reuse_ratio',
+             'Доля запросов к API по уже открытому соединению',
+             'reuse_rate'),
+            ('homework_api_latency_avg_seconds',
+             'Средняя задержка запроса к API', 'avg_latency'),
+            ('homework_api_latency_max_seconds',
+             'Максимальная задержка запроса к API', 'max_latency'),
+        )
+        for name, documentation, key in gauges:
+            self.registry.gauge(name, documentation).set_function(
+                lambda key=key: client.stats()[key]
+            )
+        counters = (
+            ('homework_api_bytes_received_total',
+             'Байты ответов API, полученные по сети', 'bytes_received'),
+            ('homework_api_not_modified_total',
+             'Ответы API 304 Not Modified', 'not_modified'),
+        )
+        for name, documentation, key in counters:
+            self.registry.counter(name, documentation).set_function(
+                functools.partial(getattr, client, key)
+            )
+
+    def observe(self, stage, duration, outcome='ok'):
+        """Учитываем одно выполнение стадии."""
+        self.stage_latency.labels(stage).observe(duration)
+        self.outcomes.labels(stage, outcome).inc()
+
+    def instrument(self, stage, function):
+        """Оборачиваем функцию стадии сбором метрик."""
+        latency = self.stage_latency.labels(stage)
+        succeeded = self.outcomes.labels(stage, 'ok')
+        outcomes = self.outcomes
+
+        def measured(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                result = function(*args, **kwargs)
+            except Exception as error:
+                latency.observe(time.perf_counter() - started)
+                outcomes.labels(stage, type(error).__name__).inc()
+                raise
+            latency.observe(time.perf_counter() - started)
+            succeeded.inc()
+            return result
+
+        return measured
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """Отдаём метрики по адресу /metrics."""
+
+    def do_GET(self):
+        """Текстовый формат Prometheus."""
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = self.server.registry.render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Запросы Prometheus не пишем в лог."""
+
+
+class MetricsServer(ThreadingHTTPServer):
+    """HTTP-сервер с метриками в фоновом потоке."""
+
+    daemon_threads = True
+
+    def __init__(self, registry, host='0.0.0.0', port=9100):
+        super().__init__((host, port), MetricsHandler)
+        self.registry = registry
+        self._thread = None
+
+    def start(self):
+        """Запускаем сервер в фоновом потоке."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Останавливаем сервер."""
+        self.shutdown()
+        self.server_close()
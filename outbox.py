@@ -0,0 +1,215 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+
+PENDING = 'pending'
+SENT = 'sent'
+DEAD = 'dead'
+
+
+def idempotency_key(tenant, homework_key, homework, cursor):
+    """Ключ уведомления: одно изменение статуса - одна запись.
+
+    Без date_updated изменение отличает курсор from_date, с которым
+    оно найдено: повтор статуса (rejected, reviewing и снова rejected)
+    приходит с новым курсором, а изменение, найденное заново после
+    перезапуска, - с тем же, ведь курсор сохраняется после outbox.
+    """
+    source = '|'.join((
+        tenant,
+        homework_key,
+        str(homework.get('status')),
+        str(homework.get('date_updated') or f'cursor:{cursor}'),
+    ))
+    return hashlib.sha256(source.encode()).hexdigest()[:32]
+
+
+class Outbox:
+    """Надёжная очередь уведомлений в SQLite (transactional outbox).
+
+    Обнаруженные изменения статусов добавляются через append
+    и записываются на диск пачкой в одной транзакции при commit
+    (group commit). Повторная запись с тем же ключом идемпотентности
+    игнорируется, поэтому изменение, обнаруженное заново после
+    перезапуска, не дублируется.
+
+    Фоновый поток передаёт записи в send(chat_id, message, callback)
+    и отмечает их доставленными, когда callback(True) подтвердит
+    отправку. Недоставленные записи повторяются с растущей паузой,
+    в том числе после перезапуска процесса: доставка "хотя бы один
+    раз". После max_attempts попыток запись помечается мёртвой.
+    """
+
+    def __init__(self, path, send, batch_size=100, poll_interval=1.0,
+                 retry_delay=30.0, max_attempts=10,
+                 retention=7 * 24 * 3600):
+        self.send = send
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.retry_delay = retry_delay
+        self.max_attempts = max_attempts
+        self.retention = retention
+        self.connection = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=FULL')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS outbox ('
+            'id INTEGER PRIMARY KEY, key TEXT NOT NULL UNIQUE, '
+            'chat_id TEXT NOT NULL, message TEXT NOT NULL, '
+            'status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, '
+            'next_attempt REAL NOT NULL, created REAL NOT NULL)'
+        )
+        self.connection.execute(
+            'CREATE INDEX IF NOT EXISTS outbox_due '
+            'ON outbox (status, next_attempt)'
+        )
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._pending = []
+        self._in_flight = set()
+        self._results = []
+        self._running = False
+        self._thread = None
+        self.appended = 0
+        self.delivered = 0
+
+    def append(self, key, chat_id, message):
+        """Добавляем уведомление; на диск оно попадёт при commit."""
+        with self._lock:
+            now = time.time()
+            self._pending.append(
+                (key, str(chat_id), message, PENDING, now, now)
+            )
+
+    def commit(self):
+        """Записываем накопленные уведомления одной транзакцией."""
+        with self._lock:
+            batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+            added = self._transaction(
+                'INSERT OR IGNORE INTO outbox '
+                '(key, chat_id, message, status, next_attempt, created) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                batch,
+            )
+            self.appended += added
+        self._wakeup.set()
+        return added
+
+    def _transaction(self, statement, rows):
+        connection = self.connection
+        connection.execute('BEGIN')
+        try:
+            cursor = connection.executemany(statement, rows)
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+        return cursor.rowcount
+
+    def _due(self):
+        with self._lock:
+            rows = self.connection.execute(
+                'SELECT id, chat_id, message, attempts FROM outbox '
+                'WHERE status = ? AND next_attempt <= ? '
+                'ORDER BY id LIMIT ?',
+                (PENDING, time.time(),
+                 self.batch_size + len(self._in_flight)),
+            ).fetchall()
+            rows = [row for row in rows if row[0] not in self._in_flight]
+            rows = rows[:self.batch_size]
+            self._in_flight.update(row[0] for row in rows)
+        return rows
+
+    def _done(self, row_id, attempts, delivered):
+        with self._lock:
+            self._results.append((row_id, attempts, delivered))
+        self._wakeup.set()
+
+    def _record_results(self):
+        with self._lock:
+            results, self._results = self._results, []
+            if not results:
+                return
+            now = time.time()
+            updates = []
+            for row_id, attempts, delivered in results:
+                self._in_flight.discard(row_id)
+                if delivered:
+                    updates.append((SENT, attempts + 1, now, row_id))
+                    continue
+                status = (
+                    DEAD if attempts + 1 >= self.max_attempts else PENDING
+                )
+                delay = self.retry_delay * 2 ** attempts
+                updates.append((status, attempts + 1, now + delay, row_id))
+                if status == DEAD:
+                    logging.error(f'Уведомление {row_id} не доставлено')
+            self._transaction(
+                'UPDATE outbox SET status = ?, attempts = ?, '
+                'next_attempt = ? WHERE id = ?',
+                updates,
+            )
+            self.delivered += sum(1 for _, _, ok in results if ok)
+
+    def deliver_once(self):
+        """Передаём на отправку готовые записи и фиксируем результаты."""
+        self._record_results()
+        rows = self._due()
+        for row_id, chat_id, message, attempts in rows:
+            def callback(delivered, row_id=row_id, attempts=attempts):
+                self._done(row_id, attempts, delivered)
+            try:
+                self.send(chat_id, message, callback)
+            except Exception as error:
+                logging.error(f'[{chat_id}] Ошибка передачи уведомления: '
+                              f'{error}')
+                callback(False)
+        return len(rows)
+
+    def _worker(self):
+        while self._running:
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+            try:
+                self.deliver_once()
+            except Exception as error:
+                logging.error(f'Сбой доставки из outbox: {error}')
+        self._record_results()
+
+    def start(self):
+        """Удаляем старые доставленные записи и запускаем доставку."""
+        with self._lock:
+            self.connection.execute(
+                'DELETE FROM outbox WHERE status = ? AND next_attempt < ?',
+                (SENT, time.time() - self.retention),
+            )
+        self._running = True
+        self._thread = threading.Thread(target=self._worker, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Останавливаем доставку, фиксируем результаты и закрываем базу."""
+        self.commit()
+        self._running = False
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.connection.close()
+
+    def stats(self):
+        """Число записей outbox по состояниям."""
+        with self._lock:
+            rows = self.connection.execute(
+                'SELECT status, COUNT(*) FROM outbox GROUP BY status'
+            ).fetchall()
+        counts = {PENDING: 0, SENT: 0, DEAD: 0}
+        counts.update(rows)
+        return counts
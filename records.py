@@ -0,0 +1,65 @@
+FIELDS = (
+    'status', 'homework_name', 'id', 'date_updated', 'reviewer_comment',
+)
+FIELD_NAMES = frozenset(FIELDS)
+
+
+class Homework:
+    """Компактная запись о домашней работе.
+
+    Хранит только поля, которые использует бот, в __slots__, без
+    словаря на каждую запись. Статус - объект-ключ из
+    HOMEWORK_STATUSES, общий для всех записей. Методы get
+    и __getitem__ повторяют словарь из ответа API, поэтому запись
+    подходит homework_key, StatusDiff и parse_status как есть.
+    """
+
+    __slots__ = FIELDS
+
+    def __init__(self, status, homework_name, id=None, date_updated=None,
+                 reviewer_comment=None):
+        self.status = status
+        self.homework_name = homework_name
+        self.id = id
+        self.date_updated = date_updated
+        self.reviewer_comment = reviewer_comment
+
+    @classmethod
+    def from_dict(cls, data):
+        """Запись из словаря ответа API; лишние поля отбрасываются."""
+        return cls(*map(data.get, FIELDS))
+
+    def get(self, name, default=None):
+        """Значение поля или default, как dict.get."""
+        if name not in FIELD_NAMES:
+            return default
+        value = getattr(self, name)
+        return default if value is None else value
+
+    def __getitem__(self, name):
+        value = self.get(name)
+        if value is None:
+            raise KeyError(name)
+        return value
+
+    def __contains__(self, name):
+        return self.get(name) is not None
+
+    def to_dict(self):
+        """Словарь с заполненными полями."""
+        return {
+            name: getattr(self, name) for name in FIELDS
+            if getattr(self, name) is not None
+        }
+
+    def __eq__(self, other):
+        if not isinstance(other, Homework):
+            return NotImplemented
+        return all(
+            getattr(self, name) == getattr(other, name) for name in FIELDS
+        )
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f'Homework({self.to_dict()!r})'
@@ -0,0 +1,153 @@
+import random
+import time
+
+from timing_wheel import TimingWheel
+
+DAY = 24 * 60 * 60
+REVIEWING = 'reviewing'
+
+
+def current_status(statuses, latest=None):
+    """Статус подписки для расписания по статусам её работ.
+
+    REVIEWING, если хоть одна работа на проверке, иначе latest -
+    статус последнего изменения.
+    """
+    if REVIEWING in statuses.values():
+        return REVIEWING
+    return latest
+
+
+class FixedPolicy:
+    """Опрос с постоянным интервалом, как прежний RETRY_TIME."""
+
+    def __init__(self, interval):
+        self.interval = interval
+
+    def next_interval(self, state, now):
+        """Интервал до следующего опроса."""
+        return self.interval
+
+
+class AdaptivePolicy:
+    """Интервал опроса по недавней активности подписки.
+
+    - работа на проверке (reviewing): вердикт вероятен скоро,
+      опрашиваем каждые reviewing_interval секунд; после каждых
+      reviewing_polls опросов без изменений интервал удваивается,
+      пока не догонит обычный;
+    - давно ничего не менялось: интервал растёт от base_interval
+      до max_interval за idle_after секунд простоя;
+    - ночью (quiet_hours по времени utc_offset) интервал умножается
+      на quiet_factor;
+    - после ошибок - экспоненциальная задержка со случайным
+      разбросом, чтобы подписки не опрашивали API синхронно.
+    """
+
+    def __init__(self, base_interval=600, min_interval=60,
+                 max_interval=3600, reviewing_interval=120,
+                 reviewing_polls=15, idle_after=7 * DAY,
+                 quiet_hours=(1, 8), quiet_factor=3, utc_offset=3,
+                 jitter=0.1, rng=None):
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.reviewing_interval = reviewing_interval
+        self.reviewing_polls = reviewing_polls
+        self.idle_after = idle_after
+        self.quiet_hours = quiet_hours
+        self.quiet_factor = quiet_factor
+        self.utc_offset = utc_offset
+        self.jitter = jitter
+        self.random = rng or random.Random()
+
+    def is_quiet(self, now):
+        """Попадает ли момент now в ночные часы."""
+        hour = int((now / 3600 + self.utc_offset) % 24)
+        start, end = self.quiet_hours
+        return start <= hour < end
+
+    def next_interval(self, state, now):
+        """Интервал до следующего опроса."""
+        if state.errors:
+            ceiling = min(
+                self.max_interval, self.base_interval * 2 ** state.errors
+            )
+            return ceiling / 2 + self.random.uniform(0, ceiling / 2)
+
+        idle = max(0.0, now - state.last_change)
+        share = min(1.0, idle / self.idle_after)
+        interval = self.base_interval + share * (
+            self.max_interval - self.base_interval
+        )
+        if state.last_status == REVIEWING:
+            doublings = min(state.unchanged // self.reviewing_polls, 32)
+            interval = min(interval, self.reviewing_interval * 2 ** doublings)
+        if self.is_quiet(now):
+            interval *= self.quiet_factor
+
+        interval *= 1 + self.random.uniform(-self.jitter, self.jitter)
+        return max(self.min_interval, min(self.max_interval, interval))
+
+
+class Scheduler:
+    """Расписание опросов подписок с общим бюджетом запросов.
+
+    Моменты опросов хранятся в иерархическом колесе таймеров, поэтому
+    постановка и снятие подписки - O(1) даже для сотен тысяч подписок.
+    Если сумма запланированных частот опроса превышает budget
+    запросов в час, все интервалы растягиваются в одинаковое число
+    раз. Сумма частот обновляется за O(1) при каждом планировании.
+    """
+
+    def __init__(self, policy, budget=None, tick=1.0, start=None):
+        self.policy = policy
+        self.budget = budget
+        if start is None:
+            start = time.time()
+        self.wheel = TimingWheel(tick=tick, start=start)
+        self._rates = {}
+        self._total_rate = 0.0
+
+    def __len__(self):
+        return len(self.wheel)
+
+    def _set_rate(self, key, interval):
+        rate = 3600 / interval
+        self._total_rate += rate - self._rates.get(key, 0.0)
+        self._rates[key] = rate
+
+    def budget_factor(self):
+        """Во сколько раз растянуть интервалы, чтобы уложиться в бюджет."""
+        if not self.budget or self._total_rate <= self.budget:
+            return 1.0
+        return self._total_rate / self.budget
+
+    def add(self, key, when):
+        """Планируем опрос подписки на момент when."""
+        self.wheel.insert(key, when)
+
+    def reschedule(self, key, state, now):
+        """Планируем следующий опрос по состоянию подписки."""
+        interval = self.policy.next_interval(state, now)
+        self._set_rate(key, interval)
+        when = now + interval * self.budget_factor()
+        self.add(key, when)
+        return when
+
+    def remove(self, key):
+        """Убираем подписку из расписания."""
+        self.wheel.cancel(key)
+        self._total_rate -= self._rates.pop(key, 0.0)
+
+    def next_time(self):
+        """Момент, до которого можно спать, или None."""
+        return self.wheel.next_time()
+
+    def pop_due(self, now):
+        """Забираем подписки, которые пора опросить."""
+        return self.wheel.advance(now)
+
+    def lag_stats(self):
+        """Опоздание опросов относительно расписания."""
+        return self.wheel.lag_stats()
@@ -0,0 +1,224 @@
+from typing import NamedTuple
+
+from exceptions import InvalidRecordError
+
+MISSING = 'missing'
+TYPE = 'type'
+CHOICE = 'choice'
+RECORD = 'record'
+
+
+class Field:
+    """Поле записи: допустимые типы, обязательность и допустимые значения.
+
+    Необязательное поле может отсутствовать или быть None. Значение
+    из choices заменяется самим объектом-ключом choices, поэтому
+    одинаковые статусы всех записей - одна строка в памяти.
+    """
+
+    def __init__(self, types, required=False, choices=None):
+        self.types = types if isinstance(types, tuple) else (types,)
+        self.required = required
+        self.choices = (
+            {choice: choice for choice in choices}
+            if choices is not None else None
+        )
+
+
+class RecordError(NamedTuple):
+    """Ошибка одной записи пачки."""
+
+    index: int
+    field: str
+    code: str
+    message: str
+
+
+def record_error(index, field, code, value=None):
+    """Собираем ошибку записи с понятным сообщением."""
+    if code == RECORD:
+        message = 'Запись не является словарем'
+    elif code == MISSING:
+        message = f'В ответе API отсутствует ключ {field}'
+    elif code == TYPE:
+        message = f'Поле {field} имеет тип {type(value).__name__}'
+    else:
+        message = f'Недокументированное значение поля {field}: {value!r}'
+    return RecordError(index, field, code, message)
+
+
+def rejected(records):
+    """Ошибка InvalidRecordError об отброшенных записях или None.
+
+    Для потока вызывается после итерации, когда ошибки уже собраны.
+    """
+    errors = getattr(records, 'errors', None)
+    if not errors:
+        return None
+    return InvalidRecordError(
+        f'Отброшено записей: {len(errors)}. {errors[0].message}'
+    )
+
+
+class Records(list):
+    """Прошедшие проверку записи и ошибки отброшенных записей."""
+
+    def __init__(self, records=(), errors=()):
+        super().__init__(records)
+        self.errors = list(errors)
+
+
+class CheckedStream:
+    """Потоковая проверка: записи проверяются по мере итерации.
+
+    Ошибки отброшенных записей копятся в errors. Поля верхнего
+    уровня берутся из исходного потока.
+    """
+
+    def __init__(self, stream, validator):
+        self.stream = stream
+        self.validator = validator
+        self.errors = []
+
+    def get(self, name, default=None):
+        """Поле верхнего уровня исходного ответа."""
+        return self.stream.get(name, default)
+
+    def __iter__(self):
+        validate = self.validator.validate
+        for index, record in enumerate(self.stream):
+            checked = validate((record,))
+            if checked:
+                yield checked[0]
+            else:
+                self.errors.append(checked.errors[0]._replace(index=index))
+
+
+class Schema:
+    """Декларативное описание записи ответа API.
+
+    compile() один раз генерирует код проверки всех полей подряд,
+    без циклов по описанию на каждой записи, как это делают
+    dataclasses. Порядок полей задаёт порядок проверок. Если задан
+    factory, validate возвращает не исходные словари, а
+    factory(*значения полей в порядке схемы).
+    """
+
+    def __init__(self, fields, factory=None):
+        self.fields = dict(fields)
+        self.factory = factory
+        self._validator = None
+
+    def _field_lines(self, fail):
+        """Строки проверки полей; fail - код обработки ошибки."""
+        lines = []
+        for number, (name, field) in enumerate(self.fields.items()):
+            value = f'value_{number}'
+            wrong_type = (
+                f'type({value}) is not types_{number}'
+                if len(field.types) == 1
+                else f'type({value}) not in types_{number}'
+            )
+            lines.append(f'{value} = get({name!r})')
+            if field.required:
+                lines.append(f'if {value} is None:')
+                lines.append(
+                    '    ' + fail.format(field=repr(name), code='MISSING',
+                                         value=value)
+                )
+                lines.append(f'if {wrong_type}:')
+            else:
+                lines.append(f'if {value} is not None and {wrong_type}:')
+            lines.append(
+                '    ' + fail.format(field=repr(name), code='TYPE',
+                                     value=value)
+            )
+            if field.choices is not None:
+                lines.append(f'canonical = choices_{number}.get({value})')
+                lines.append('if canonical is None:')
+                lines.append(
+                    '    ' + fail.format(field=repr(name), code='CHOICE',
+                                         value=value)
+                )
+                lines.append(f'{value} = canonical')
+        return lines
+
+    def compile(self):
+        """Возвращаем скомпилированный Validator (один на схему)."""
+        if self._validator is None:
+            self._validator = Validator(self)
+        return self._validator
+
+
+class Validator:
+    """Скомпилированная проверка записей по Schema.
+
+    check(record, index=0) возвращает RecordError первой ошибки
+    или None. validate(records) проверяет пачку за один проход
+    и возвращает Records: подходящие записи и ошибки остальных,
+    не останавливаясь на первой плохой записи.
+    """
+
+    def __init__(self, schema):
+        self.schema = schema
+        namespace = {
+            'MISSING': MISSING,
+            'TYPE': TYPE,
+            'CHOICE': CHOICE,
+            'RECORD': RECORD,
+            'Records': Records,
+            'record_error': record_error,
+            'factory': schema.factory,
+        }
+        for number, field in enumerate(schema.fields.values()):
+            namespace[f'types_{number}'] = (
+                field.types[0] if len(field.types) == 1
+                else frozenset(field.types)
+            )
+            namespace[f'choices_{number}'] = field.choices
+        values = ', '.join(
+            f'value_{number}' for number in range(len(schema.fields))
+        )
+        result = 'record' if schema.factory is None else f'factory({values})'
+        check = schema._field_lines(
+            'return record_error(index, {field}, {code}, {value})'
+        )
+        batch = schema._field_lines(
+            'append_error(record_error(index, {field}, {code}, {value}))'
+            '; continue'
+        )
+        source = '\n'.join(
+            [
+                'def check(record, index=0):',
+                '    if type(record) is not dict:',
+                '        return record_error(index, "", RECORD)',
+                '    get = record.get',
+            ]
+            + ['    ' + line for line in check]
+            + [
+                '    return None',
+                '',
+                'def validate(records):',
+                '    valid = Records()',
+                '    append = valid.append',
+                '    append_error = valid.errors.append',
+                '    for index, record in enumerate(records):',
+                '        if type(record) is not dict:',
+                '            append_error(record_error(index, "", RECORD))',
+                '            continue',
+                '        get = record.get',
+            ]
+            + ['        ' + line for line in batch]
+            + [
+                f'        append({result})',
+                '    return valid',
+            ]
+        )
+        self.source = source
+        exec(compile(source, f'<schema {id(schema):x}>', 'exec'), namespace)
+        self.check = namespace['check']
+        self.validate = namespace['validate']
+
+    def stream(self, stream):
+        """Проверяем записи потока по мере чтения."""
+        return CheckedStream(stream, self)
@@ -0,0 +1,233 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+
+class TokenBucket:
+    """Ведро токенов: rate токенов в секунду, не больше capacity."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now):
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated = now
+
+    def delay(self, now):
+        """Сколько ждать до появления токена."""
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self):
+        """Забираем один токен."""
+        self.tokens -= 1
+
+    def block(self, until):
+        """Запрещаем отправку до момента until (ответ 429)."""
+        self.blocked_until = max(self.blocked_until, until)
+        self.tokens = 0
+
+
+class RateLimiter:
+    """Лимиты Телеграма: общее ведро бота и ведро каждого чата.
+
+    Один и тот же объект правил используют SendQueue (потоки)
+    и AsyncPipeline (asyncio): acquire либо забирает по токену
+    из обоих вёдер, либо говорит, сколько ждать, а block закрывает
+    чат после ответа 429. Потокобезопасность - забота вызывающего.
+    """
+
+    def __init__(self, global_rate=30, chat_rate=1):
+        self.global_bucket = TokenBucket(global_rate, capacity=1)
+        self.chat_rate = chat_rate
+        self.chat_buckets = {}
+
+    def chat_bucket(self, chat_id):
+        """Ведро чата; создаётся при первом сообщении в чат."""
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = TokenBucket(self.chat_rate, capacity=1)
+            self.chat_buckets[chat_id] = bucket
+        return bucket
+
+    def acquire(self, chat_id, now):
+        """Забираем токены бота и чата; если их нет - сколько ждать."""
+        bucket = self.chat_bucket(chat_id)
+        delay = max(self.global_bucket.delay(now), bucket.delay(now))
+        if delay <= 0:
+            self.global_bucket.consume()
+            bucket.consume()
+        return delay
+
+    def block(self, chat_id, until):
+        """Запрещаем отправку в чат до until (ответ 429)."""
+        self.chat_bucket(chat_id).block(until)
+
+
+class SendQueue:
+    """Очередь исходящих сообщений Телеграма с ограничением скорости.
+
+    Перед отправкой сообщение должно получить токен из общего ведра
+    бота и из ведра своего чата. Ответ 429 (telegram.error.RetryAfter)
+    не считается сбоем: чат блокируется на retry_after секунд,
+    а сообщение возвращается в очередь. Очередь разбирается пулом
+    потоков.
+    """
+
+    def __init__(self, send, global_rate=30, chat_rate=1, workers=4,
+                 max_attempts=5):
+        self.send = send
+        self.limiter = RateLimiter(global_rate, chat_rate)
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self._heap = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._threads = []
+        self._running = False
+        self._in_flight = 0
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.started = time.monotonic()
+
+    def put(self, chat_id, message, callback=None):
+        """Ставим сообщение в очередь, не дожидаясь отправки.
+
+        callback(delivered) вызывается, когда сообщение отправлено
+        или окончательно не отправлено.
+        """
+        sequence = next(self._sequence)
+        self._push(time.monotonic(), sequence, chat_id, message, 0, callback)
+
+    def _push(self, ready, sequence, chat_id, message, attempts,
+              callback=None):
+        with self._condition:
+            heapq.heappush(
+                self._heap,
+                (ready, sequence, chat_id, message, attempts, callback),
+            )
+            self._condition.notify_all()
+
+    def _take(self):
+        with self._condition:
+            while self._running:
+                if not self._heap:
+                    self._condition.wait()
+                    continue
+                now = time.monotonic()
+                ready, sequence, chat_id, message, attempts, callback = (
+                    self._heap[0]
+                )
+                if ready > now:
+                    self._condition.wait(ready - now)
+                    continue
+                delay = self.limiter.acquire(chat_id, now)
+                if delay > 0:
+                    heapq.heapreplace(
+                        self._heap,
+                        (now + delay, sequence, chat_id, message, attempts,
+                         callback),
+                    )
+                    continue
+                heapq.heappop(self._heap)
+                self._in_flight += 1
+                return sequence, chat_id, message, attempts, callback
+        return None
+
+    def _deliver(self, sequence, chat_id, message, attempts, callback):
+        try:
+            self.send(chat_id, message)
+        except Exception as error:
+            retry_after = getattr(error, 'retry_after', None)
+            if retry_after is None or attempts + 1 >= self.max_attempts:
+                logging.error(f'[{chat_id}] Сообщение не отправлено: {error}')
+                return 'failed'
+            logging.warning(
+                f'[{chat_id}] Телеграм просит подождать {retry_after} с'
+            )
+            until = time.monotonic() + retry_after
+            with self._condition:
+                self.limiter.block(chat_id, until)
+            self._push(
+                until, sequence, chat_id, message, attempts + 1, callback
+            )
+            return 'retried'
+        return 'sent'
+
+    def _worker(self):
+        while True:
+            item = self._take()
+            if item is None:
+                return
+            outcome = 'failed'
+            try:
+                outcome = self._deliver(*item)
+            finally:
+                with self._condition:
+                    self._in_flight -= 1
+                    setattr(self, outcome, getattr(self, outcome) + 1)
+                    self._condition.notify_all()
+                callback = item[-1]
+                if callback is not None and outcome != 'retried':
+                    try:
+                        callback(outcome == 'sent')
+                    except Exception as error:
+                        logging.error(f'Ошибка обратного вызова: {error}')
+
+    def start(self):
+        """Запускаем пул потоков отправки."""
+        self._running = True
+        self.started = time.monotonic()
+        self._threads = [
+            threading.Thread(target=self._worker, daemon=True)
+            for _ in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def join(self, timeout=None):
+        """Ждём, пока очередь опустеет. Возвращаем True, если успели."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self._heap or self._in_flight:
+                remaining = None
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                self._condition.wait(remaining)
+        return True
+
+    def stop(self):
+        """Останавливаем потоки; неотправленные сообщения остаются."""
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def stats(self):
+        """Глубина очереди и пропускная способность отправки."""
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        return {
+            'depth': len(self._heap) + self._in_flight,
+            'sent': self.sent,
+            'failed': self.failed,
+            'retried': self.retried,
+            'throughput': self.sent / elapsed,
+        }
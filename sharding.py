@@ -0,0 +1,237 @@
+import argparse
+import bisect
+import hashlib
+import logging
+import os
+import signal
+import socket
+import sqlite3
+import subprocess
+import sys
+import time
+
+
+def ring_point(value):
+    """Точка на кольце для строки."""
+    return int.from_bytes(
+        hashlib.blake2b(value.encode(), digest_size=8).digest(), 'big'
+    )
+
+
+class HashRing:
+    """Консистентное хеширование ключей по воркерам.
+
+    У каждого воркера replicas виртуальных точек на кольце, ключ
+    принадлежит первой точке по часовой стрелке. При добавлении
+    или уходе воркера переезжает только ~1/N ключей.
+    """
+
+    def __init__(self, members, replicas=64):
+        self.members = sorted(members)
+        points = sorted(
+            (ring_point(f'{member}#{number}'), member)
+            for member in self.members
+            for number in range(replicas)
+        )
+        self._points = [point for point, _ in points]
+        self._owners = [member for _, member in points]
+
+    def owner(self, key):
+        """Воркер, которому принадлежит ключ, или None."""
+        if not self._points:
+            return None
+        index = bisect.bisect(self._points, ring_point(key))
+        return self._owners[index % len(self._points)]
+
+
+class ShardCoordinator:
+    """Членство воркеров и аренда шардов в общем файле SQLite.
+
+    Воркер раз в ttl / 3 секунд отмечается в таблице workers; живыми
+    считаются воркеры с отметкой не старше ttl. Из живых воркеров
+    строится HashRing, и assign возвращает ключи, которые должен
+    обслуживать этот воркер. Опрашивать ключ можно только под арендой:
+    claim продлевает свои аренды, отпускает лишние и берёт новые
+    ключи, только если аренда свободна или истекла. Поэтому при
+    передаче ключа новый владелец ждёт, пока прежний отпустит его,
+    и два воркера никогда не опрашивают подписку одновременно.
+    """
+
+    def __init__(self, path, worker_id, ttl=30.0, replicas=64,
+                 clock=time.time):
+        self.worker_id = worker_id
+        self.ttl = ttl
+        self.replicas = replicas
+        self.clock = clock
+        self.heartbeat_interval = ttl / 3
+        self.members = []
+        self.connection = sqlite3.connect(
+            path, timeout=ttl, check_same_thread=False, isolation_level=None
+        )
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS workers ('
+            'worker TEXT PRIMARY KEY, heartbeat REAL NOT NULL)'
+        )
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS leases ('
+            'shard TEXT PRIMARY KEY, worker TEXT NOT NULL, '
+            'expires REAL NOT NULL)'
+        )
+
+    def _transaction(self, work):
+        connection = self.connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            result = work(connection)
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+        return result
+
+    def heartbeat(self):
+        """Отмечаемся живыми и возвращаем список живых воркеров."""
+        now = self.clock()
+
+        def work(connection):
+            connection.execute(
+                'INSERT OR REPLACE INTO workers (worker, heartbeat) '
+                'VALUES (?, ?)',
+                (self.worker_id, now),
+            )
+            connection.execute(
+                'DELETE FROM workers WHERE heartbeat < ?', (now - self.ttl,)
+            )
+            return [
+                worker for worker, in connection.execute(
+                    'SELECT worker FROM workers ORDER BY worker'
+                )
+            ]
+
+        members = self._transaction(work)
+        if members != self.members:
+            logging.info(f'Воркеры шардов: {", ".join(members)}')
+        self.members = members
+        return members
+
+    def assign(self, keys):
+        """Ключи из keys, которые по кольцу принадлежат этому воркеру."""
+        ring = HashRing(self.heartbeat(), self.replicas)
+        return {key for key in keys if ring.owner(key) == self.worker_id}
+
+    def claim(self, keys):
+        """Удерживаем аренду keys и отпускаем остальные ключи.
+
+        Возвращает ключи, аренда которых сейчас у этого воркера.
+        """
+        now = self.clock()
+        expires = now + self.ttl
+        keys = set(keys)
+
+        def work(connection):
+            held = {
+                shard for shard, in connection.execute(
+                    'SELECT shard FROM leases WHERE worker = ?',
+                    (self.worker_id,),
+                )
+            }
+            connection.executemany(
+                'DELETE FROM leases WHERE shard = ? AND worker = ?',
+                [(shard, self.worker_id) for shard in held - keys],
+            )
+            connection.executemany(
+                'INSERT INTO leases (shard, worker, expires) '
+                'VALUES (?, ?, ?) ON CONFLICT (shard) DO UPDATE SET '
+                'worker = excluded.worker, expires = excluded.expires '
+                'WHERE leases.worker = excluded.worker '
+                'OR leases.expires < ?',
+                [(shard, self.worker_id, expires, now) for shard in keys],
+            )
+            return {
+                shard for shard, in connection.execute(
+                    'SELECT shard FROM leases WHERE worker = ?',
+                    (self.worker_id,),
+                )
+            }
+
+        return self._transaction(work)
+
+    def leave(self):
+        """Уходим из кольца и отпускаем аренды."""
+
+        def work(connection):
+            connection.execute(
+                'DELETE FROM leases WHERE worker = ?', (self.worker_id,)
+            )
+            connection.execute(
+                'DELETE FROM workers WHERE worker = ?', (self.worker_id,)
+            )
+
+        self._transaction(work)
+        self.connection.close()
+
+
+def default_worker_id():
+    """Имя воркера по умолчанию: хост и номер процесса."""
+    return f'{socket.gethostname()}-{os.getpid()}'
+
+
+def launch(workers, coordinator, command, restart_delay=1.0):
+    """Запускаем workers процессов бота с общим координатором.
+
+    Каждый процесс получает свой shard_id, упавший процесс
+    перезапускается с тем же именем. SIGTERM и SIGINT передаются
+    всем процессам.
+    """
+    host = socket.gethostname()
+    processes = {}
+    stopping = False
+
+    def start(number):
+        env = dict(
+            os.environ,
+            shard_id=f'{host}-{number}',
+            shard_coordinator=coordinator,
+        )
+        processes[number] = subprocess.Popen(command, env=env)
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for process in processes.values():
+            process.terminate()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for number in range(workers):
+        start(number)
+    while not stopping:
+        time.sleep(restart_delay)
+        for number, process in list(processes.items()):
+            if process.poll() is not None and not stopping:
+                logging.error(
+                    f'Воркер {number} завершился с кодом '
+                    f'{process.returncode}, перезапускаем'
+                )
+                start(number)
+    for process in processes.values():
+        process.wait()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Локальный запуск нескольких шардов бота.'
+    )
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--coordinator', default='homework_shards.db')
+    parser.add_argument(
+        'command', nargs='*', default=[sys.executable, 'homework.py']
+    )
+    arguments = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    launch(
+        arguments.workers,
+        arguments.coordinator,
+        arguments.command or [sys.executable, 'homework.py'],
+    )
@@ -0,0 +1,334 @@
+import json
+import logging
+import mmap
+import os
+import sqlite3
+import struct
+import threading
+import time
+import zlib
+
+CURSOR = 'cursor'
+STATUS = 'status'
+ERROR = 'error'
+CARD = 'card'
+
+
+class MemoryStateStore:
+    """Состояние подписок в памяти: курсоры, статусы, ошибки и карточки.
+
+    Наследники сохраняют изменения на диск. Записи копятся в буфере
+    и сбрасываются пачкой не чаще раза в flush_interval секунд,
+    поэтому опрос не ждёт fsync на каждом шаге.
+    """
+
+    def __init__(self, flush_interval=5.0):
+        self.flush_interval = flush_interval
+        self._cursors = {}
+        self._statuses = {}
+        self._errors = {}
+        self._cards = {}
+        self._pending = {}
+        self._lock = threading.RLock()
+        self._last_flush = time.monotonic()
+        for record in self._read_records():
+            self._apply(*record)
+
+    def _apply(self, kind, tenant, name, value):
+        if kind == CURSOR:
+            self._cursors[tenant] = value
+        elif kind == STATUS:
+            self._statuses.setdefault(tenant, {})[name] = value
+        elif kind == ERROR:
+            self._errors[tenant] = value
+        elif kind == CARD:
+            self._cards.setdefault(tenant, {})[name] = value
+
+    def _write(self, kind, tenant, name, value):
+        with self._lock:
+            self._apply(kind, tenant, name, value)
+            self._pending[(kind, tenant, name)] = value
+
+    def get_cursor(self, tenant, default=None):
+        """Возвращаем курсор from_date подписки."""
+        return self._cursors.get(tenant, default)
+
+    def set_cursor(self, tenant, value):
+        """Запоминаем курсор from_date подписки."""
+        if self._cursors.get(tenant) != value:
+            self._write(CURSOR, tenant, '', value)
+
+    def statuses(self, tenant):
+        """Возвращаем копию последних статусов работ подписки."""
+        return dict(self._statuses.get(tenant, {}))
+
+    def set_status(self, tenant, homework_key, status):
+        """Запоминаем последний статус работы."""
+        self._write(STATUS, tenant, homework_key, status)
+
+    def get_error(self, tenant, default=''):
+        """Возвращаем отпечаток последней отправленной ошибки."""
+        return self._errors.get(tenant, default)
+
+    def set_error(self, tenant, fingerprint):
+        """Запоминаем отпечаток последней отправленной ошибки."""
+        if self._errors.get(tenant) != fingerprint:
+            self._write(ERROR, tenant, '', fingerprint)
+
+    def cards(self, tenant):
+        """Возвращаем копию карточек статусов подписки."""
+        return dict(self._cards.get(tenant, {}))
+
+    def set_card(self, tenant, name, card):
+        """Запоминаем карточку статусов: id сообщения и её строки."""
+        self._write(CARD, tenant, name, card)
+
+    def maybe_flush(self):
+        """Сбрасываем буфер, если с прошлого сброса прошло достаточно."""
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Сбрасываем накопленные изменения на диск."""
+        with self._lock:
+            batch = [
+                (kind, tenant, name, value)
+                for (kind, tenant, name), value in self._pending.items()
+            ]
+            self._pending.clear()
+            if batch:
+                self._write_batch(batch)
+            self._last_flush = time.monotonic()
+
+    def reload(self, tenant):
+        """Перечитываем с диска состояние подписки.
+
+        Нужно, когда подписку до этого обслуживал другой процесс
+        с тем же хранилищем. Хранилище в памяти ничего не перечитывает.
+        """
+        with self._lock:
+            self.flush()
+            records = self._read_tenant(tenant)
+            if records is None:
+                return
+            self._cursors.pop(tenant, None)
+            self._statuses.pop(tenant, None)
+            self._errors.pop(tenant, None)
+            self._cards.pop(tenant, None)
+            for record in records:
+                self._apply(*record)
+
+    def close(self):
+        """Сбрасываем изменения и освобождаем ресурсы."""
+        self.flush()
+
+    def _read_records(self):
+        return []
+
+    def _read_tenant(self, tenant):
+        return None
+
+    def _write_batch(self, batch):
+        """Хранилище в памяти ничего не пишет на диск."""
+
+
+class SQLiteStateStore(MemoryStateStore):
+    """Состояние во встроенной SQLite в режиме WAL.
+
+    Каждая пачка записей - одна транзакция, то есть один fsync
+    на flush_interval вместо fsync на каждый опрос.
+    """
+
+    def __init__(self, path, flush_interval=5.0):
+        self.connection = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=FULL')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS state ('
+            'kind TEXT NOT NULL, tenant TEXT NOT NULL, name TEXT NOT NULL, '
+            'value TEXT, PRIMARY KEY (kind, tenant, name)) WITHOUT ROWID'
+        )
+        self.connection.execute(
+            'CREATE INDEX IF NOT EXISTS state_tenant ON state (tenant)'
+        )
+        super().__init__(flush_interval)
+
+    def _read_records(self):
+        rows = self.connection.execute(
+            'SELECT kind, tenant, name, value FROM state'
+        )
+        for kind, tenant, name, value in rows:
+            yield kind, tenant, name, json.loads(value)
+
+    def _read_tenant(self, tenant):
+        rows = self.connection.execute(
+            'SELECT kind, tenant, name, value FROM state WHERE tenant = ?',
+            (tenant,),
+        ).fetchall()
+        return [
+            (kind, tenant, name, json.loads(value))
+            for kind, tenant, name, value in rows
+        ]
+
+    def _write_batch(self, batch):
+        connection = self.connection
+        connection.execute('BEGIN')
+        try:
+            connection.executemany(
+                'INSERT OR REPLACE INTO state (kind, tenant, name, value) '
+                'VALUES (?, ?, ?, ?)',
+                [
+                    (kind, tenant, name, json.dumps(value))
+                    for kind, tenant, name, value in batch
+                ],
+            )
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+
+    def close(self):
+        """Сбрасываем изменения и закрываем базу."""
+        super().close()
+        self.connection.close()
+
+
+class MmapLogStateStore(MemoryStateStore):
+    """Состояние в отображённом в память журнале только для дописывания.
+
+    Запись - это длина, CRC32 и JSON. Файл растёт блоками по
+    chunk_size байт, новые записи копируются прямо в отображение,
+    а msync выполняется при сбросе пачки. При открытии журнал
+    читается до первой повреждённой записи и сжимается в снимок,
+    если мёртвых записей стало больше, чем живых.
+    """
+
+    HEADER = struct.Struct('<II')
+
+    def __init__(self, path, flush_interval=5.0, chunk_size=1 << 20):
+        self.path = path
+        self.chunk_size = chunk_size
+        self._records_count = 0
+        self._open()
+        super().__init__(flush_interval)
+        if self._records_count > 2 * self._live_count() + 1024:
+            self.compact()
+
+    def _open(self):
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        size = os.fstat(self._fd).st_size
+        if size == 0:
+            size = self.chunk_size
+            os.ftruncate(self._fd, size)
+        self._mmap = mmap.mmap(self._fd, size)
+        self._offset = 0
+
+    def _close_mapping(self):
+        self._mmap.flush()
+        self._mmap.close()
+        os.close(self._fd)
+
+    def _live_count(self):
+        return (
+            len(self._cursors) + len(self._errors)
+            + sum(len(statuses) for statuses in self._statuses.values())
+            + sum(len(cards) for cards in self._cards.values())
+        )
+
+    def _read_records(self):
+        buffer = self._mmap
+        offset = 0
+        header = self.HEADER
+        while offset + header.size <= len(buffer):
+            length, checksum = header.unpack_from(buffer, offset)
+            start = offset + header.size
+            if length == 0 or start + length > len(buffer):
+                break
+            payload = buffer[start:start + length]
+            if zlib.crc32(payload) != checksum:
+                logging.error('Журнал состояния повреждён, хвост отброшен')
+                buffer[offset:] = bytes(len(buffer) - offset)
+                break
+            offset = start + length
+            self._records_count += 1
+            yield tuple(json.loads(payload))
+        self._offset = offset
+
+    def _encode(self, record):
+        payload = json.dumps(record).encode()
+        return self.HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+    def _append(self, entry):
+        needed = self._offset + len(entry)
+        if needed > len(self._mmap):
+            size = len(self._mmap)
+            while size < needed:
+                size += self.chunk_size
+            self._mmap.flush()
+            self._mmap.close()
+            os.ftruncate(self._fd, size)
+            self._mmap = mmap.mmap(self._fd, size)
+        self._mmap[self._offset:needed] = entry
+        self._offset = needed
+        self._records_count += 1
+
+    def _write_batch(self, batch):
+        for record in batch:
+            self._append(self._encode(record))
+        self._mmap.flush()
+
+    def compact(self):
+        """Переписываем журнал снимком текущего состояния."""
+        with self._lock:
+            self.flush()
+            records = [(CURSOR, tenant, '', value)
+                       for tenant, value in self._cursors.items()]
+            records += [(ERROR, tenant, '', value)
+                        for tenant, value in self._errors.items()]
+            records += [
+                (STATUS, tenant, name, value)
+                for tenant, statuses in self._statuses.items()
+                for name, value in statuses.items()
+            ]
+            records += [
+                (CARD, tenant, name, value)
+                for tenant, cards in self._cards.items()
+                for name, value in cards.items()
+            ]
+            temp_path = f'{self.path}.compact'
+            offset = 0
+            with open(temp_path, 'wb') as file:
+                for record in records:
+                    offset += file.write(self._encode(record))
+                file.truncate(max(offset, self.chunk_size))
+                file.flush()
+                os.fsync(file.fileno())
+            self._close_mapping()
+            os.replace(temp_path, self.path)
+            self._open()
+            self._offset = offset
+            self._records_count = len(records)
+
+    def close(self):
+        """Сбрасываем изменения и закрываем журнал."""
+        super().close()
+        self._close_mapping()
+
+
+STATE_BACKENDS = {
+    'memory': lambda path, flush_interval: MemoryStateStore(flush_interval),
+    'sqlite': SQLiteStateStore,
+    'mmap': MmapLogStateStore,
+}
+
+
+def open_state_store(backend, path, flush_interval=5.0):
+    """Создаём хранилище состояния по имени бэкенда."""
+    try:
+        factory = STATE_BACKENDS[backend]
+    except KeyError:
+        logging.error(f'Неизвестное хранилище состояния: {backend}')
+        raise ValueError(f'Неизвестное хранилище состояния: {backend}')
+    return factory(path, flush_interval=flush_interval)
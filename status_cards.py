@@ -0,0 +1,205 @@
+import functools
+import logging
+import threading
+import time
+
+HOMEWORK = 'homework'
+CHAT = 'chat'
+MODES = (HOMEWORK, CHAT)
+TEXT_LIMIT = 4096
+
+
+class CardUpdate:
+    """Новый текст карточки и id сообщения, которое надо править.
+
+    Если message_id нет, отправитель присылает новое сообщение
+    и записывает его id в message_id.
+    """
+
+    __slots__ = ('text', 'message_id')
+
+    def __init__(self, text, message_id=None):
+        self.text = text
+        self.message_id = message_id
+
+
+def card_text(lines):
+    """Текст карточки из строк работ; старые строки уходят первыми.
+
+    Телеграм не принимает сообщения длиннее TEXT_LIMIT символов.
+    """
+    lines = list(lines)
+    text = '\n\n'.join(lines)
+    while len(text) > TEXT_LIMIT and len(lines) > 1:
+        lines.pop(0)
+        text = '\n\n'.join(lines)
+    return text[:TEXT_LIMIT]
+
+
+class StatusCards:
+    """Карточки статусов: одно сообщение, которое правится на месте.
+
+    В режиме HOMEWORK у каждой работы своя карточка, в режиме CHAT
+    одна карточка на подписку со строкой для каждой работы. Изменения
+    копятся debounce секунд с первого из них, и карточка уходит
+    одним вызовом submit(chat_id, CardUpdate, callback): первый раз
+    sendMessage, дальше editMessageText.
+
+    Карточка (id сообщения, строки работ и флаг неотправленных
+    изменений) пишется в хранилище состояния вместе со статусами,
+    поэтому после перезапуска правка продолжается в том же сообщении,
+    а неотправленные изменения отправляются заново (restore).
+    Готовые карточки отправляет фоновый поток (start) или flush.
+    """
+
+    def __init__(self, store, submit, mode=HOMEWORK, debounce=2.0,
+                 retry_delay=60.0, max_attempts=5):
+        if mode not in MODES:
+            logging.error(f'Неизвестный режим карточек статусов: {mode}')
+            raise ValueError(f'Неизвестный режим карточек статусов: {mode}')
+        self.store = store
+        self.submit = submit
+        self.mode = mode
+        self.debounce = debounce
+        self.retry_delay = retry_delay
+        self.max_attempts = max_attempts
+        self._due = {}
+        self._in_flight = set()
+        self._attempts = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._running = False
+        self._thread = None
+        self.submitted = 0
+        self.coalesced = 0
+
+    def _card(self, tenant, name):
+        card = self.store.cards(tenant).get(name)
+        if card is None:
+            return {'message_id': None, 'lines': {}, 'dirty': False}
+        return dict(card, lines=dict(card['lines']))
+
+    def update(self, tenant, chat_id, homework_key, line, now=None):
+        """Меняем строку работы в карточке и планируем отправку."""
+        now = time.time() if now is None else now
+        name = homework_key if self.mode == HOMEWORK else ''
+        with self._lock:
+            card = self._card(tenant, name)
+            card['lines'].pop(homework_key, None)
+            card['lines'][homework_key] = line
+            card['dirty'] = True
+            self.store.set_card(tenant, name, card)
+            if (tenant, name) in self._due:
+                self.coalesced += 1
+            else:
+                self._due[tenant, name] = (now + self.debounce, chat_id)
+                self._wakeup.set()
+
+    def restore(self, tenant, chat_id, now=None):
+        """Планируем карточки с изменениями, не отправленными до сбоя."""
+        now = time.time() if now is None else now
+        with self._lock:
+            for name, card in self.store.cards(tenant).items():
+                if card['dirty']:
+                    self._due.setdefault((tenant, name), (now, chat_id))
+        self._wakeup.set()
+
+    def forget(self, tenant):
+        """Снимаем с отправки карточки подписки, ушедшей другому воркеру."""
+        with self._lock:
+            for due in [due for due in self._due if due[0] == tenant]:
+                del self._due[due]
+
+    def next_time(self):
+        """Ближайший срок отправки карточки, не ждущей ответа, или None."""
+        with self._lock:
+            return min(
+                (
+                    when for due, (when, _) in self._due.items()
+                    if due not in self._in_flight
+                ),
+                default=None,
+            )
+
+    def flush(self, now=None):
+        """Отправляем карточки, чьё окно debounce закончилось."""
+        now = time.time() if now is None else now
+        with self._lock:
+            ready = [
+                (tenant, name, chat_id)
+                for (tenant, name), (when, chat_id) in self._due.items()
+                if when <= now and (tenant, name) not in self._in_flight
+            ]
+            updates = []
+            for tenant, name, chat_id in ready:
+                del self._due[tenant, name]
+                card = self._card(tenant, name)
+                update = CardUpdate(
+                    card_text(card['lines'].values()), card['message_id']
+                )
+                self._in_flight.add((tenant, name))
+                updates.append((tenant, name, chat_id, update))
+        for tenant, name, chat_id, update in updates:
+            callback = functools.partial(
+                self._delivered, tenant, name, chat_id, update
+            )
+            try:
+                self.submit(chat_id, update, callback)
+            except Exception as error:
+                logging.error(f'[{tenant}] Карточка не отправлена: {error}')
+                callback(False)
+        self.submitted += len(updates)
+        return len(updates)
+
+    def _delivered(self, tenant, name, chat_id, update, delivered):
+        with self._lock:
+            self._in_flight.discard((tenant, name))
+            if delivered or not self._retry(tenant, name, chat_id):
+                self._attempts.pop((tenant, name), None)
+                card = self._card(tenant, name)
+                if delivered:
+                    card['message_id'] = update.message_id
+                if card_text(card['lines'].values()) == update.text:
+                    card['dirty'] = False
+                self.store.set_card(tenant, name, card)
+        self._wakeup.set()
+
+    def _retry(self, tenant, name, chat_id):
+        attempts = self._attempts.get((tenant, name), 0) + 1
+        if attempts >= self.max_attempts:
+            logging.error(f'[{tenant}] Карточка {name} не доставлена')
+            return False
+        self._attempts[tenant, name] = attempts
+        self._due.setdefault(
+            (tenant, name), (time.time() + self.retry_delay, chat_id)
+        )
+        return True
+
+    def _worker(self):
+        while self._running:
+            next_time = self.next_time()
+            timeout = (
+                None if next_time is None
+                else max(0.0, next_time - time.time())
+            )
+            self._wakeup.wait(timeout)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as error:
+                logging.error(f'Сбой отправки карточек статусов: {error}')
+
+    def start(self):
+        """Запускаем отправку карточек в фоновом потоке."""
+        self._running = True
+        self._thread = threading.Thread(target=self._worker, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Останавливаем поток; неотправленное останется в хранилище."""
+        self._running = False
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
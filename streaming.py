@@ -0,0 +1,124 @@
+import codecs
+import json
+from json.decoder import WHITESPACE
+
+TRIM_AFTER = 64 * 1024
+
+
+class HomeworkStream:
+    """Потоковый разбор ответа API по кускам тела.
+
+    Итерация отдаёт записи массива homeworks по одной, не собирая
+    ни тело, ни список целиком: в памяти лежит только текущий кусок.
+    Остальные поля верхнего уровня (current_date) доступны через get()
+    после итерации. Ошибки формата - те же TypeError, что
+    у check_response. Поток можно пройти только один раз; close
+    вызывается, когда итерация закончилась, в том числе с ошибкой.
+    """
+
+    def __init__(self, chunks, key='homeworks', encoding='utf-8',
+                 close=None):
+        self.key = key
+        self._close = close
+        self.fields = {}
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder(encoding)()
+        self._json = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+        self._started = False
+
+    def get(self, name, default=None):
+        """Поле верхнего уровня, прочитанное во время итерации."""
+        return self.fields.get(name, default)
+
+    def _more(self):
+        if self._eof:
+            return False
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self._eof = True
+            text = self._decoder.decode(b'', final=True)
+        else:
+            text = self._decoder.decode(chunk)
+        if self._pos > TRIM_AFTER:
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+        self._buffer += text
+        return True
+
+    def _peek(self):
+        """Первый значимый символ с позиции _pos или '' в конце тела."""
+        while True:
+            self._pos = WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._more():
+                return ''
+
+    def _value(self):
+        self._peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if not self._more():
+                    raise
+                continue
+            if end == len(self._buffer) and self._more():
+                continue
+            self._pos = end
+            return value
+
+    def _expect(self, char):
+        if self._peek() != char:
+            raise ValueError(f'Ожидался символ {char!r} в ответе API')
+        self._pos += 1
+
+    def _records(self):
+        if self._peek() != '[':
+            raise TypeError('Список домашних работ не является списком')
+        self._pos += 1
+        while True:
+            char = self._peek()
+            if char == ']':
+                self._pos += 1
+                return
+            if char == ',':
+                self._pos += 1
+            elif not char:
+                raise ValueError('Ответ API оборвался')
+            else:
+                yield self._value()
+
+    def __iter__(self):
+        if self._started:
+            return
+        self._started = True
+        try:
+            yield from self._parse()
+        finally:
+            if self._close is not None:
+                self._close()
+
+    def _parse(self):
+        if self._peek() != '{':
+            raise TypeError('Ответ API не является словарем')
+        self._pos += 1
+        seen = False
+        while self._peek() not in ('}', ''):
+            if self._buffer[self._pos] == ',':
+                self._pos += 1
+                continue
+            name = self._value()
+            self._expect(':')
+            if name == self.key:
+                seen = True
+                yield from self._records()
+            else:
+                self.fields[name] = self._value()
+        self._buffer = ''
+        self._pos = 0
+        if not seen:
+            raise TypeError('Список домашних работ не является списком')
@@ -0,0 +1,126 @@
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import time
+
+PLAIN_FORMAT = '%(asctime)s - %(levelname)s - %(message)s - %(name)s'
+EXTRA_FIELDS = ('tenant', 'stage', 'duration')
+
+
+class JsonFormatter(logging.Formatter):
+    """Компактная запись лога одной строкой JSON.
+
+    Кроме времени, уровня и текста переносит поля tenant, stage
+    и duration, если они переданы через extra.
+    """
+
+    def format(self, record):
+        """Собираем JSON из записи."""
+        data = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'msg': record.getMessage(),
+            'logger': record.name,
+        }
+        for name in EXTRA_FIELDS:
+            value = getattr(record, name, None)
+            if value is not None:
+                data[name] = value
+        if record.exc_text:
+            data['exc'] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+
+class SamplingQueueHandler(logging.handlers.QueueHandler):
+    """Кладём записи в ограниченную очередь, не блокируя вызывающего.
+
+    Пока очередь заполнена меньше чем на sample_above, проходят все
+    записи. Выше этой отметки записи ниже keep_level проходят
+    с вероятностью sample_rate. В полной очереди новая запись
+    отбрасывается, а запись от keep_level и выше вытесняет самую
+    старую. Число отброшенных записей хранится в dropped.
+    """
+
+    def __init__(self, maxsize=10000, sample_above=0.8, sample_rate=0.1,
+                 keep_level=logging.WARNING, rng=None):
+        super().__init__(queue.Queue(maxsize))
+        self.high_water = max(1, int(maxsize * sample_above))
+        self.sample_rate = sample_rate
+        self.keep_level = keep_level
+        self.random = rng or random.Random()
+        self.dropped = 0
+
+    def prepare(self, record):
+        """Фиксируем текст записи без форматирования в потоке вызова."""
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(
+                record.exc_info
+            )
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        """Кладём запись в очередь по политике переполнения."""
+        important = record.levelno >= self.keep_level
+        if (
+            not important
+            and self.queue.qsize() >= self.high_water
+            and self.random.random() >= self.sample_rate
+        ):
+            self.dropped += 1
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            if not important:
+                return
+            try:
+                self.queue.get_nowait()
+                self.queue.put_nowait(record)
+            except (queue.Empty, queue.Full):
+                pass
+
+
+def configure_logging(mode='plain', level=logging.DEBUG, stream=None,
+                      queue_size=10000, sample_rate=0.1):
+    """Настраиваем корневой логгер.
+
+    mode='plain' - прежний синхронный вывод basicConfig в stream.
+    mode='queue' - записи уходят в ограниченную очередь, а в stream
+    их пишет фоновый QueueListener в виде JSON. Возвращает listener,
+    который нужно остановить при выходе, или None.
+    """
+    stream = stream or sys.stdout
+    if mode != 'queue':
+        logging.basicConfig(
+            level=level,
+            format=PLAIN_FORMAT,
+            handlers=[logging.StreamHandler(stream)],
+        )
+        return None
+
+    output = logging.StreamHandler(stream)
+    output.setFormatter(JsonFormatter())
+    handler = SamplingQueueHandler(queue_size, sample_rate=sample_rate)
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.handlers = [handler]
+    listener = logging.handlers.QueueListener(
+        handler.queue, output, respect_handler_level=True
+    )
+    listener.start()
+    return listener
+
+
+def stage_extra(tenant, stage, started=None):
+    """Поля extra для записи о стадии подписки."""
+    extra = {'tenant': tenant, 'stage': stage}
+    if started is not None:
+        extra['duration'] = round(time.perf_counter() - started, 6)
+    return extra
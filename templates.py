@@ -0,0 +1,214 @@
+import json
+import logging
+import os
+import re
+from collections import OrderedDict
+from string import Formatter
+
+FIELDS = (
+    'homework_name', 'verdict', 'status', 'reviewer_comment',
+    'date_updated', 'id',
+)
+SECTION = re.compile(r'\[\[(.*?)\]\]', re.DOTALL)
+CONVERSIONS = frozenset('rsa')
+DERIVED = ('verdict',)
+BOUND = ('verdict', 'status')
+
+
+def _escape(text):
+    """Текст для литерала f-строки в одинарных кавычках."""
+    return (
+        text.encode('unicode_escape').decode('ascii')
+        .replace("'", "\\'").replace('{', '{{').replace('}', '}}')
+    )
+
+
+def _compile_text(text):
+    """f-строка для куска шаблона (или None) и имена его полей."""
+    body, names = [], []
+    for literal, name, spec, conversion in Formatter().parse(text):
+        if literal:
+            body.append(_escape(literal))
+        if name is None:
+            continue
+        if name not in FIELDS:
+            raise ValueError(f'Неизвестное поле шаблона: {name}')
+        if conversion and conversion not in CONVERSIONS:
+            raise ValueError(
+                f'Неизвестное преобразование поля {name}: !{conversion}'
+            )
+        if any(char in spec for char in '{}\'\\'):
+            raise ValueError(f'Недопустимый формат поля {name}: {spec}')
+        body.append(
+            '{' + name
+            + (f'!{conversion}' if conversion else '')
+            + (f':{spec}' if spec else '')
+            + '}'
+        )
+        names.append(name)
+    return (f"f'{''.join(body)}'" if body else None), names
+
+
+def compile_template(source):
+    """Компилируем шаблон сообщения в функцию.
+
+    Поля подставляются как в str.format: {homework_name}, {verdict},
+    {status}, {reviewer_comment}, {date_updated}, {id}, с форматом
+    и преобразованиями !r, !s и !a. Кусок в [[...]] выводится, только
+    если все его поля заполнены (не None и не пустая строка): так
+    комментарий ревьюера появляется лишь тогда, когда он есть.
+    Функция принимает поля именованными аргументами, в атрибуте
+    fields хранит поля, которые использует шаблон, а key(get) -
+    их значения из работы (кроме verdict) для ключа кеша.
+    bind(verdict, status) возвращает функцию message(get) для одного
+    статуса: вердикт и статус в ней уже подставлены, а остальные
+    поля читаются из работы через get.
+    """
+    parts, used = [], []
+    position = 0
+    for match in SECTION.finditer(source):
+        text, names = _compile_text(source[position:match.start()])
+        parts.append(text)
+        used += names
+        section, names = _compile_text(match.group(1))
+        used += names
+        if names:
+            condition = ' and '.join(
+                f"{name} not in (None, '')" for name in names
+            )
+            parts.append(f"({section} if {condition} else '')")
+        else:
+            parts.append(section)
+        position = match.end()
+    text, names = _compile_text(source[position:])
+    parts.append(text)
+    used += names
+    parts = [part for part in parts if part is not None]
+    fields = tuple(field for field in FIELDS if field in used)
+    values = ''.join(
+        f'get({field!r}), ' for field in fields if field not in DERIVED
+    )
+    expression = ' + '.join(parts) or repr('')
+    loads = ''.join(
+        f'        {field} = get({field!r})\n'
+        for field in fields if field not in BOUND
+    )
+    code = (
+        f"def render({', '.join(f'{name}=None' for name in FIELDS)}):\n"
+        f"    return {expression}\n"
+        f"def key(get):\n"
+        f"    return ({values})\n"
+        f"def bind(verdict, status):\n"
+        f"    def message(get):\n"
+        f"{loads}"
+        f"        return {expression}\n"
+        f"    message.key = key\n"
+        f"    return message\n"
+    )
+    namespace = {}
+    exec(compile(code, '<template>', 'exec'), namespace)
+    render = namespace['render']
+    render.source = source
+    render.fields = fields
+    render.key = namespace['key']
+    render.bind = namespace['bind']
+    return render
+
+
+class MessageTemplates:
+    """Шаблоны уведомлений по языкам, скомпилированные один раз.
+
+    Каталог языка - это message (общий шаблон), verdicts (вердикт
+    для каждого статуса) и необязательные messages (свой шаблон
+    для статуса). В fields - поля, которые использует хотя бы один
+    шаблон. Неизвестный язык или статус без перевода берутся
+    из default_locale, неизвестный статус даёт KeyError, как
+    HOMEWORK_STATUSES.
+    Готовые сообщения кешируются по языку, статусу и значениям полей,
+    которые использует шаблон (не больше cache_size, первыми
+    вытесняются самые старые), поэтому рассылка одного изменения
+    во много чатов форматирует сообщение один раз на язык. Кеш
+    работает без блокировки (операции OrderedDict атомарны под GIL),
+    счётчики hits и misses при нескольких потоках приблизительные.
+    """
+
+    def __init__(self, catalogs, default_locale='ru', cache_size=4096):
+        self.default_locale = default_locale
+        self.cache_size = cache_size
+        self.templates = {}
+        self.messages = {}
+        for locale, catalog in catalogs.items():
+            message = catalog['message']
+            custom = catalog.get('messages', {})
+            for status, verdict in catalog['verdicts'].items():
+                template = compile_template(custom.get(status, message))
+                self.templates[locale, status] = (template, verdict)
+                self.messages[locale, status] = template.bind(
+                    verdict, status
+                )
+        self.locales = frozenset(catalogs)
+        self.fields = frozenset().union(
+            *(template.fields for template, _ in self.templates.values())
+        )
+        if default_locale not in self.locales:
+            raise ValueError(f'Нет шаблонов для языка {default_locale}')
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+
+    @classmethod
+    def load(cls, directory, base=None, **options):
+        """Каталоги из файлов <язык>.json каталога directory.
+
+        base - каталоги, заданные в коде; файлы их дополняют.
+        """
+        catalogs = dict(base or {})
+        if directory and os.path.isdir(directory):
+            for name in sorted(os.listdir(directory)):
+                locale, extension = os.path.splitext(name)
+                if extension != '.json':
+                    continue
+                path = os.path.join(directory, name)
+                with open(path, encoding='utf-8') as file:
+                    catalogs[locale] = json.load(file)
+                logging.debug(f'Загружены шаблоны языка {locale}')
+        return cls(catalogs, **options)
+
+    def _message(self, locale, status):
+        found = self.messages.get((locale, status))
+        if found is None:
+            found = self.messages.get((self.default_locale, status))
+        if found is None:
+            raise KeyError(status)
+        return found
+
+    def format(self, homework, locale=None):
+        """Сообщение по скомпилированному шаблону, без кеша."""
+        if locale not in self.locales:
+            locale = self.default_locale
+        get = homework.get
+        status = get('status')
+        message = self.messages.get((locale, status))
+        if message is None:
+            message = self._message(locale, status)
+        return message(get)
+
+    def render(self, homework, locale=None):
+        """Сообщение об изменении статуса работы на языке locale."""
+        if locale not in self.locales:
+            locale = self.default_locale
+        get = homework.get
+        status = get('status')
+        message_for = self._message(locale, status)
+        cache_key = (locale, status, message_for.key(get))
+        message = self._cache.get(cache_key)
+        if message is not None:
+            self.hits += 1
+            return message
+        message = message_for(get)
+        self.misses += 1
+        cache = self._cache
+        cache[cache_key] = message
+        if len(cache) > self.cache_size:
+            cache.popitem(last=False)
+        return message
@@ -0,0 +1,490 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+
+from coalescing import CoalescingFetcher
+from diff import StatusDiff, homework_key
+from error_aggregator import ErrorAggregator
+from exceptions import CircuitOpenError, NotShardOwnerError
+from metrics import PipelineMetrics
+from outbox import idempotency_key
+from scheduler import FixedPolicy, Scheduler, current_status
+from schema import rejected
+from timing_wheel import spread_offset
+from state import MemoryStateStore
+from structured_logging import stage_extra
+
+
+def token_digest(token):
+    """Короткий отпечаток токена для логов, ключей и метрик."""
+    return hashlib.sha256(token.encode()).hexdigest()[:12]
+
+
+@dataclass(frozen=True)
+class Subscription:
+    """Подписка: токен Практикума, чат и язык уведомлений."""
+
+    practicum_token: str
+    chat_id: str
+    locale: str = None
+
+    @property
+    def key(self):
+        """Ключ подписки, не раскрывающий токен в логах и на диске."""
+        return f'{token_digest(self.practicum_token)}:{self.chat_id}'
+
+
+@dataclass
+class TenantState:
+    """Состояние опроса одной подписки."""
+
+    timestamp: int
+    statuses: StatusDiff = field(default_factory=StatusDiff)
+    last_change: float = 0.0
+    last_status: str = None
+    unchanged: int = 0
+    errors: int = 0
+    last_response: dict = field(default=None, repr=False)
+
+
+def load_subscriptions(path):
+    """Читаем реестр подписок из JSON-файла.
+
+    Повтор пары токен и чат пропускается, иначе чат получал бы
+    каждое уведомление дважды.
+    """
+    with open(path, encoding='utf-8') as file:
+        data = json.load(file)
+
+    if not isinstance(data, list):
+        logging.error('Реестр подписок не является списком')
+        raise TypeError('Реестр подписок не является списком')
+
+    subscriptions = {}
+    for item in data:
+        try:
+            subscription = Subscription(
+                practicum_token=str(item['practicum_token']),
+                chat_id=str(item['chat_id']),
+                locale=item.get('locale'),
+            )
+        except (KeyError, TypeError) as error:
+            logging.error(f'Некорректная запись в реестре подписок: {error}')
+            raise
+        if subscription.key in subscriptions:
+            logging.warning(
+                f'Повтор подписки {subscription.key} в реестре пропущен'
+            )
+            continue
+        subscriptions[subscription.key] = subscription
+    return list(subscriptions.values())
+
+
+class PollingEngine:
+    """Опрашиваем API Практикума для всех подписок в одном процессе.
+
+    Функции получения ответа, проверки, разбора и отправки передаются
+    снаружи, поэтому движок переиспользует логику из homework.py:
+    fetch(token, timestamp), check(response), parse(homework)
+    и send(chat_id, message). Длительность и исходы fetch, check
+    и parse учитываются в metrics, повторы ошибок подавляет aggregator.
+
+    Подписки с одним токеном Практикума опрашиваются вместе: API
+    вызывается один раз через CoalescingFetcher, а разобранное
+    сообщение рассылается во все чаты токена.
+
+    Если задан outbox, уведомления о статусах не отправляются сразу,
+    а записываются в него и фиксируются до сохранения состояния.
+
+    Если задан shard (sharding.ShardCoordinator), движок опрашивает
+    только токены, аренда которых у этого воркера, и перераспределяет
+    их в rebalance.
+
+    Если задан render(homework, locale), сообщение для подписки
+    строится им на языке подписки вместо parse; кеш готовых
+    сообщений тогда ведёт сам render.
+
+    Если заданы cards (status_cards.StatusCards), уведомления
+    о статусах не отправляются отдельными сообщениями, а правят
+    карточки статусов; отправляет их поток StatusCards.
+    """
+
+    def __init__(self, subscriptions, fetch, check, parse, send, retry_time,
+                 store=None, scheduler=None, metrics=None, aggregator=None,
+                 coalesce_ttl=30.0, outbox=None, shard=None, render=None,
+                 cards=None):
+        self.subscriptions = list(subscriptions)
+        self.by_key = {
+            subscription.key: subscription
+            for subscription in self.subscriptions
+        }
+        self.by_token = {}
+        for subscription in self.subscriptions:
+            self.by_token.setdefault(
+                subscription.practicum_token, []
+            ).append(subscription)
+        self.metrics = metrics if metrics is not None else PipelineMetrics()
+        self.coalescer = CoalescingFetcher(
+            fetch, ttl=coalesce_ttl, metrics=self.metrics
+        )
+        self.fetch = self.metrics.instrument('fetch', self.coalescer)
+        self.check = self.metrics.instrument('check', check)
+        self.parse = self.metrics.instrument('parse', parse)
+        self.render = (
+            self.metrics.instrument('parse', render)
+            if render is not None else None
+        )
+        self.send = send
+        self.retry_time = retry_time
+        self.store = store if store is not None else MemoryStateStore()
+        if scheduler is None:
+            scheduler = Scheduler(FixedPolicy(retry_time))
+        self.scheduler = scheduler
+        if aggregator is None:
+            aggregator = ErrorAggregator()
+        self.aggregator = aggregator
+        self.outbox = outbox
+        self.cards = cards
+        self.shard = shard
+        self.by_shard = {}
+        for subscription in self.subscriptions:
+            self.by_shard.setdefault(
+                token_digest(subscription.practicum_token), []
+            ).append(subscription)
+        self.held = set()
+        self.active = None if shard is None else set()
+        self.loop_lag = 0.0
+        self._lock = threading.Lock()
+        self._rendered = {}
+        now = int(time.time())
+        self.states = {
+            subscription.key: self._restore_state(subscription.key, now)
+            for subscription in self.subscriptions
+        }
+        if cards is not None and shard is None:
+            for subscription in self.subscriptions:
+                cards.restore(subscription.key, subscription.chat_id)
+
+    def _restore_state(self, key, now):
+        self.aggregator.restore(key, self.store.get_error(key))
+        statuses = self.store.statuses(key)
+        return TenantState(
+            timestamp=self.store.get_cursor(key, now),
+            statuses=StatusDiff(statuses),
+            last_change=now,
+            last_status=current_status(statuses),
+        )
+
+    def _advance_cursor(self, key, state, response):
+        current_date = response.get('current_date')
+        if not isinstance(current_date, int):
+            logging.warning(
+                f'[{key}] В ответе API нет current_date',
+                extra=stage_extra(key, 'check'),
+            )
+            return
+        state.timestamp = current_date
+        self.store.set_cursor(key, current_date)
+
+    def poll(self, subscription):
+        """Один цикл опроса для одной подписки."""
+        key = subscription.key
+        state = self.states[key]
+        started = time.perf_counter()
+        try:
+            response = self.fetch(
+                subscription.practicum_token, state.timestamp
+            )
+            if response is state.last_response:
+                state.errors = 0
+                state.unchanged += 1
+                logging.debug(
+                    f'[{key}] Ответ API не изменился',
+                    extra=stage_extra(key, 'fetch', started),
+                )
+                with self._lock:
+                    self._advance_cursor(key, state, response)
+                return
+            homeworks = self.check(response)
+
+            state.errors = 0
+            state.last_response = response
+            with self._lock:
+                if not self._apply(subscription, homeworks, started):
+                    state.unchanged += 1
+                self._advance_cursor(key, state, response)
+
+        except CircuitOpenError as error:
+            logging.debug(
+                f'[{key}] Опрос пропущен: {error}',
+                extra=stage_extra(key, 'fetch', started),
+            )
+        except Exception as error:
+            state.errors += 1
+            self._report_error(subscription, error)
+
+    def _apply(self, subscription, homeworks, started):
+        key = subscription.key
+        state = self.states[key]
+        transitions = state.statuses.changes(homeworks)
+        error = rejected(homeworks)
+        if error is not None:
+            self._report_error(subscription, error)
+        if not transitions:
+            logging.debug(
+                f'[{key}] Статус проверки не изменился',
+                extra=stage_extra(key, 'check', started),
+            )
+            return 0
+        state.last_change = time.time()
+        state.last_status = current_status(
+            state.statuses.statuses, transitions[0].get('status')
+        )
+        state.unchanged = 0
+        for homework in transitions:
+            self.store.set_status(
+                key, homework_key(homework), homework.get('status')
+            )
+            self.notify(subscription, homework)
+        return len(transitions)
+
+    def ingest(self, subscription, response):
+        """Обрабатываем ответ, присланный извне, а не полученный опросом.
+
+        Ответ проверяется тем же check, а изменения сравниваются с тем же
+        состоянием, что и при опросе, поэтому статус, пришедший и push,
+        и опросом, отправляется один раз. Курсор опроса не сдвигается.
+        Возвращает число отправленных изменений; TypeError из check
+        пробрасывается вызывающему. Подписку, аренда которой не у этого
+        воркера, ingest не трогает и выбрасывает NotShardOwnerError:
+        иначе владелец не узнает об изменении и отправит его повторно.
+        """
+        if self.active is not None and subscription.key not in self.active:
+            raise NotShardOwnerError(
+                f'Подписку {subscription.key} обслуживает другой воркер'
+            )
+        started = time.perf_counter()
+        homeworks = self.check(response)
+        with self._lock:
+            changes = self._apply(subscription, homeworks, started)
+            if self.outbox is not None:
+                self.outbox.commit()
+            return changes
+
+    def notify(self, subscription, homework):
+        """Отправляем уведомление об изменении статуса одной работы.
+
+        Сообщение разбирается один раз на пачку опросов и переиспользуется
+        для остальных чатов того же токена.
+        """
+        try:
+            if self.render is not None:
+                message = self.render(homework, subscription.locale)
+            else:
+                message = self._parsed(homework)
+            if self.cards is not None:
+                self.cards.update(
+                    subscription.key, subscription.chat_id,
+                    homework_key(homework), message,
+                )
+            elif self.outbox is not None:
+                self.outbox.append(
+                    idempotency_key(
+                        subscription.key, homework_key(homework), homework,
+                        self.states[subscription.key].timestamp,
+                    ),
+                    subscription.chat_id,
+                    message,
+                )
+            else:
+                self.send(subscription.chat_id, message)
+            self.metrics.notifications.inc()
+        except Exception as error:
+            self._report_error(subscription, error)
+
+    def _parsed(self, homework):
+        rendered = (
+            homework_key(homework),
+            homework.get('status'),
+            homework.get('homework_name'),
+        )
+        message = self._rendered.get(rendered)
+        if message is None:
+            message = self._rendered[rendered] = self.parse(homework)
+        return message
+
+    def _report_error(self, subscription, error):
+        key = subscription.key
+        fingerprint = self.aggregator.report(key, error)
+        if fingerprint is None:
+            logging.debug(
+                f'[{key}] Повтор ошибки не отправляется: {error}',
+                extra=stage_extra(key, 'report'),
+            )
+            return
+        self.store.set_error(key, fingerprint)
+        self._send_error(subscription, f'Сбой в работе программы: {error}')
+
+    def _send_digests(self):
+        for key, digest in self.aggregator.digests():
+            subscription = self.by_key.get(key)
+            if subscription is not None:
+                self._send_error(subscription, digest)
+
+    def _send_error(self, subscription, message):
+        try:
+            self.send(subscription.chat_id, message)
+            logging.info('Сообщение об ошибке отправлено в Телеграм')
+        except Exception as error:
+            logging.error(
+                f'[{subscription.key}] Не удалось отправить ошибку: {error}'
+            )
+
+    def _with_siblings(self, subscriptions):
+        """Дополняем подписки остальными подписками их токенов.
+
+        Внутри токена первой идёт подписка с самым ранним курсором:
+        её ответ покрывает курсоры остальных и берётся из кеша.
+        """
+        ordered = {}
+        for subscription in subscriptions:
+            if self.active is not None and subscription.key not in self.active:
+                continue
+            siblings = self.by_token[subscription.practicum_token]
+            for sibling in sorted(
+                siblings, key=lambda item: self.states[item.key].timestamp
+            ):
+                ordered.setdefault(sibling.key, sibling)
+        return list(ordered.values())
+
+    def _finish_batch(self):
+        self._rendered.clear()
+        self.metrics.update_efficiency()
+        self._send_digests()
+        with self._lock:
+            if self.outbox is not None:
+                self.outbox.commit()
+            self.store.maybe_flush()
+
+    def _release(self, shards):
+        for shard in shards:
+            for subscription in self.by_shard[shard]:
+                self.active.discard(subscription.key)
+                self.scheduler.remove(subscription.key)
+                if self.cards is not None:
+                    self.cards.forget(subscription.key)
+
+    def rebalance(self, now):
+        """Сверяем свою долю токенов с остальными воркерами.
+
+        Токены, ушедшие другому воркеру, снимаются с расписания,
+        их состояние и outbox сбрасываются на диск, и только потом
+        отпускается аренда. Полученные токены перечитывают состояние
+        из общего хранилища и планируются со сдвигом по хешу ключа.
+        """
+        wanted = self.shard.assign(self.by_shard)
+        leaving = self.held - wanted
+        if leaving:
+            self._release(leaving)
+            with self._lock:
+                if self.outbox is not None:
+                    self.outbox.commit()
+                self.store.flush()
+        held = self.shard.claim(wanted)
+        self._release(self.held - held - leaving)
+        acquired = held - self.held
+        window = min(self.retry_time, self.shard.heartbeat_interval)
+        for shard in acquired:
+            for subscription in self.by_shard[shard]:
+                key = subscription.key
+                self.store.reload(key)
+                self.states[key] = self._restore_state(key, int(now))
+                self.active.add(key)
+                if self.cards is not None:
+                    self.cards.restore(key, subscription.chat_id)
+                self.scheduler.add(key, now + spread_offset(key, window))
+        if leaving or acquired:
+            logging.info(
+                f'Шарды: отдано {len(leaving)}, получено {len(acquired)}, '
+                f'обслуживается {len(held)} из {len(self.by_shard)}'
+            )
+        self.held = held
+        return held
+
+    def run_once(self):
+        """Опрашиваем все подписки по одному разу."""
+        for subscription in self._with_siblings(self.subscriptions):
+            self.poll(subscription)
+        self._finish_batch()
+
+    def run_due(self, now):
+        """Опрашиваем подписки, чей срок по расписанию наступил.
+
+        Вместе с подпиской опрашиваются и перепланируются остальные
+        подписки её токена, чтобы они и дальше ходили в API вместе.
+        """
+        due = [
+            self.by_key[key] for key in self.scheduler.pop_due(now)
+            if self.active is None or key in self.active
+        ]
+        for subscription in self._with_siblings(due):
+            key = subscription.key
+            self.poll(subscription)
+            self.scheduler.reschedule(key, self.states[key], time.time())
+        self._finish_batch()
+
+    def schedule_all(self, now, polls_per_second=20):
+        """Планируем первые опросы, равномерно размазывая их по времени.
+
+        Подписки стартуют не одновременно, а со сдвигом по хешу ключа,
+        чтобы не создавать всплеск запросов к ENDPOINT при запуске.
+        """
+        window = min(
+            self.retry_time, len(self.subscriptions) / polls_per_second
+        )
+        for subscription in self.subscriptions:
+            key = subscription.key
+            self.scheduler.add(key, now + spread_offset(key, window))
+
+    def _next_time(self, next_heartbeat):
+        next_time = self.scheduler.next_time()
+        if next_time is None:
+            next_time = time.time() + self.retry_time
+        if self.shard is not None:
+            next_time = min(next_time, next_heartbeat)
+        return next_time
+
+    def run_forever(self):
+        """Опрашиваем подписки по расписанию планировщика."""
+        next_heartbeat = time.time()
+        if self.shard is None:
+            self.schedule_all(time.time())
+        try:
+            while True:
+                if self.shard is not None and time.time() >= next_heartbeat:
+                    self.rebalance(time.time())
+                    next_heartbeat = (
+                        time.time() + self.shard.heartbeat_interval
+                    )
+                started = time.perf_counter()
+                self.run_due(time.time())
+                self.metrics.loop_iteration.observe(
+                    time.perf_counter() - started
+                )
+                next_time = self._next_time(next_heartbeat)
+                time.sleep(max(0.0, next_time - time.time()))
+                self.loop_lag = max(0.0, time.time() - next_time)
+                self.metrics.sleep_drift.observe(self.loop_lag)
+                if self.loop_lag > 1:
+                    logging.warning(
+                        f'Цикл опроса отстаёт на {self.loop_lag:.1f} с'
+                    )
+        finally:
+            if self.outbox is not None:
+                self.outbox.commit()
+            self.store.close()
+            if self.shard is not None:
+                self.shard.leave()
@@ -0,0 +1,32 @@
+import pytest
+
+import homework
+from tenants import PollingEngine, Subscription
+
+
+@pytest.fixture
+def make_engine():
+    """Фабрика PollingEngine: тест передает только отличающиеся аргументы.
+
+    По умолчанию один подписчик ('token', '1'), штатные check/parse и
+    retry_time=0. Если передан список sent, в него складываются тексты
+    отправленных сообщений.
+    """
+    def factory(fetch, subscriptions=None, sent=None, **options):
+        if subscriptions is None:
+            subscriptions = [Subscription('token', '1')]
+
+        def send(chat_id, message):
+            if sent is not None:
+                sent.append(message)
+
+        defaults = {
+            'check': homework.check_response,
+            'parse': homework.parse_status,
+            'send': send,
+            'retry_time': 0,
+        }
+        return PollingEngine(
+            subscriptions, fetch=fetch, **{**defaults, **options}
+        )
+    return factory
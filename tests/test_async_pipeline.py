@@ -0,0 +1,137 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip('aiohttp')
+
+import homework  # noqa: E402
+from async_pipeline import AsyncPipeline  # noqa: E402
+from benchmarks.mock_api import MockPracticumServer  # noqa: E402
+from benchmarks.mock_telegram import MockTelegramServer  # noqa: E402
+from state import MemoryStateStore  # noqa: E402
+from tenants import Subscription  # noqa: E402
+
+
+class TestAsyncPipeline:
+
+    def run_pipeline(self, api_url, telegram_url, subscriptions, rounds=1,
+                     **options):
+        pipeline = AsyncPipeline(
+            subscriptions,
+            endpoint=api_url,
+            telegram_token='1234:abcdefg',
+            check=homework.check_response,
+            parse=homework.parse_status,
+            retry_time=0,
+            telegram_url=telegram_url,
+            **options,
+        )
+
+        async def scenario():
+            await pipeline.start()
+            try:
+                for _ in range(rounds):
+                    await pipeline.run_once()
+            finally:
+                await pipeline.stop()
+
+        asyncio.run(scenario())
+        return pipeline
+
+    def test_status_sent_once_per_chat(self):
+        subscriptions = [
+            Subscription(f'token-{number}', str(number))
+            for number in range(5)
+        ]
+        with MockPracticumServer() as api, MockTelegramServer() as telegram:
+            self.run_pipeline(api.url, telegram.url, subscriptions, rounds=3)
+
+        chats = sorted(message['chat_id'] for message in telegram.messages)
+        assert chats == [str(number) for number in range(5)], (
+            'Проверьте, что каждый чат получает статус ровно один раз'
+        )
+        assert telegram.messages[0]['text'] == homework.parse_status(
+            api.homeworks(0)[0]
+        ), (
+            'Проверьте, что асинхронный режим использует parse_status'
+        )
+
+    def test_api_error_reported_once(self):
+        subscriptions = [Subscription('token', '1')]
+        with MockPracticumServer() as api, MockTelegramServer() as telegram:
+            url = api.url.replace('homework_statuses', 'missing')
+            self.run_pipeline(url, telegram.url, subscriptions, rounds=3)
+
+        assert len(telegram.messages) == 1, (
+            'Проверьте, что одинаковая ошибка отправляется один раз'
+        )
+        assert telegram.messages[0]['text'].startswith('Сбой в работе'), (
+            'Проверьте, что сбой API попадает в сообщение об ошибке'
+        )
+
+    def test_retry_after_429(self):
+        subscriptions = [
+            Subscription(f'token-{number}', '1') for number in range(2)
+        ]
+        with MockPracticumServer() as api, MockTelegramServer(
+            chat_rate=1
+        ) as telegram:
+            self.run_pipeline(
+                api.url, telegram.url, subscriptions, chat_rate=100
+            )
+
+        assert telegram.rejected >= 1, (
+            'Проверьте, что тест упирается в лимит сервера'
+        )
+        assert len(telegram.messages) == 2, (
+            'Проверьте, что после ответа 429 сообщение отправляется снова'
+        )
+
+    def test_chat_rate_limited(self):
+        subscriptions = [
+            Subscription(f'token-{number}', '1') for number in range(3)
+        ]
+        with MockPracticumServer() as api, MockTelegramServer(
+            chat_rate=20
+        ) as telegram:
+            self.run_pipeline(
+                api.url, telegram.url, subscriptions, chat_rate=10
+            )
+
+        assert telegram.rejected == 0, (
+            'Проверьте, что отправка соблюдает лимит сообщений на чат'
+        )
+        assert len(telegram.messages) == 3, (
+            'Проверьте, что все сообщения доставлены'
+        )
+
+    def test_failed_send_not_lost(self):
+        subscriptions = [Subscription('token', '1')]
+        store = MemoryStateStore()
+        with MockPracticumServer() as api:
+            with MockTelegramServer(error_rate=1.0) as telegram:
+                self.run_pipeline(
+                    api.url, telegram.url, subscriptions, store=store
+                )
+            assert telegram.messages == [], (
+                'Проверьте, что сервер отклонил сообщение'
+            )
+            key = subscriptions[0].key
+            assert store.statuses(key) == {}, (
+                'Проверьте, что статус не записывается до отправки'
+            )
+            assert store.get_cursor(key) is None, (
+                'Проверьте, что курсор не сдвигается до отправки'
+            )
+            with MockTelegramServer() as telegram:
+                self.run_pipeline(
+                    api.url, telegram.url, subscriptions, store=store
+                )
+
+        assert len(telegram.messages) == 1, (
+            'Проверьте, что неотправленное уведомление отправляется '
+            'при следующем опросе'
+        )
+        assert store.get_cursor(key) is not None, (
+            'Проверьте, что курсор сдвигается после доставки'
+        )
@@ -0,0 +1,54 @@
+import json
+import random
+
+from benchmarks import bench_adaptive, suite
+from scheduler import AdaptivePolicy, FixedPolicy, Scheduler
+
+
+class TestBenchmarkSuite:
+
+    def test_suite_runs_offline(self, tmp_path):
+        output = tmp_path / 'result.json'
+        code = suite.main([
+            '--tenants', '5',
+            '--rounds', '2',
+            '--homeworks', '3',
+            '--api-error-rate', '0.1',
+            '--json', str(output),
+            '--min-polls-per-second', '1',
+            '--min-sends-per-second', '1',
+        ])
+        assert code == 0
+
+        result = json.loads(output.read_text())
+        assert result['polls'] == 10
+        assert result['delivered'] == result['sends'] > 0
+        for key in ('poll_p50_ms', 'poll_p99_ms', 'send_p99_ms', 'rss_mb'):
+            assert result[key] > 0
+
+    def test_threshold_failure(self):
+        code = suite.main([
+            '--tenants', '1',
+            '--rounds', '1',
+            '--min-polls-per-second', '1000000000',
+        ])
+        assert code == 1
+
+
+class TestAdaptiveReplay:
+
+    def test_replay_runs(self):
+        rng = random.Random(0)
+        traces = {
+            str(number): bench_adaptive.make_trace(rng, 2, active=True)
+            for number in range(3)
+        }
+        for policy in (FixedPolicy(600), AdaptivePolicy(rng=rng)):
+            calls, latencies, missed = bench_adaptive.simulate(
+                traces, 2, Scheduler(policy, start=0)
+            )
+            assert calls > 0
+            assert latencies, (
+                'Проверьте, что симулятор находит изменения статусов'
+            )
+            assert missed >= 0
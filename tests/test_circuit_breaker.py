@@ -0,0 +1,147 @@
+import itertools
+
+from circuit_breaker import (CLOSED, HALF_OPEN, OPEN, ApiCircuitBreakers,
+                             CircuitBreaker)
+from exceptions import ApiStatusError
+from metrics import PipelineMetrics
+from tenants import Subscription
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCircuitBreaker:
+
+    def test_states(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(
+            'api', failure_threshold=2, reset_timeout=10, clock=clock
+        )
+        breaker.record_failure()
+        assert breaker.allow() and breaker.state == CLOSED
+        breaker.record_failure()
+        assert breaker.state == OPEN
+        assert not breaker.allow(), (
+            'Проверьте, что разомкнутая цепь не пропускает запросы'
+        )
+
+        clock.now = 10
+        assert breaker.allow() and breaker.state == HALF_OPEN
+        assert not breaker.allow(), (
+            'Проверьте, что в полуоткрытом состоянии проходит один запрос'
+        )
+        breaker.record_failure()
+        assert breaker.state == OPEN and not breaker.allow()
+
+        clock.now = 20
+        assert breaker.allow()
+        breaker.record_success()
+        assert breaker.state == CLOSED and breaker.failures == 0
+
+
+class TestApiCircuitBreakers:
+
+    def subscriptions(self, count=10):
+        return [Subscription(f'token-{number}', str(number))
+                for number in range(count)]
+
+    def test_global_circuit_stops_requests(self, make_engine):
+        clock = FakeClock()
+        calls = itertools.count()
+        alerts = []
+        metrics = PipelineMetrics()
+        available = False
+
+        def fetch(token, timestamp):
+            next(calls)
+            if not available:
+                raise ConnectionError('API не отвечает на запрос')
+            return {'homeworks': [], 'current_date': 1}
+
+        breakers = ApiCircuitBreakers(
+            failure_threshold=100, global_threshold=5,
+            global_reset_timeout=60, metrics=metrics,
+            alert=alerts.append, clock=clock,
+        )
+        engine = make_engine(breakers.wrap(fetch), self.subscriptions())
+        for _ in range(10):
+            engine.run_once()
+
+        assert next(calls) == 5, (
+            'Проверьте, что после размыкания цепи запросы к API не идут'
+        )
+        assert len(alerts) == 1, (
+            'Проверьте, что о размыкании цепи приходит одно оповещение'
+        )
+        assert all(state.errors <= 1 for state in engine.states.values())
+
+        available = True
+        clock.now = 60
+        engine.run_once()
+        assert breakers.global_breaker.state == CLOSED
+        assert len(alerts) == 2
+        transitions = metrics.registry.render()
+        assert (
+            'homework_circuit_transitions_total{scope="global",state="open"} 1'
+        ) in transitions
+
+    def test_tenant_circuit_isolated(self, make_engine):
+        clock = FakeClock()
+        requested = []
+
+        def fetch(token, timestamp):
+            requested.append(token)
+            if token == 'token-0':
+                raise ConnectionError('API не отвечает на запрос')
+            return {'homeworks': [], 'current_date': 1}
+
+        breakers = ApiCircuitBreakers(
+            failure_threshold=3, global_threshold=5, clock=clock
+        )
+        engine = make_engine(breakers.wrap(fetch), self.subscriptions(3))
+        for _ in range(10):
+            engine.run_once()
+
+        assert requested.count('token-0') == 3, (
+            'Проверьте, что цепь подписки отключает только её опросы'
+        )
+        assert requested.count('token-1') == 10
+        assert breakers.global_breaker.state == CLOSED
+
+    def test_auth_errors_stay_in_tenant(self, make_engine):
+        clock = FakeClock()
+        requested = []
+
+        def fetch(token, timestamp):
+            requested.append(token)
+            if token != 'token-9':
+                raise ApiStatusError('API не отвечает на запрос', 401)
+            return {'homeworks': [], 'current_date': 1}
+
+        breakers = ApiCircuitBreakers(
+            failure_threshold=2, global_threshold=3, clock=clock
+        )
+        engine = make_engine(breakers.wrap(fetch), self.subscriptions())
+        for _ in range(3):
+            engine.run_once()
+
+        assert breakers.global_breaker.state == CLOSED, (
+            'Проверьте, что ответы 401/403 не размыкают глобальную цепь'
+        )
+        assert requested.count('token-0') == 2
+        assert requested.count('token-9') == 3
+
+    def test_server_errors_open_global(self):
+        breakers = ApiCircuitBreakers(
+            failure_threshold=100, global_threshold=2, clock=FakeClock()
+        )
+        for status in (503, 429):
+            breakers.allow('key')
+            breakers.record('key', ApiStatusError('Сбой', status))
+        assert breakers.global_breaker.state == OPEN
@@ -0,0 +1,101 @@
+import threading
+import time
+
+import homework
+from coalescing import CoalescingFetcher
+from metrics import PipelineMetrics
+from tenants import Subscription
+
+
+class TestCoalescingFetcher:
+
+    def test_single_flight(self):
+        calls = []
+        release = threading.Event()
+
+        def fetch(token, timestamp):
+            calls.append(timestamp)
+            release.wait(5)
+            return {'homeworks': [], 'current_date': 100}
+
+        fetcher = CoalescingFetcher(fetch, ttl=0)
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(fetcher('token', 10))
+            )
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.1)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        assert len(calls) == 1, (
+            'Проверьте, что одновременные запросы по токену объединяются'
+        )
+        assert len(results) == 5 and all(
+            result is results[0] for result in results
+        )
+
+    def test_cache_covers_cursor(self):
+        calls = []
+
+        def fetch(token, timestamp):
+            calls.append(timestamp)
+            return {'homeworks': [], 'current_date': 100}
+
+        fetcher = CoalescingFetcher(fetch, ttl=30)
+        fetcher('token', 10)
+        fetcher('token', 50)
+        assert calls == [10], (
+            'Проверьте, что свежий ответ переиспользуется для курсора, '
+            'который он покрывает'
+        )
+        fetcher('token', 5)
+        fetcher('token', 100)
+        assert calls == [10, 5, 100], (
+            'Проверьте, что ответ не отдаётся курсору раньше from_date '
+            'и подписке, которая его уже видела'
+        )
+
+
+class TestEngineFanOut:
+
+    def test_one_call_for_shared_token(self, make_engine):
+        api_calls = []
+        parsed = []
+        sent = []
+
+        def fetch(token, timestamp):
+            api_calls.append(token)
+            return {
+                'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+                'current_date': timestamp + 600,
+            }
+
+        def parse(homework_item):
+            parsed.append(homework_item)
+            return homework.parse_status(homework_item)
+
+        metrics = PipelineMetrics()
+        engine = make_engine(
+            fetch,
+            [Subscription('shared', str(chat)) for chat in range(3)]
+            + [Subscription('own', '9')],
+            parse=parse,
+            send=lambda chat_id, message: sent.append(chat_id),
+            metrics=metrics,
+        )
+        engine.run_once()
+
+        assert sorted(api_calls) == ['own', 'shared'], (
+            'Проверьте, что чаты одного токена вызывают API один раз'
+        )
+        assert sorted(sent) == ['0', '1', '2', '9']
+        assert len(parsed) == 1, (
+            'Проверьте, что одно разобранное сообщение рассылается всем чатам'
+        )
+        assert metrics.calls_per_notification.value == 0.5
@@ -0,0 +1,64 @@
+import functools
+import itertools
+
+import homework
+from benchmarks.mock_api import MockPracticumServer
+from http_client import ApiClient
+from state import SQLiteStateStore
+from tenants import Subscription
+
+
+class TestCursor:
+    ITERATIONS = 2000
+
+    def fetch(self, client):
+        return functools.partial(
+            homework.request_homework_statuses, session=client
+        )
+
+    def test_payload_stays_flat(self, monkeypatch, make_engine):
+        clock = itertools.count(1)
+        client = ApiClient()
+        sent = []
+        with MockPracticumServer(
+            homeworks_count=0, clock=lambda: next(clock)
+        ) as server:
+            monkeypatch.setattr(homework, 'ENDPOINT', server.url)
+            engine = make_engine(self.fetch(client), sent=sent)
+            engine.states[Subscription('token', '1').key].timestamp = 1
+            for number in range(self.ITERATIONS):
+                status = ('reviewing', 'approved')[number % 2]
+                server.add_update(
+                    {'homework_name': 'hw', 'status': status},
+                    updated_at=number + 1,
+                )
+                engine.run_once()
+        client.close()
+
+        sizes = server.body_sizes
+        assert len(sizes) == self.ITERATIONS
+        assert max(sizes) <= 2 * min(sizes[1:]), (
+            'Проверьте, что from_date сдвигается на current_date '
+            'и размер ответа не растёт'
+        )
+        assert len(sent) == self.ITERATIONS, (
+            'Проверьте, что каждое изменение статуса доставлено'
+        )
+
+    def test_cursor_survives_restart(
+        self, monkeypatch, tmp_path, make_engine
+    ):
+        path = tmp_path / 'state.db'
+        client = ApiClient()
+        store = SQLiteStateStore(path)
+        with MockPracticumServer(clock=lambda: 1000) as server:
+            monkeypatch.setattr(homework, 'ENDPOINT', server.url)
+            make_engine(self.fetch(client), store=store).run_once()
+        client.close()
+        store.close()
+
+        engine = make_engine(None, store=SQLiteStateStore(path))
+        key = Subscription('token', '1').key
+        assert engine.states[key].timestamp == 1000, (
+            'Проверьте, что курсор восстанавливается после перезапуска'
+        )
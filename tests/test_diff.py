@@ -0,0 +1,66 @@
+from diff import StatusDiff
+
+
+def make_homeworks(count, status='reviewing'):
+    return [
+        {'id': number, 'homework_name': f'hw{number}', 'status': status}
+        for number in range(count)
+    ]
+
+
+class TestStatusDiff:
+
+    def test_every_homework_checked(self):
+        diff = StatusDiff()
+        homeworks = make_homeworks(3)
+        assert len(diff.changes(homeworks)) == 3
+
+        homeworks[2]['status'] = 'approved'
+        transitions = diff.changes(homeworks)
+        assert [hw['id'] for hw in transitions] == [2], (
+            'Проверьте, что изменение статуса не первой работы '
+            'в ответе тоже находится'
+        )
+        assert diff.changes(homeworks) == [], (
+            'Проверьте, что без изменений уведомления не создаются'
+        )
+
+    def test_key_falls_back_to_name(self):
+        diff = StatusDiff()
+        diff.changes([{'homework_name': 'hw', 'status': 'reviewing'}])
+        transitions = diff.changes(
+            [{'homework_name': 'hw', 'status': 'approved'}]
+        )
+        assert len(transitions) == 1
+        assert len(diff) == 1
+
+    def test_large_batch(self):
+        diff = StatusDiff()
+        homeworks = make_homeworks(100000)
+        diff.changes(homeworks)
+        for number in (0, 500, 99999):
+            homeworks[number]['status'] = 'approved'
+        transitions = diff.changes(homeworks)
+        assert [hw['id'] for hw in transitions] == [0, 500, 99999]
+
+    def test_engine_sends_each_transition(self, make_engine):
+        responses = [
+            {'homeworks': make_homeworks(3), 'current_date': 1},
+            {
+                'homeworks': [
+                    {'id': 1, 'homework_name': 'hw1', 'status': 'approved'},
+                    {'id': 2, 'homework_name': 'hw2', 'status': 'rejected'},
+                ],
+                'current_date': 2,
+            },
+        ]
+        sent = []
+        engine = make_engine(
+            lambda token, timestamp: responses.pop(0), sent=sent
+        )
+        engine.run_once()
+        engine.run_once()
+
+        assert len(sent) == 5
+        assert sent[-2].startswith('Изменился статус проверки работы "hw1"')
+        assert sent[-1].startswith('Изменился статус проверки работы "hw2"')
@@ -0,0 +1,102 @@
+from error_aggregator import (
+    ErrorAggregator, describe_period, fingerprint, normalize_message,
+)
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def raise_connection_error(address):
+    raise ConnectionError(f'Ошибка доступа к сайту: {address} timed out')
+
+
+def capture(function, *args):
+    try:
+        function(*args)
+    except Exception as error:
+        return error
+
+
+class TestFingerprint:
+
+    def test_volatile_parts_ignored(self):
+        first = capture(raise_connection_error, '10.0.0.1:443 at 0x7f01')
+        second = capture(raise_connection_error, '10.0.0.2:8443 at 0x7f99')
+        assert fingerprint(first) == fingerprint(second), (
+            'Проверьте, что адреса и числа не меняют отпечаток ошибки'
+        )
+        assert fingerprint(first).startswith(
+            'ConnectionError:raise_connection_error:'
+        )
+        assert normalize_message('at 2021-11-01T10:00:00Z') == 'at #'
+
+    def test_type_distinguishes(self):
+        assert fingerprint(TypeError('boom')) != fingerprint(
+            ValueError('boom')
+        )
+
+
+class TestDescribePeriod:
+
+    def test_whole_hours_without_fraction(self):
+        assert describe_period(7200.0) == 'за последние 2 ч', (
+            'Проверьте, что целые часы пишутся без дробной части'
+        )
+        assert describe_period(3600.0) == 'за последний час'
+        assert describe_period(1800.0) == 'за последние 30 мин'
+
+
+class TestErrorAggregator:
+
+    def test_flapping_suppressed_and_digested(self):
+        clock = FakeClock()
+        aggregator = ErrorAggregator(
+            window=3600, digest_interval=3600, clock=clock
+        )
+        sent = []
+        for step in range(40):
+            clock.now = step * 60
+            error = ConnectionError(f'refused 10.0.0.{step}')
+            if step % 2:
+                error = TypeError('Ответ API не является словарем')
+            if aggregator.report('tenant', error):
+                sent.append(type(error).__name__)
+
+        assert sent == ['ConnectionError', 'TypeError'], (
+            'Проверьте, что чередование ошибок A/B не вызывает повторных '
+            'уведомлений внутри окна'
+        )
+        assert aggregator.digests() == []
+        clock.now = 3600
+        [(tenant, digest)] = aggregator.digests()
+        assert tenant == 'tenant'
+        assert 'ConnectionError ×20 за последний час' in digest
+        assert 'TypeError ×20 за последний час' in digest
+
+    def test_engine_restart_keeps_suppression(self, make_engine):
+        clock = FakeClock()
+        sent = []
+
+        def fetch(token, timestamp):
+            raise ConnectionError('Ошибка доступа к сайту')
+
+        def start(store=None):
+            return make_engine(
+                fetch, sent=sent, store=store,
+                aggregator=ErrorAggregator(clock=clock),
+            )
+
+        engine = start()
+        engine.run_once()
+        engine.run_once()
+        assert len(sent) == 1
+        start(engine.store).run_once()
+        assert len(sent) == 1, (
+            'Проверьте, что после перезапуска та же ошибка не отправляется'
+        )
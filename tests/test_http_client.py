@@ -0,0 +1,131 @@
+import functools
+
+import homework
+from benchmarks.mock_api import MockPracticumServer
+from http_client import ApiClient
+
+
+class TestApiClient:
+
+    def test_connections_reused(self, monkeypatch):
+        client = ApiClient()
+        with MockPracticumServer() as server:
+            monkeypatch.setattr(homework, 'ENDPOINT', server.url)
+            for _ in range(20):
+                homework.request_homework_statuses('token', 0, client)
+        stats = client.stats()
+        client.close()
+
+        assert stats['requests'] == 20
+        assert stats['connections'] == 1, (
+            'Проверьте, что сессия переиспользует keep-alive соединение'
+        )
+        assert stats['reuse_rate'] > 0.9
+
+    def test_retry_on_server_error(self, monkeypatch):
+        client = ApiClient(retries=2, backoff_factor=0)
+        with MockPracticumServer(failures=2) as server:
+            monkeypatch.setattr(homework, 'ENDPOINT', server.url)
+            response = homework.request_homework_statuses('token', 0, client)
+        client.close()
+
+        assert 'homeworks' in response, (
+            'Проверьте, что ответы 5xx повторяются перед ошибкой'
+        )
+        assert server.requests_count == 3
+
+    def test_retries_exhausted(self, monkeypatch):
+        client = ApiClient(retries=1, backoff_factor=0)
+        with MockPracticumServer(failures=5) as server:
+            monkeypatch.setattr(homework, 'ENDPOINT', server.url)
+            try:
+                homework.request_homework_statuses('token', 0, client)
+            except ConnectionError:
+                pass
+            else:
+                assert False, (
+                    'Проверьте, что после исчерпания повторов '
+                    'выбрасывается ConnectionError'
+                )
+        client.close()
+
+
+class TestConditionalRequests:
+
+    def poll(self, make_engine, client, times):
+        sent = []
+        parsed = []
+
+        def check(response):
+            parsed.append(response)
+            return homework.check_response(response)
+
+        engine = make_engine(
+            functools.partial(
+                homework.request_homework_statuses, session=client
+            ),
+            sent=sent, check=check,
+        )
+        for _ in range(times):
+            engine.run_once()
+        return sent, parsed
+
+    def test_not_modified_skips_parsing(self, monkeypatch, make_engine):
+        client = ApiClient()
+        with MockPracticumServer(
+            homeworks_count=50, clock=lambda: 1000, conditional=True
+        ) as server:
+            monkeypatch.setattr(homework, 'ENDPOINT', server.url)
+            sent, parsed = self.poll(make_engine, client, 10)
+        stats = client.stats()
+        client.close()
+
+        assert stats['not_modified'] >= 8, (
+            'Проверьте, что повторный запрос отправляется с If-None-Match'
+        )
+        assert len(parsed) == 1, (
+            'Проверьте, что на ответ 304 check_response не вызывается'
+        )
+        assert len(sent) == 50
+        assert sum(server.body_sizes) < 3 * server.body_sizes[0], (
+            'Проверьте, что на ответ 304 тело не передаётся'
+        )
+
+    def test_unchanged_body_reused(self, monkeypatch, make_engine):
+        client = ApiClient()
+        with MockPracticumServer(
+            homeworks_count=50, clock=lambda: 1000
+        ) as server:
+            monkeypatch.setattr(homework, 'ENDPOINT', server.url)
+            sent, parsed = self.poll(make_engine, client, 10)
+        stats = client.stats()
+        client.close()
+
+        assert stats['changed'] == 1 and stats['unchanged'] == 9, (
+            'Проверьте, что тело с прежним хешем не разбирается заново'
+        )
+        assert len(parsed) == 1
+
+    def test_moving_current_date(self, monkeypatch, make_engine):
+        client = ApiClient()
+        clock = iter(range(1000, 2000))
+        with MockPracticumServer(
+            homeworks_count=50, clock=lambda: next(clock), conditional=True,
+            compress=True,
+        ) as server:
+            monkeypatch.setattr(homework, 'ENDPOINT', server.url)
+            sent, parsed = self.poll(make_engine, client, 10)
+        stats = client.stats()
+        client.close()
+
+        assert stats['changed'] == 1 and stats['unchanged'] == 9, (
+            'Проверьте, что смена current_date и from_date не считается '
+            'изменением списка работ'
+        )
+        assert len(parsed) == 1 and len(sent) == 50
+        assert parsed[0]['current_date'] == 1009, (
+            'Проверьте, что курсор опроса сдвигается и без разбора ответа'
+        )
+        assert stats['bytes_received'] == sum(server.body_sizes), (
+            'Проверьте, что bytes_received считает сжатые байты из сети'
+        )
@@ -0,0 +1,43 @@
+import os
+import subprocess
+import sys
+import types
+
+import pytest
+
+from lazy_imports import lazy_import
+
+
+class TestLazyImport:
+
+    def test_loaded_on_first_access(self, monkeypatch):
+        monkeypatch.delitem(sys.modules, 'colorsys', raising=False)
+        module = lazy_import('colorsys', enabled=True)
+        assert type(module) is not types.ModuleType, (
+            'Проверьте, что в режиме fast_start модуль не выполняется сразу'
+        )
+        assert module.rgb_to_hsv(1, 0, 0) == (0, 1, 1)
+        assert type(module) is types.ModuleType
+        assert sys.modules['colorsys'] is module
+
+    def test_missing_module(self):
+        with pytest.raises(ModuleNotFoundError):
+            lazy_import('no_such_module_here', enabled=True)
+
+    def test_fast_start_defers_heavy_imports(self):
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        code = (
+            'import sys, homework; '
+            'print(" ".join(name for name in '
+            '("telegram.bot", "aiohttp", "requests.sessions") '
+            'if name in sys.modules))'
+        )
+        output = subprocess.run(
+            [sys.executable, '-c', code],
+            cwd=root, env=dict(os.environ, fast_start='1'),
+            check=True, capture_output=True, text=True,
+        ).stdout
+        assert output.strip() == '', (
+            'Проверьте, что в режиме fast_start импорт homework не загружает '
+            'telegram, aiohttp и requests'
+        )
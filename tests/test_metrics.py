@@ -0,0 +1,118 @@
+import threading
+import urllib.request
+
+import homework
+from exceptions import HomeworkStatusError
+from http_client import ApiClient
+from metrics import MetricsServer, PipelineMetrics, Registry
+from sender import SendQueue
+
+
+class TestRegistry:
+
+    def test_counter_across_threads(self):
+        counter = Registry().counter('calls_total', 'Вызовы')
+
+        def work():
+            for _ in range(1000):
+                counter.inc()
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert counter.value == 4000, (
+            'Проверьте, что инкременты из разных потоков не теряются'
+        )
+
+    def test_histogram_exposition(self):
+        registry = Registry()
+        histogram = registry.histogram(
+            'latency_seconds', 'Задержка', labels=('stage',),
+            buckets=(0.1, 1.0),
+        )
+        for value in (0.05, 0.5, 0.5, 5):
+            histogram.labels('fetch').observe(value)
+        text = registry.render()
+
+        assert '# TYPE latency_seconds histogram' in text
+        assert 'latency_seconds_bucket{stage="fetch",le="0.1"} 1' in text
+        assert 'latency_seconds_bucket{stage="fetch",le="1"} 3' in text
+        assert 'latency_seconds_bucket{stage="fetch",le="+Inf"} 4' in text, (
+            'Проверьте, что корзины гистограммы накопительные'
+        )
+        assert 'latency_seconds_count{stage="fetch"} 4' in text
+
+
+class TestPipelineMetrics:
+
+    def test_engine_stages(self, make_engine):
+        metrics = PipelineMetrics()
+        responses = iter([
+            ConnectionError('API не отвечает на запрос'),
+            {'homeworks': [{'homework_name': 'hw', 'status': 'approved'}]},
+            {'homeworks': [{'homework_name': 'hw'}]},
+        ])
+
+        def fetch(token, timestamp):
+            response = next(responses)
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+        engine = make_engine(fetch, metrics=metrics)
+        for _ in range(3):
+            engine.run_once()
+
+        outcomes = metrics.outcomes
+        assert outcomes.labels('fetch', 'ConnectionError').value == 1
+        assert outcomes.labels('fetch', 'ok').value == 2
+        assert outcomes.labels('parse', 'ok').value == 1
+        assert outcomes.labels(
+            'parse', HomeworkStatusError.__name__
+        ).value == 1, 'Проверьте, что исходы стадий считаются по типу ошибки'
+        assert metrics.stage_latency.labels('check').count == 2
+
+    def test_metrics_endpoint(self):
+        metrics = PipelineMetrics()
+        metrics.observe('send', 0.02, 'TelegramError')
+        server = MetricsServer(metrics.registry, '127.0.0.1', 0).start()
+        host, port = server.server_address[:2]
+        try:
+            with urllib.request.urlopen(
+                f'http://{host}:{port}/metrics'
+            ) as response:
+                body = response.read().decode()
+        finally:
+            server.stop()
+
+        assert (
+            'homework_stage_outcomes_total'
+            '{stage="send",outcome="TelegramError"} 1'
+        ) in body, 'Проверьте, что /metrics отдаёт счётчики исходов'
+        assert 'homework_loop_sleep_drift_seconds_count 0' in body
+
+    def test_send_queue_and_api_client(self):
+        metrics = PipelineMetrics()
+        queue = SendQueue(send=lambda chat_id, message: None)
+        client = ApiClient()
+        metrics.track_send_queue(queue)
+        metrics.track_api_client(client)
+        queue.put('1', 'первое')
+        queue.put('2', 'второе')
+        assert 'homework_send_queue_depth 2' in metrics.registry.render(), (
+            'Проверьте, что /metrics показывает глубину очереди отправки'
+        )
+        queue.start()
+        queue.join(timeout=10)
+        queue.stop()
+        client.close()
+        text = metrics.registry.render()
+        assert 'homework_send_queue_depth 0' in text
+        assert (
+            'homework_send_queue_messages_total{outcome="sent"} 2'
+        ) in text, 'Проверьте, что /metrics показывает отправленные сообщения'
+        assert 'homework_api_connection_reuse_ratio 0' in text
+        assert 'homework_api_bytes_received_total 0' in text
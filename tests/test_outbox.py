@@ -0,0 +1,126 @@
+import homework
+from outbox import DEAD, PENDING, SENT, Outbox, idempotency_key
+from state import SQLiteStateStore
+
+
+def fetch(token, timestamp):
+    return {
+        'homeworks': [{
+            'homework_name': 'hw', 'status': 'approved', 'date_updated': 'x'
+        }],
+        'current_date': timestamp + 600,
+    }
+
+
+class Recorder:
+
+    def __init__(self, delivered=True):
+        self.delivered = delivered
+        self.sent = []
+
+    def __call__(self, chat_id, message, callback):
+        self.sent.append((chat_id, message))
+        callback(self.delivered)
+
+
+class TestOutbox:
+
+    def test_duplicates_ignored(self, tmp_path):
+        outbox = Outbox(str(tmp_path / 'outbox.db'), send=Recorder())
+        outbox.append('key', 1, 'Первое')
+        outbox.append('key', 1, 'Повтор')
+        assert outbox.commit() == 1, (
+            'Проверьте, что запись с тем же ключом не добавляется повторно'
+        )
+        outbox.append('key', 1, 'После commit')
+        assert outbox.commit() == 0
+        assert outbox.stats()[PENDING] == 1
+
+    def test_group_commit(self, tmp_path):
+        path = str(tmp_path / 'outbox.db')
+        outbox = Outbox(path, send=Recorder())
+        for number in range(3):
+            outbox.append(f'key-{number}', 1, 'Сообщение')
+        assert outbox.stats()[PENDING] == 0, (
+            'Проверьте, что append только накапливает записи до commit'
+        )
+        outbox.commit()
+        assert Outbox(path, send=Recorder()).stats()[PENDING] == 3
+
+    def test_crash_before_delivery(self, tmp_path, make_engine):
+        outbox_path = str(tmp_path / 'outbox.db')
+        state_path = str(tmp_path / 'state.db')
+
+        def start_engine(outbox):
+            return make_engine(
+                fetch,
+                store=SQLiteStateStore(state_path, flush_interval=3600),
+                outbox=outbox,
+            )
+
+        crashed = Outbox(outbox_path, send=Recorder())
+        start_engine(crashed).run_once()
+        crashed.connection.close()
+
+        recorder = Recorder()
+        outbox = Outbox(outbox_path, send=recorder)
+        start_engine(outbox).run_once()
+        assert outbox.stats()[PENDING] == 1, (
+            'Проверьте, что изменение, найденное заново после перезапуска, '
+            'не дублируется в outbox'
+        )
+        outbox.deliver_once()
+        outbox.deliver_once()
+        assert recorder.sent == [('1', homework.parse_status(
+            fetch('token', 0)['homeworks'][0]
+        ))], (
+            'Проверьте, что уведомление, не доставленное до сбоя, '
+            'отправляется после перезапуска ровно один раз'
+        )
+        assert outbox.stats()[SENT] == 1
+
+    def test_retry_and_dead(self, tmp_path):
+        recorder = Recorder(delivered=False)
+        outbox = Outbox(
+            str(tmp_path / 'outbox.db'), send=recorder,
+            retry_delay=0, max_attempts=2,
+        )
+        outbox.append('key', 1, 'Сообщение')
+        outbox.commit()
+        outbox.deliver_once()
+        outbox.deliver_once()
+        assert len(recorder.sent) == 2, (
+            'Проверьте, что недоставленное уведомление повторяется'
+        )
+        outbox.deliver_once()
+        assert len(recorder.sent) == 2
+        assert outbox.stats()[DEAD] == 1, (
+            'Проверьте, что после max_attempts запись помечается мёртвой'
+        )
+
+    def test_idempotency_key(self):
+        first = {'status': 'reviewing', 'date_updated': '1'}
+        second = {'status': 'approved', 'date_updated': '2'}
+        assert idempotency_key('a', 'hw', first, 1) == idempotency_key(
+            'a', 'hw', dict(first), 2
+        )
+        assert idempotency_key('a', 'hw', first, 1) != idempotency_key(
+            'a', 'hw', second, 1
+        )
+        assert idempotency_key('a', 'hw', first, 1) != idempotency_key(
+            'b', 'hw', first, 1
+        )
+
+    def test_idempotency_key_without_date(self):
+        rejected = {'status': 'rejected'}
+        assert idempotency_key('a', 'hw', rejected, 1) == idempotency_key(
+            'a', 'hw', dict(rejected), 1
+        ), (
+            'Проверьте, что изменение, найденное заново с тем же курсором, '
+            'не дублируется'
+        )
+        assert idempotency_key('a', 'hw', rejected, 1) != idempotency_key(
+            'a', 'hw', rejected, 5
+        ), (
+            'Проверьте, что повтор статуса без date_updated не теряется'
+        )
@@ -0,0 +1,43 @@
+import json
+
+import pytest
+
+import homework
+from records import Homework
+
+
+class TestHomework:
+
+    def test_dict_compatible(self):
+        data = {
+            'id': 7, 'homework_name': 'hw', 'status': 'approved',
+            'date_updated': '2021-11-01T10:00:00Z', 'lesson_name': 'x',
+        }
+        record = Homework.from_dict(data)
+        assert record.get('homework_name') == 'hw'
+        assert record['status'] == 'approved'
+        assert record.get('lesson_name', 'нет') == 'нет'
+        with pytest.raises(KeyError):
+            Homework('approved', 'hw')['id']
+        assert homework.parse_status(record) == homework.parse_status(data), (
+            'Проверьте, что запись разбирается так же, как словарь'
+        )
+        assert not hasattr(record, '__dict__')
+
+    def test_statuses_interned(self):
+        body = json.dumps({
+            'homeworks': [
+                {'homework_name': f'hw{number}', 'status': 'approved'}
+                for number in range(3)
+            ],
+            'current_date': 1,
+        })
+        records = homework.validate_response(json.loads(body))
+        key = next(
+            status for status in homework.HOMEWORK_STATUSES
+            if status == 'approved'
+        )
+        assert all(isinstance(record, Homework) for record in records)
+        assert all(record.status is key for record in records), (
+            'Проверьте, что статус записи - ключ HOMEWORK_STATUSES'
+        )
@@ -0,0 +1,77 @@
+import random
+
+from scheduler import DAY, AdaptivePolicy, FixedPolicy, Scheduler
+from tenants import TenantState
+
+NOON = 9 * 3600
+
+
+def make_policy():
+    return AdaptivePolicy(jitter=0, rng=random.Random(0))
+
+
+class TestAdaptivePolicy:
+
+    def test_reviewing_polled_often(self):
+        state = TenantState(timestamp=0, last_status='reviewing',
+                            last_change=NOON)
+        assert make_policy().next_interval(state, NOON) == 120
+
+    def test_reviewing_interval_decays(self):
+        policy = make_policy()
+        state = TenantState(timestamp=0, last_status='reviewing',
+                            last_change=NOON, unchanged=15)
+        assert policy.next_interval(state, NOON) == 240, (
+            'Проверьте, что частый опрос реже после опросов без изменений'
+        )
+        state.unchanged = 1000
+        assert policy.next_interval(state, NOON) == 600, (
+            'Проверьте, что интервал не превышает обычный'
+        )
+
+    def test_idle_interval_grows(self):
+        policy = make_policy()
+        state = TenantState(timestamp=0, last_status='approved',
+                            last_change=NOON)
+        fresh = policy.next_interval(state, NOON)
+        idle = policy.next_interval(state, NOON + 14 * DAY)
+        assert fresh == 600
+        assert idle == 3600
+
+    def test_quiet_hours(self):
+        policy = make_policy()
+        night = 0
+        state = TenantState(timestamp=0, last_change=night)
+        assert policy.next_interval(state, night) == 1800
+
+    def test_error_backoff(self):
+        policy = make_policy()
+        state = TenantState(timestamp=0, last_change=NOON)
+        intervals = []
+        for errors in range(1, 5):
+            state.errors = errors
+            intervals.append(policy.next_interval(state, NOON))
+        assert 600 <= intervals[0] <= 1200
+        assert all(interval <= 3600 for interval in intervals)
+        assert intervals[-1] >= 1800
+
+
+class TestScheduler:
+
+    def test_due_order(self):
+        scheduler = Scheduler(FixedPolicy(10), start=0)
+        scheduler.add('b', 5)
+        scheduler.add('a', 1)
+        assert scheduler.next_time() == 1
+        assert scheduler.pop_due(5) == ['a', 'b']
+        assert scheduler.next_time() is None
+
+    def test_budget_stretches_intervals(self):
+        scheduler = Scheduler(FixedPolicy(60), budget=60, start=0)
+        state = TenantState(timestamp=0)
+        for key in range(10):
+            scheduler.reschedule(str(key), state, 0)
+        assert scheduler.budget_factor() == 10
+        assert scheduler.reschedule('0', state, 0) == 600, (
+            'Проверьте, что при превышении бюджета интервалы растягиваются'
+        )
@@ -0,0 +1,89 @@
+import pytest
+
+import homework
+from schema import CHOICE, MISSING, RECORD, TYPE, Field, Schema
+from streaming import HomeworkStream
+
+SCHEMA = Schema({
+    'status': Field(str, required=True, choices=('approved', 'rejected')),
+    'homework_name': Field(str, required=True),
+    'id': Field(int),
+})
+
+
+class TestValidator:
+
+    def test_batch_keeps_going(self):
+        records = [
+            {'status': 'approved', 'homework_name': 'a', 'id': 1},
+            {'homework_name': 'b'},
+            {'status': 'unknown', 'homework_name': 'c'},
+            {'status': 'approved', 'homework_name': 'd', 'id': 'x'},
+            'not a record',
+            {'status': 'rejected', 'homework_name': 'e', 'id': None},
+        ]
+        result = SCHEMA.compile().validate(records)
+        assert [record['homework_name'] for record in result] == ['a', 'e'], (
+            'Проверьте, что пачка проверяется целиком, '
+            'а плохие записи отбрасываются'
+        )
+        assert [
+            (error.index, error.field, error.code) for error in result.errors
+        ] == [
+            (1, 'status', MISSING),
+            (2, 'status', CHOICE),
+            (3, 'id', TYPE),
+            (4, '', RECORD),
+        ]
+
+    def test_check_single_record(self):
+        validator = SCHEMA.compile()
+        assert validator.check({'status': 'approved', 'homework_name': 'a'}) \
+            is None
+        error = validator.check({'status': 'approved'}, index=7)
+        assert (error.index, error.field, error.code) == (
+            7, 'homework_name', MISSING
+        )
+        assert SCHEMA.compile() is validator
+
+    def test_stream(self):
+        stream = HomeworkStream([
+            b'{"homeworks": [{"status": "approved", "homework_name": "a"}, ',
+            b'{"status": "bad", "homework_name": "b"}], "current_date": 5}',
+        ])
+        checked = SCHEMA.compile().stream(stream)
+        assert [record['homework_name'] for record in checked] == ['a']
+        assert [error.index for error in checked.errors] == [1]
+        assert checked.get('current_date') == 5
+
+
+class TestValidateResponse:
+
+    def test_parse_status_errors_kept(self):
+        with pytest.raises(KeyError):
+            homework.parse_status({'homework_name': 'a', 'status': 'bad'})
+        with pytest.raises(homework.HomeworkStatusError):
+            homework.parse_status({'homework_name': 'a'})
+
+    def test_engine_reports_rejected_records(self, make_engine):
+        sent = []
+        engine = make_engine(
+            lambda token, timestamp: {
+                'homeworks': [
+                    {'homework_name': 'good', 'status': 'approved'},
+                    {'homework_name': 'bad', 'status': 'unknown'},
+                ],
+                'current_date': timestamp + 1,
+            },
+            sent=sent, check=homework.validate_response,
+        )
+        engine.run_once()
+        assert len(sent) == 2
+        assert sent[0].startswith('Сбой в работе программы: Отброшено')
+        assert 'good' in sent[1], (
+            'Проверьте, что плохая запись не мешает отправить остальные'
+        )
+        engine.run_once()
+        assert len(sent) == 2, (
+            'Проверьте, что повтор той же ошибки записи не отправляется'
+        )
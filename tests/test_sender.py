@@ -0,0 +1,109 @@
+import time
+
+from telegram.error import RetryAfter, TelegramError
+
+from sender import RateLimiter, SendQueue, TokenBucket
+
+
+class TestTokenBucket:
+
+    def test_rate(self):
+        bucket = TokenBucket(rate=10, capacity=1)
+        now = time.monotonic()
+        assert bucket.delay(now) == 0
+        bucket.consume()
+        assert 0.09 < bucket.delay(now) <= 0.1
+
+    def test_block(self):
+        bucket = TokenBucket(rate=10)
+        now = time.monotonic()
+        bucket.block(now + 2)
+        assert bucket.delay(now) == 2
+
+
+class TestRateLimiter:
+
+    def test_global_and_chat_limits(self):
+        limiter = RateLimiter(global_rate=10, chat_rate=1)
+        now = time.monotonic()
+        assert limiter.acquire('1', now) == 0
+        assert 0.09 < limiter.acquire('2', now) <= 0.1, (
+            'Проверьте, что общий лимит бота действует на все чаты'
+        )
+        assert limiter.acquire('2', now + 0.1) == 0
+        assert limiter.acquire('1', now + 0.2) > 0.7, (
+            'Проверьте, что лимит чата действует отдельно'
+        )
+        limiter.block('3', now + 5)
+        assert limiter.acquire('3', now + 1) == 4
+
+
+class TestSendQueue:
+
+    def test_retry_after_honored(self):
+        calls = []
+
+        def send(chat_id, message):
+            calls.append((time.monotonic(), chat_id, message))
+            if len(calls) == 1:
+                raise RetryAfter(0.2)
+
+        queue = SendQueue(send, global_rate=100, chat_rate=100).start()
+        queue.put('1', 'first')
+        queue.put('1', 'second')
+        assert queue.join(timeout=5)
+        queue.stop()
+
+        assert [message for _, _, message in calls] == [
+            'first', 'first', 'second'
+        ], (
+            'Проверьте, что после 429 сообщение повторяется, '
+            'а порядок сообщений чата сохраняется'
+        )
+        assert calls[1][0] - calls[0][0] >= 0.2, (
+            'Проверьте, что учитывается retry_after из RetryAfter'
+        )
+        stats = queue.stats()
+        assert stats['sent'] == 2 and stats['retried'] == 1
+        assert stats['depth'] == 0
+
+    def test_other_errors_not_retried(self):
+        def send(chat_id, message):
+            raise TelegramError('boom')
+
+        queue = SendQueue(send).start()
+        queue.put('1', 'message')
+        assert queue.join(timeout=5)
+        queue.stop()
+        assert queue.stats()['failed'] == 1
+
+    def test_chat_rate_limit(self):
+        calls = []
+        queue = SendQueue(
+            lambda chat_id, message: calls.append(time.monotonic()),
+            global_rate=1000, chat_rate=20,
+        ).start()
+        for number in range(5):
+            queue.put('1', str(number))
+        assert queue.join(timeout=5)
+        queue.stop()
+
+        assert calls[-1] - calls[0] >= 4 / 20 * 0.9, (
+            'Проверьте, что сообщения в один чат идут не чаще chat_rate'
+        )
+
+    def test_callback_reports_outcome(self):
+        results = []
+
+        def send(chat_id, message):
+            if message == 'bad':
+                raise TelegramError('boom')
+
+        queue = SendQueue(send).start()
+        queue.put('1', 'good', results.append)
+        queue.put('1', 'bad', results.append)
+        assert queue.join(timeout=5)
+        queue.stop()
+        assert results == [True, False], (
+            'Проверьте, что callback получает итог доставки сообщения'
+        )
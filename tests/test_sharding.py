@@ -0,0 +1,176 @@
+import requests
+
+from sharding import HashRing, ShardCoordinator
+from state import SQLiteStateStore
+from tenants import Subscription, token_digest
+from webhook import WebhookServer
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestHashRing:
+
+    def test_balanced_and_stable(self):
+        keys = [f'key-{number}' for number in range(3000)]
+        ring = HashRing(['a', 'b', 'c'])
+        owners = {key: ring.owner(key) for key in keys}
+        for member in 'abc':
+            assert 600 < list(owners.values()).count(member) < 1400, (
+                'Проверьте, что ключи делятся между воркерами поровну'
+            )
+        grown = HashRing(['a', 'b', 'c', 'd'])
+        moved = [key for key in keys if grown.owner(key) != owners[key]]
+        assert all(grown.owner(key) == 'd' for key in moved), (
+            'Проверьте, что ключи переезжают только к новому воркеру'
+        )
+        assert len(moved) < len(keys) / 2
+
+    def test_empty_ring(self):
+        assert HashRing([]).owner('key') is None
+
+
+class TestShardCoordinator:
+
+    def test_handoff_waits_for_release(self, tmp_path):
+        path = str(tmp_path / 'shards.db')
+        clock = Clock()
+        keys = [f'key-{number}' for number in range(50)]
+        first = ShardCoordinator(path, 'a', ttl=30, clock=clock)
+        assert first.claim(first.assign(keys)) == set(keys)
+
+        second = ShardCoordinator(path, 'b', ttl=30, clock=clock)
+        wanted = second.assign(keys)
+        assert wanted and second.claim(wanted) == set(), (
+            'Проверьте, что ключ нельзя взять, пока его держит другой воркер'
+        )
+        kept = first.claim(first.assign(keys))
+        taken = second.claim(wanted)
+        assert taken == wanted
+        assert kept | taken == set(keys) and not kept & taken, (
+            'Проверьте, что каждый ключ обслуживает ровно один воркер'
+        )
+
+    def test_expired_lease_taken_over(self, tmp_path):
+        path = str(tmp_path / 'shards.db')
+        clock = Clock()
+        first = ShardCoordinator(path, 'a', ttl=30, clock=clock)
+        first.claim(first.assign(['key']))
+        second = ShardCoordinator(path, 'b', ttl=30, clock=clock)
+        clock.now += 31
+        assert second.claim(second.assign(['key'])) == {'key'}, (
+            'Проверьте, что аренда упавшего воркера истекает через ttl'
+        )
+
+
+class TestShardedEngine:
+
+    def test_no_duplicates_on_rebalance(self, tmp_path, make_engine):
+        state_path = str(tmp_path / 'state.db')
+        shards_path = str(tmp_path / 'shards.db')
+        subscriptions = [
+            Subscription(f'token-{number}', str(number))
+            for number in range(20)
+        ]
+        sent = []
+        polled = {}
+
+        def start(worker):
+            def fetch(token, timestamp):
+                polled.setdefault(worker, []).append(token)
+                return {
+                    'homeworks': [
+                        {'homework_name': token, 'status': 'approved'}
+                    ],
+                    'current_date': timestamp + 600,
+                }
+
+            return make_engine(
+                fetch, subscriptions,
+                send=lambda chat_id, message: sent.append(chat_id),
+                retry_time=600,
+                store=SQLiteStateStore(state_path, flush_interval=3600),
+                shard=ShardCoordinator(shards_path, worker),
+                coalesce_ttl=0,
+            )
+
+        first = start('a')
+        first.rebalance(1000.0)
+        first.run_once()
+        assert len(sent) == 20
+
+        second = start('b')
+        second.rebalance(1000.0)
+        assert not second.active
+        first.rebalance(1000.0)
+        second.rebalance(1000.0)
+        assert second.active and not first.active & second.active
+        assert first.active | second.active == {
+            subscription.key for subscription in subscriptions
+        }
+
+        polled.clear()
+        first.run_once()
+        second.run_once()
+        assert len(sent) == 20, (
+            'Проверьте, что после передачи подписки статус не отправляется '
+            'повторно'
+        )
+        assert set(polled['b']) == {
+            subscription.practicum_token for subscription in subscriptions
+            if token_digest(subscription.practicum_token) in second.held
+        }
+        assert not set(polled['a']) & set(polled['b'])
+
+    def test_push_to_non_owner_rejected(self, tmp_path, make_engine):
+        state_path = str(tmp_path / 'state.db')
+        shards_path = str(tmp_path / 'shards.db')
+        sent = []
+
+        def start(worker):
+            return make_engine(
+                lambda token, timestamp: {
+                    'homeworks': [
+                        {'homework_name': 'hw', 'status': 'approved'}
+                    ],
+                    'current_date': timestamp + 600,
+                },
+                send=lambda chat_id, message: sent.append(worker),
+                retry_time=600,
+                store=SQLiteStateStore(state_path, flush_interval=3600),
+                shard=ShardCoordinator(shards_path, worker),
+            )
+
+        owner = start('a')
+        owner.rebalance(1000.0)
+        other = start('b')
+        other.rebalance(1000.0)
+        owner.rebalance(1000.0)
+        assert owner.active and not other.active
+
+        server = WebhookServer(other, '127.0.0.1', 0).start()
+        try:
+            response = requests.post(
+                server.url,
+                json={'homeworks': [
+                    {'homework_name': 'hw', 'status': 'approved'}
+                ]},
+                headers={'Authorization': 'OAuth token'},
+            )
+        finally:
+            server.stop()
+        assert response.status_code == 421, (
+            'Проверьте, что push для чужого шарда отклоняется, '
+            'чтобы ретранслятор его повторил'
+        )
+        assert sent == []
+        owner.run_once()
+        assert sent == ['a'], (
+            'Проверьте, что изменение отправляет только владелец подписки'
+        )
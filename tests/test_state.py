@@ -0,0 +1,103 @@
+import os
+
+import pytest
+
+from state import MmapLogStateStore, SQLiteStateStore, open_state_store
+
+BACKENDS = [
+    ('sqlite', 'state.db'),
+    ('mmap', 'state.log'),
+]
+
+
+@pytest.mark.parametrize('backend, filename', BACKENDS)
+class TestStateStore:
+
+    def test_state_survives_restart(self, tmp_path, backend, filename):
+        path = str(tmp_path / filename)
+        store = open_state_store(backend, path, flush_interval=60)
+        store.set_cursor('tenant', 1000)
+        store.set_status('tenant', '1', 'approved')
+        store.set_status('tenant', '2', 'reviewing')
+        store.set_error('tenant', 'Сбой в работе программы: boom')
+        store.set_card('tenant', '', {'message_id': 7, 'lines': {}})
+        store.close()
+
+        store = open_state_store(backend, path, flush_interval=60)
+        assert store.get_cursor('tenant') == 1000
+        assert store.cards('tenant') == {
+            '': {'message_id': 7, 'lines': {}}
+        }
+        assert store.statuses('tenant') == {
+            '1': 'approved', '2': 'reviewing'
+        }
+        assert store.get_error('tenant') == 'Сбой в работе программы: boom'
+        store.close()
+
+    def test_writes_are_batched(self, tmp_path, backend, filename):
+        path = str(tmp_path / filename)
+        store = open_state_store(backend, path, flush_interval=60)
+        store.set_cursor('tenant', 1)
+        store.maybe_flush()
+
+        reader = open_state_store(backend, path, flush_interval=60)
+        assert reader.get_cursor('tenant') is None, (
+            'Проверьте, что запись откладывается до flush_interval'
+        )
+        reader.close()
+
+        store.flush()
+        reader = open_state_store(backend, path, flush_interval=60)
+        assert reader.get_cursor('tenant') == 1
+        reader.close()
+        store.close()
+
+
+class TestMmapLog:
+
+    def test_corrupted_tail_dropped(self, tmp_path):
+        path = str(tmp_path / 'state.log')
+        store = MmapLogStateStore(path)
+        store.set_cursor('a', 1)
+        store.flush()
+        store.set_cursor('b', 2)
+        store.close()
+
+        with open(path, 'r+b') as file:
+            data = file.read()
+            position = data.rindex(b'"b"')
+            file.seek(position)
+            file.write(b'"x"')
+
+        store = MmapLogStateStore(path)
+        assert store.get_cursor('a') == 1
+        assert store.get_cursor('b') is None
+        store.set_cursor('c', 3)
+        store.close()
+
+        store = MmapLogStateStore(path)
+        assert store.get_cursor('c') == 3
+        store.close()
+
+    def test_compaction(self, tmp_path):
+        path = str(tmp_path / 'state.log')
+        store = MmapLogStateStore(path, chunk_size=4096)
+        for value in range(5000):
+            store.set_cursor('tenant', value)
+            store.flush()
+        store.close()
+        size = os.path.getsize(path)
+
+        store = MmapLogStateStore(path, chunk_size=4096)
+        assert store.get_cursor('tenant') == 4999
+        store.close()
+        assert os.path.getsize(path) < size, (
+            'Проверьте, что журнал сжимается при открытии'
+        )
+
+
+def test_sqlite_uses_wal(tmp_path):
+    store = SQLiteStateStore(str(tmp_path / 'state.db'))
+    mode = store.connection.execute('PRAGMA journal_mode').fetchone()[0]
+    store.close()
+    assert mode == 'wal'
@@ -0,0 +1,170 @@
+import time
+
+import telegram
+
+import homework
+from benchmarks.mock_telegram import MockTelegramServer
+from state import MemoryStateStore, SQLiteStateStore
+from status_cards import CHAT, CardUpdate, StatusCards, card_text
+
+
+class Submitter:
+
+    def __init__(self, delivered=True):
+        self.delivered = delivered
+        self.updates = []
+        self.next_id = 100
+
+    def __call__(self, chat_id, update, callback):
+        self.updates.append((chat_id, update.text, update.message_id))
+        if self.delivered and update.message_id is None:
+            self.next_id += 1
+            update.message_id = self.next_id
+        callback(self.delivered)
+
+
+class TestStatusCards:
+
+    def test_debounce(self):
+        submit = Submitter()
+        cards = StatusCards(MemoryStateStore(), submit, debounce=2)
+        cards.update('tenant', '1', 'hw', 'Работа взята на проверку', now=0)
+        cards.update('tenant', '1', 'hw', 'Есть замечания', now=1)
+        assert cards.flush(now=1.5) == 0, (
+            'Проверьте, что карточка не отправляется до конца окна debounce'
+        )
+        assert cards.flush(now=2) == 1
+        assert submit.updates == [('1', 'Есть замечания', None)], (
+            'Проверьте, что изменения в окне debounce сливаются в один вызов'
+        )
+        assert cards.coalesced == 1
+        cards.update('tenant', '1', 'hw', 'Принята', now=3)
+        cards.flush(now=5)
+        assert submit.updates[-1] == ('1', 'Принята', 101), (
+            'Проверьте, что следующие изменения правят то же сообщение'
+        )
+
+    def test_chat_card(self):
+        submit = Submitter()
+        cards = StatusCards(MemoryStateStore(), submit, mode=CHAT, debounce=0)
+        cards.update('tenant', '1', 'first', 'Первая: проверяется', now=0)
+        cards.update('tenant', '1', 'second', 'Вторая: принята', now=0)
+        cards.flush(now=0)
+        cards.update('tenant', '1', 'first', 'Первая: принята', now=1)
+        cards.flush(now=1)
+        assert submit.updates == [
+            ('1', 'Первая: проверяется\n\nВторая: принята', None),
+            ('1', 'Вторая: принята\n\nПервая: принята', 101),
+        ]
+
+    def test_message_id_survives_restart(self, tmp_path):
+        path = str(tmp_path / 'state.db')
+        submit = Submitter()
+        store = SQLiteStateStore(path, flush_interval=3600)
+        cards = StatusCards(store, submit, debounce=0)
+        cards.update('tenant', '1', 'hw', 'Проверяется', now=0)
+        cards.flush(now=0)
+        store.close()
+
+        store = SQLiteStateStore(path, flush_interval=3600)
+        cards = StatusCards(store, submit, debounce=0)
+        cards.update('tenant', '1', 'hw', 'Принята', now=1)
+        cards.flush(now=1)
+        assert submit.updates[-1] == ('1', 'Принята', 101), (
+            'Проверьте, что id сообщения карточки хранится в состоянии'
+        )
+
+    def test_restore_undelivered(self, tmp_path):
+        path = str(tmp_path / 'state.db')
+        store = SQLiteStateStore(path, flush_interval=3600)
+        StatusCards(store, Submitter()).update('tenant', '1', 'hw', 'Принята')
+        store.close()
+
+        submit = Submitter()
+        store = SQLiteStateStore(path, flush_interval=3600)
+        cards = StatusCards(store, submit)
+        cards.restore('tenant', '1', now=0)
+        cards.flush(now=0)
+        assert submit.updates == [('1', 'Принята', None)], (
+            'Проверьте, что карточка, не отправленная до сбоя, '
+            'отправляется после перезапуска'
+        )
+        cards.restore('tenant', '1', now=1)
+        assert cards.flush(now=1) == 0
+
+    def test_retry(self):
+        submit = Submitter(delivered=False)
+        cards = StatusCards(
+            MemoryStateStore(), submit, debounce=0, retry_delay=0,
+            max_attempts=2,
+        )
+        cards.update('tenant', '1', 'hw', 'Принята', now=0)
+        cards.flush(now=0)
+        cards.flush()
+        assert len(submit.updates) == 2
+        assert cards.flush() == 0
+        assert cards.next_time() is None
+
+    def test_background_flush(self):
+        submit = Submitter()
+        cards = StatusCards(MemoryStateStore(), submit, debounce=0.01).start()
+        cards.update('tenant', '1', 'hw', 'Принята')
+        deadline = time.monotonic() + 5
+        while not submit.updates and time.monotonic() < deadline:
+            time.sleep(0.01)
+        cards.stop()
+        assert submit.updates == [('1', 'Принята', None)], (
+            'Проверьте, что карточки отправляются фоновым потоком'
+        )
+
+    def test_text_limit(self):
+        text = card_text(['а' * 3000, 'б' * 3000])
+        assert text == 'б' * 3000
+
+
+class TestTelegramCards:
+
+    def test_edit_in_place(self):
+        with MockTelegramServer() as server:
+            bot = telegram.Bot(
+                token='1234:abcdefg', base_url=f'{server.url}/bot'
+            )
+            card = CardUpdate('Проверяется')
+            homework.deliver_message(bot, 1, card)
+            card.text = 'Принята'
+            homework.deliver_message(bot, 1, card)
+            homework.deliver_message(bot, 1, card)
+            assert len(server.messages) == 1 and server.edits == 1, (
+                'Проверьте, что карточка правится через editMessageText'
+            )
+            assert server.messages[0]['text'] == 'Принята'
+
+            lost = CardUpdate('Принята', message_id=99)
+            homework.deliver_message(bot, 1, lost)
+            assert lost.message_id == 2, (
+                'Проверьте, что вместо удалённой карточки отправляется новая'
+            )
+
+
+class TestEngineCards:
+
+    def test_notify_updates_card(self, make_engine):
+        sent = []
+        submit = Submitter()
+        cards = StatusCards(MemoryStateStore(), submit, mode=CHAT, debounce=0)
+        engine = make_engine(
+            lambda token, timestamp: {
+                'homeworks': [
+                    {'homework_name': 'first', 'status': 'approved'},
+                    {'homework_name': 'second', 'status': 'reviewing'},
+                ],
+                'current_date': timestamp,
+            },
+            sent=sent, check=homework.validate_response, cards=cards,
+        )
+        engine.run_once()
+        cards.flush()
+        assert sent == []
+        assert len(submit.updates) == 1, (
+            'Проверьте, что изменения статусов попадают в одну карточку'
+        )
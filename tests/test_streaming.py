@@ -0,0 +1,111 @@
+import functools
+import json
+
+import pytest
+
+import homework
+from benchmarks.mock_api import MockPracticumServer
+from http_client import ApiClient
+from streaming import HomeworkStream
+from tenants import Subscription
+
+
+def split(body, size):
+    return [body[start:start + size] for start in range(0, len(body), size)]
+
+
+class TestHomeworkStream:
+    RESPONSE = {
+        'current_date': 1637000000,
+        'homeworks': [
+            {'id': number, 'homework_name': f'hw "{number}" ё',
+             'status': 'approved'}
+            for number in range(300)
+        ],
+    }
+
+    @pytest.mark.parametrize('size', [1, 7, 4096])
+    def test_records_match_json(self, size):
+        body = json.dumps(self.RESPONSE, ensure_ascii=False, indent=1)
+        stream = HomeworkStream(split(body.encode(), size))
+
+        assert list(stream) == self.RESPONSE['homeworks'], (
+            'Проверьте, что потоковый разбор даёт те же записи, что json'
+        )
+        assert stream.get('current_date') == 1637000000
+
+    @pytest.mark.parametrize('body, error', [
+        (b'[]', TypeError),
+        (b'{"homeworks": {}}', TypeError),
+        (b'{"current_date": 1}', TypeError),
+        (b'{"homeworks": [{"id": 1}', ValueError),
+    ])
+    def test_invalid(self, body, error):
+        with pytest.raises(error):
+            list(homework.check_response(HomeworkStream([body])))
+
+    def test_closed_after_error(self):
+        closed = []
+        stream = HomeworkStream(
+            [b'{"homeworks": [{"id": 1}'], close=lambda: closed.append(1)
+        )
+        with pytest.raises(ValueError):
+            list(stream)
+        assert closed == [1], (
+            'Проверьте, что ответ закрывается, если поток оборвался'
+        )
+
+
+class TestStreamingFetch:
+
+    def test_compressed_stream_through_engine(
+        self, monkeypatch, make_engine
+    ):
+        client = ApiClient()
+        sent = []
+        with MockPracticumServer(
+            homeworks_count=500, clock=lambda: 1000, compress=True
+        ) as server:
+            monkeypatch.setattr(homework, 'ENDPOINT', server.url)
+            engine = make_engine(
+                functools.partial(
+                    homework.request_homework_statuses,
+                    session=client, stream=True,
+                ),
+                sent=sent,
+            )
+            engine.run_once()
+        client.close()
+
+        assert len(sent) == 500
+        assert server.body_sizes[0] < 500 * 20, (
+            'Проверьте, что клиент запрашивает сжатый ответ'
+        )
+        key = Subscription('token', '1').key
+        assert engine.states[key].timestamp == 1000, (
+            'Проверьте, что current_date читается после потокового разбора'
+        )
+
+    def test_truncated_stream_not_seen(self, make_engine):
+        body = json.dumps({
+            'current_date': 1000,
+            'homeworks': [
+                {'id': 1, 'homework_name': 'a', 'status': 'approved'},
+                {'id': 2, 'homework_name': 'b', 'status': 'approved'},
+                {'id': 3, 'homework_name': 'c', 'status': 'approved'},
+            ],
+        }).encode()
+        bodies = [body[:body.index(b'{"id": 3')], body]
+        sent = []
+        engine = make_engine(
+            lambda token, timestamp: HomeworkStream([bodies.pop(0)]),
+            sent=sent,
+        )
+        engine.run_once()
+        assert all(message.startswith('Сбой') for message in sent)
+        engine.run_once()
+        names = [message for message in sent if '"a"' in message]
+        assert len(names) == 1, (
+            'Проверьте, что записи оборванного потока не считаются '
+            'отправленными'
+        )
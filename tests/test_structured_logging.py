@@ -0,0 +1,67 @@
+import io
+import json
+import logging
+
+from structured_logging import (JsonFormatter, SamplingQueueHandler,
+                                configure_logging, stage_extra)
+
+
+def make_record(level=logging.DEBUG, message='Статус проверки не изменился',
+                **extra):
+    record = logging.LogRecord(
+        'root', level, __file__, 1, message, None, None
+    )
+    record.__dict__.update(extra)
+    return record
+
+
+class TestJsonFormatter:
+
+    def test_extra_fields(self):
+        record = make_record(tenant='abc:1', stage='check', duration=0.25)
+        data = json.loads(JsonFormatter().format(record))
+        assert data['msg'] == 'Статус проверки не изменился'
+        assert (data['tenant'], data['stage'], data['duration']) == (
+            'abc:1', 'check', 0.25
+        ), 'Проверьте, что поля tenant, stage и duration попадают в JSON'
+
+
+class TestSamplingQueueHandler:
+
+    def test_overflow_policy(self):
+        handler = SamplingQueueHandler(maxsize=10, sample_rate=0)
+        for _ in range(20):
+            handler.handle(make_record())
+        assert handler.queue.qsize() == 8, (
+            'Проверьте, что выше отметки sample_above отладочные записи '
+            'прореживаются'
+        )
+        for _ in range(5):
+            handler.handle(make_record(logging.ERROR, 'Сбой'))
+        records = []
+        while not handler.queue.empty():
+            records.append(handler.queue.get_nowait())
+        assert [record.levelno for record in records].count(
+            logging.ERROR
+        ) == 5, 'Проверьте, что ошибки вытесняют старые записи, а не теряются'
+        assert handler.dropped == 15
+
+
+class TestConfigureLogging:
+
+    def test_queue_mode_writes_json(self):
+        root = logging.getLogger()
+        handlers, level = root.handlers, root.level
+        stream = io.StringIO()
+        listener = configure_logging('queue', stream=stream)
+        try:
+            logging.info(
+                'Отправлен API запрос', extra=stage_extra('t', 'fetch')
+            )
+        finally:
+            listener.stop()
+            root.handlers, root.level = handlers, level
+
+        data = json.loads(stream.getvalue())
+        assert data['msg'] == 'Отправлен API запрос'
+        assert data['stage'] == 'fetch'
@@ -0,0 +1,179 @@
+import pytest
+
+import homework
+from records import Homework
+from templates import MessageTemplates, compile_template
+from tenants import Subscription
+
+CATALOGS = {
+    'ru': {
+        'message': 'Работа "{homework_name}": {verdict}',
+        'verdicts': {'approved': 'принята', 'rejected': 'есть замечания'},
+    },
+    'en': {
+        'message': (
+            '"{homework_name}": {verdict}[[. Comment: {reviewer_comment}]]'
+        ),
+        'verdicts': {'approved': 'approved'},
+    },
+}
+
+
+class TestCompileTemplate:
+
+    def test_fields(self):
+        render = compile_template('{homework_name}: {verdict} #{id:>3}')
+        assert render(homework_name='hw', verdict='ok', id=7) == 'hw: ok #  7'
+
+    def test_optional_section(self):
+        render = compile_template('{verdict}[[ ({reviewer_comment})]]')
+        assert render(verdict='ok') == 'ok', (
+            'Проверьте, что кусок в [[...]] без значения поля не выводится'
+        )
+        assert render(verdict='ok', reviewer_comment='x') == 'ok (x)'
+
+    def test_unknown_field(self):
+        with pytest.raises(ValueError):
+            compile_template('{token}')
+
+    def test_conversions(self):
+        render = compile_template('{homework_name!r} {id!s:>3}')
+        assert render(homework_name='hw', id=7) == "'hw'   7", (
+            'Проверьте, что преобразования !r и !s применяются'
+        )
+        assert render.fields == ('homework_name', 'id')
+        with pytest.raises(ValueError):
+            compile_template('{id!x}')
+
+    def test_literal_escaping(self):
+        render = compile_template("it's {{x}}\\n\n{homework_name}")
+        assert render(homework_name='hw') == "it's {x}\\n\nhw", (
+            'Проверьте, что кавычки, скобки и переводы строк в тексте '
+            'шаблона сохраняются'
+        )
+        with pytest.raises(ValueError):
+            compile_template('{id:>{homework_name}}')
+
+    def test_bound_message(self):
+        message = compile_template('{homework_name}: {verdict}').bind(
+            'принята', 'approved'
+        )
+        assert message({'homework_name': 'hw'}.get) == 'hw: принята'
+
+    def test_section_shows_zero(self):
+        render = compile_template('{verdict}[[ #{id}]]')
+        assert render(verdict='ok', id=0) == 'ok #0', (
+            'Проверьте, что кусок в [[...]] выводится для id=0'
+        )
+        assert render(verdict='ok', id='') == 'ok'
+
+
+class TestMessageTemplates:
+
+    def test_locales(self):
+        templates = MessageTemplates(CATALOGS)
+        record = {
+            'homework_name': 'hw', 'status': 'approved',
+            'reviewer_comment': 'good',
+        }
+        assert templates.render(record) == 'Работа "hw": принята'
+        assert templates.render(record, 'en') == (
+            '"hw": approved. Comment: good'
+        )
+        assert templates.render(record, 'de') == 'Работа "hw": принята', (
+            'Проверьте, что неизвестный язык заменяется языком по умолчанию'
+        )
+        assert templates.render(
+            {'homework_name': 'hw', 'status': 'rejected'}, 'en'
+        ) == 'Работа "hw": есть замечания', (
+            'Проверьте, что статус без перевода берётся из языка '
+            'по умолчанию'
+        )
+        with pytest.raises(KeyError):
+            templates.render({'homework_name': 'hw', 'status': 'unknown'})
+
+    def test_fan_out_cached(self):
+        templates = MessageTemplates(CATALOGS)
+        record = {'id': 1, 'homework_name': 'hw', 'status': 'approved'}
+        for locale in ('ru', 'en') * 50:
+            templates.render(record, locale)
+        templates.render(dict(record), 'ru')
+        assert templates.misses == 2, (
+            'Проверьте, что сообщение форматируется один раз на язык'
+        )
+        assert templates.hits == 99
+        changed = dict(record, status='rejected')
+        assert templates.render(changed) == 'Работа "hw": есть замечания'
+
+    def test_cache_size(self):
+        templates = MessageTemplates(CATALOGS, cache_size=2)
+        for number in range(5):
+            templates.render(
+                {'id': number, 'homework_name': f'hw{number}',
+                 'status': 'approved'}
+            )
+        assert len(templates._cache) == 2
+
+    def test_fields(self):
+        assert MessageTemplates(CATALOGS).fields == {
+            'homework_name', 'verdict', 'reviewer_comment',
+        }
+        assert 'reviewer_comment' not in MessageTemplates(
+            {'ru': CATALOGS['ru']}
+        ).fields, (
+            'Проверьте, что поля шаблонов собираются по всем языкам'
+        )
+
+    def test_cache_key_uses_template_fields(self):
+        templates = MessageTemplates({'ru': {
+            'message': '{homework_name}: {verdict} ({date_updated})',
+            'verdicts': {'approved': 'принята'},
+        }})
+        record = {
+            'id': 1, 'homework_name': 'hw', 'status': 'approved',
+            'date_updated': '2021-11-01',
+        }
+        assert templates.render(record) == 'hw: принята (2021-11-01)'
+        updated = dict(record, date_updated='2021-11-02')
+        assert templates.render(updated) == 'hw: принята (2021-11-02)', (
+            'Проверьте, что ключ кеша учитывает все поля шаблона'
+        )
+        templates.render(dict(record, id=2))
+        assert templates.hits == 1, (
+            'Проверьте, что поля вне шаблона не попадают в ключ кеша'
+        )
+
+    def test_parse_status_unchanged(self):
+        record = {'homework_name': 'hw', 'status': 'reviewing'}
+        assert homework.parse_status(record) == (
+            'Изменился статус проверки работы "hw". '
+            f'{homework.HOMEWORK_STATUSES["reviewing"]}'
+        )
+
+    def test_english_catalog(self):
+        record = Homework('rejected', 'hw', 1, None, 'Поправьте тесты')
+        message = homework.render_status(record, 'en')
+        assert message.startswith('Homework "hw" status changed.')
+        assert message.endswith('Reviewer comment: Поправьте тесты')
+
+
+class TestEngineLocales:
+
+    def test_render_per_subscription(self, make_engine):
+        sent = []
+        engine = make_engine(
+            lambda token, timestamp: {
+                'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+                'current_date': timestamp,
+            },
+            [Subscription('token', '1'), Subscription('token', '2', 'en')],
+            check=homework.validate_response,
+            render=homework.render_status,
+            send=lambda chat_id, message: sent.append((chat_id, message)),
+        )
+        engine.run_once()
+        messages = dict(sent)
+        assert messages['1'].startswith('Изменился статус проверки работы')
+        assert messages['2'].startswith('Homework "hw" status changed.'), (
+            'Проверьте, что уведомление строится на языке подписки'
+        )
@@ -0,0 +1,139 @@
+import json
+
+import pytest
+
+import homework
+from state import MemoryStateStore
+from tenants import Subscription, load_subscriptions
+
+
+def write_registry(tmp_path, data):
+    path = tmp_path / 'subscriptions.json'
+    path.write_text(json.dumps(data), encoding='utf-8')
+    return str(path)
+
+
+class TestLoadSubscriptions:
+
+    def test_loads(self, tmp_path):
+        path = write_registry(tmp_path, [
+            {'practicum_token': 'a', 'chat_id': 1},
+            {'practicum_token': 'b', 'chat_id': '2', 'locale': 'en'},
+        ])
+        assert load_subscriptions(path) == [
+            Subscription('a', '1'), Subscription('b', '2', 'en'),
+        ]
+
+    @pytest.mark.parametrize('data, error', [
+        ({'practicum_token': 'a', 'chat_id': 1}, TypeError),
+        ([{'practicum_token': 'a'}], KeyError),
+        (['a'], TypeError),
+    ])
+    def test_malformed(self, tmp_path, data, error):
+        with pytest.raises(error):
+            load_subscriptions(write_registry(tmp_path, data))
+
+    def test_duplicates_skipped(self, tmp_path):
+        path = write_registry(tmp_path, [
+            {'practicum_token': 'a', 'chat_id': 1},
+            {'practicum_token': 'a', 'chat_id': '1'},
+            {'practicum_token': 'a', 'chat_id': 2},
+        ])
+        assert load_subscriptions(path) == [
+            Subscription('a', '1'), Subscription('a', '2'),
+        ], 'Проверьте, что повтор подписки в реестре пропускается'
+
+
+class TestPollingEngine:
+
+    def test_error_isolated(self, make_engine):
+        def fetch(token, timestamp):
+            if token == 'broken':
+                raise ConnectionError('API не отвечает на запрос')
+            return {
+                'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+                'current_date': timestamp + 1,
+            }
+
+        sent = []
+        engine = make_engine(
+            fetch, [Subscription('broken', '1'), Subscription('good', '2')],
+            send=lambda chat_id, message: sent.append((chat_id, message)),
+        )
+        engine.run_once()
+        messages = dict(sent)
+        assert 'Сбой в работе программы' in messages['1'], (
+            'Проверьте, что ошибка отправляется в чат своей подписки'
+        )
+        assert messages['2'].startswith('Изменился статус'), (
+            'Проверьте, что ошибка одной подписки не мешает остальным'
+        )
+        assert engine.states[Subscription('broken', '1').key].errors == 1
+        assert engine.states[Subscription('good', '2').key].errors == 0
+
+    def test_state_per_tenant(self, make_engine):
+        statuses = {'a': 'reviewing', 'b': 'reviewing'}
+
+        def fetch(token, timestamp):
+            return {
+                'homeworks': [
+                    {'id': 1, 'homework_name': 'hw', 'status': statuses[token]}
+                ],
+                'current_date': timestamp + (10 if token == 'a' else 20),
+            }
+
+        sent = []
+        store = MemoryStateStore()
+        first, second = Subscription('a', '1'), Subscription('b', '2')
+        engine = make_engine(
+            fetch, [first, second], store=store, coalesce_ttl=0,
+            send=lambda chat_id, message: sent.append((chat_id, message)),
+        )
+        start = {key: state.timestamp for key, state in engine.states.items()}
+        engine.run_once()
+        assert len(sent) == 2
+
+        statuses['a'] = 'approved'
+        engine.run_once()
+        assert [chat for chat, _ in sent[2:]] == ['1'], (
+            'Проверьте, что статусы работ хранятся отдельно для подписок'
+        )
+        assert store.statuses(first.key) == {'1': 'approved'}
+        assert store.statuses(second.key) == {'1': 'reviewing'}
+        assert store.get_cursor(first.key) == start[first.key] + 20
+        assert store.get_cursor(second.key) == start[second.key] + 40, (
+            'Проверьте, что курсор from_date у каждой подписки свой'
+        )
+
+    def test_last_status_restored(self, make_engine):
+        store = MemoryStateStore()
+        subscription = Subscription('token', '1')
+        store.set_status(subscription.key, '1', 'approved')
+        store.set_status(subscription.key, '2', 'reviewing')
+        engine = make_engine(None, [subscription], store=store)
+        assert engine.states[subscription.key].last_status == 'reviewing', (
+            'Проверьте, что статус подписки восстанавливается из хранилища'
+        )
+
+    def test_reviewing_kept_by_other_homework(self, make_engine):
+        def fetch(token, timestamp):
+            return {'homeworks': homeworks, 'current_date': timestamp}
+
+        homeworks = [
+            {'id': 2, 'homework_name': 'new', 'status': 'reviewing'},
+            {'id': 1, 'homework_name': 'old', 'status': 'reviewing'},
+        ]
+        subscription = Subscription('token', '1')
+        engine = make_engine(fetch, [subscription])
+        engine.run_once()
+        homeworks[1] = dict(homeworks[1], status='approved')
+        engine.run_once()
+        state = engine.states[subscription.key]
+        assert state.last_status == 'reviewing', (
+            'Проверьте, что подписка с работой на проверке опрашивается '
+            'часто, даже если изменилась другая работа'
+        )
+        engine.run_once()
+        assert state.unchanged == 1, (
+            'Проверьте, что считаются опросы без изменений'
+        )
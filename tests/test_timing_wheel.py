@@ -0,0 +1,54 @@
+import random
+
+from timing_wheel import TimingWheel, spread_offset
+
+
+class TestTimingWheel:
+
+    def test_fires_like_sorted_deadlines(self):
+        rng = random.Random(1)
+        wheel = TimingWheel(tick=1.0, slots=8, levels=3, start=0)
+        deadlines = {key: rng.uniform(0, 2000) for key in range(2000)}
+        for key, when in deadlines.items():
+            wheel.insert(key, when)
+
+        fired_at = {}
+        for now in range(0, 2002):
+            for key in wheel.advance(now):
+                fired_at[key] = now
+
+        assert len(fired_at) == len(deadlines), (
+            'Проверьте, что срабатывают все таймеры, '
+            'в том числе за горизонтом колёс'
+        )
+        for key, when in deadlines.items():
+            assert when <= fired_at[key] < when + 1
+
+    def test_cancel_and_replace(self):
+        wheel = TimingWheel(start=0)
+        wheel.insert('a', 5)
+        wheel.insert('b', 5)
+        wheel.cancel('a')
+        wheel.insert('b', 300)
+        assert wheel.advance(10) == []
+        assert wheel.advance(300) == ['b']
+        assert len(wheel) == 0
+
+    def test_next_time_and_lag(self):
+        wheel = TimingWheel(start=0)
+        assert wheel.next_time() is None
+        wheel.insert('a', 3)
+        assert wheel.next_time() == 3
+        assert wheel.advance(5) == ['a']
+        assert wheel.lag_stats()['max_lag'] == 2
+
+    def test_spread_offset(self):
+        offsets = [spread_offset(str(key), 100) for key in range(1000)]
+        assert all(0 <= offset < 100 for offset in offsets)
+        assert spread_offset('a', 100) == spread_offset('a', 100)
+        buckets = [0] * 10
+        for offset in offsets:
+            buckets[int(offset // 10)] += 1
+        assert min(buckets) > 50, (
+            'Проверьте, что старт подписок распределён равномерно'
+        )
@@ -0,0 +1,67 @@
+import requests
+
+from tenants import Subscription
+from webhook import WebhookServer
+
+
+class TestWebhook:
+    PAYLOAD = {'homeworks': [
+        {'id': 1, 'homework_name': 'hw', 'status': 'approved'},
+    ]}
+    SUBSCRIPTIONS = [Subscription('token', '1'), Subscription('token', '2')]
+
+    def test_push_then_poll_deduplicated(self, make_engine):
+        sent = []
+        responses = [dict(self.PAYLOAD), dict(self.PAYLOAD)]
+        engine = make_engine(
+            lambda token, timestamp: responses.pop(0), self.SUBSCRIPTIONS,
+            send=lambda chat_id, message: sent.append((chat_id, message)),
+        )
+        server = WebhookServer(engine, '127.0.0.1', 0, secret='s').start()
+        try:
+            response = requests.post(
+                server.url,
+                json=self.PAYLOAD,
+                headers={
+                    'Authorization': 'OAuth token',
+                    'X-Webhook-Secret': 's',
+                },
+            )
+        finally:
+            server.stop()
+
+        assert response.status_code == 202
+        assert sorted(chat for chat, _ in sent) == ['1', '2'], (
+            'Проверьте, что push рассылается всем чатам токена'
+        )
+        engine.run_once()
+        assert len(sent) == 2, (
+            'Проверьте, что статус, пришедший push, не дублируется опросом'
+        )
+
+    def test_rejects_invalid(self, make_engine):
+        sent = []
+        engine = make_engine(None, self.SUBSCRIPTIONS, sent=sent)
+        server = WebhookServer(engine, '127.0.0.1', 0, secret='s').start()
+        headers = {'Authorization': 'OAuth token', 'X-Webhook-Secret': 's'}
+        try:
+            invalid = requests.post(
+                server.url, json={'homeworks': 'hw'}, headers=headers
+            )
+            forbidden = requests.post(
+                server.url, json=self.PAYLOAD,
+                headers={'Authorization': 'OAuth token'},
+            )
+            unknown = requests.post(
+                server.url, json=self.PAYLOAD,
+                headers={**headers, 'Authorization': 'OAuth other'},
+            )
+        finally:
+            server.stop()
+
+        assert invalid.status_code == 400, (
+            'Проверьте, что push проверяется через check_response'
+        )
+        assert forbidden.status_code == 403
+        assert unknown.status_code == 401
+        assert sent == []
@@ -0,0 +1,140 @@
+import math
+import zlib
+
+
+class TimingWheel:
+    """Иерархическое колесо таймеров.
+
+    Уровень 0 состоит из slots ячеек длиной tick секунд, каждая
+    ячейка уровня i покрывает slots ** i тиков. Вставка и отмена -
+    O(1): запись кладётся в словарь ячейки. При обороте младшего
+    колеса записи из очередной ячейки старшего уровня переносятся
+    ниже. Записи дальше горизонта колёс ждут в отдельном словаре.
+    """
+
+    def __init__(self, tick=1.0, slots=256, levels=4, start=0.0):
+        self.tick = tick
+        self.slots = slots
+        self.levels = levels
+        self.current = math.floor(start / tick)
+        self.horizon = slots ** levels
+        self._spans = [slots ** level for level in range(levels)]
+        self._wheels = [[{} for _ in range(slots)] for _ in range(levels)]
+        self._overflow = {}
+        self._ready = {}
+        self._where = {}
+        self.max_lag = 0.0
+        self.total_lag = 0.0
+        self.fired = 0
+
+    def __len__(self):
+        return len(self._where)
+
+    def __contains__(self, key):
+        return key in self._where
+
+    def _place(self, key, when):
+        target = math.ceil(when / self.tick)
+        delta = target - self.current
+        if delta <= 0:
+            bucket = self._ready
+        elif delta >= self.horizon:
+            bucket = self._overflow
+        else:
+            level = 0
+            slots = self.slots
+            spans = self._spans
+            while delta >= spans[level] * slots:
+                level += 1
+            span = spans[level]
+            bucket = self._wheels[level][(target // span) % slots]
+        bucket[key] = when
+        self._where[key] = bucket
+
+    def insert(self, key, when):
+        """Ставим таймер key на момент when, заменяя прежний."""
+        if key in self._where:
+            self.cancel(key)
+        self._place(key, when)
+
+    def cancel(self, key):
+        """Снимаем таймер key, если он есть."""
+        bucket = self._where.pop(key, None)
+        if bucket is not None:
+            del bucket[key]
+
+    def _cascade(self, level):
+        span = self._spans[level]
+        bucket = self._wheels[level][(self.current // span) % self.slots]
+        entries = list(bucket.items())
+        bucket.clear()
+        for key, when in entries:
+            self._place(key, when)
+
+    def _refill_from_overflow(self):
+        entries = list(self._overflow.items())
+        self._overflow.clear()
+        for key, when in entries:
+            self._place(key, when)
+
+    def advance(self, now):
+        """Продвигаем колесо до now и возвращаем сработавшие ключи."""
+        fired = self._take(self._ready, now)
+        target = math.floor(now / self.tick)
+        while self.current < target:
+            if not self._where:
+                self.current = target
+                break
+            self.current += 1
+            if self.current % self.horizon == 0:
+                self._refill_from_overflow()
+            for level in range(self.levels - 1, 0, -1):
+                if self.current % self._spans[level] == 0:
+                    self._cascade(level)
+            slot = self._wheels[0][self.current % self.slots]
+            fired.extend(self._take(slot, now))
+            fired.extend(self._take(self._ready, now))
+        return fired
+
+    def _take(self, bucket, now):
+        if not bucket:
+            return []
+        keys = list(bucket)
+        for key, when in bucket.items():
+            lag = max(0.0, now - when)
+            self.total_lag += lag
+            if lag > self.max_lag:
+                self.max_lag = lag
+            del self._where[key]
+        self.fired += len(keys)
+        bucket.clear()
+        return keys
+
+    def next_time(self):
+        """Момент, до которого можно спать, или None без таймеров.
+
+        Это ближайшая непустая ячейка уровня 0 либо ближайший
+        перенос из старшего уровня, после которого время уточнится.
+        """
+        if not self._where:
+            return None
+        if self._ready:
+            return self.current * self.tick
+        for offset in range(1, self.slots + 1):
+            tick = self.current + offset
+            if self._wheels[0][tick % self.slots]:
+                return tick * self.tick
+            if tick % self.slots == 0:
+                return tick * self.tick
+        return (self.current + 1) * self.tick
+
+    def lag_stats(self):
+        """Опоздание срабатывания таймеров, секунды."""
+        average = self.total_lag / self.fired if self.fired else 0.0
+        return {'fired': self.fired, 'max_lag': self.max_lag,
+                'avg_lag': average}
+
+
+def spread_offset(key, window):
+    """Постоянный сдвиг в пределах window для равномерного старта."""
+    return zlib.crc32(str(key).encode()) / 2 ** 32 * window
@@ -0,0 +1,134 @@
+import hmac
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from exceptions import NotShardOwnerError
+from tenants import token_digest
+
+MAX_BODY_SIZE = 1024 * 1024
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    """Принимаем статусы домашних работ, присланные ретранслятором."""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        """Разбираем push с ответом в формате API Практикума."""
+        server = self.server
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(min(length, MAX_BODY_SIZE + 1))
+        if self.path.split('?')[0] != server.path:
+            self._reply(404, {'error': 'Неизвестный адрес'})
+            return
+        if length > MAX_BODY_SIZE:
+            self._reply(413, {'error': 'Слишком большой запрос'})
+            return
+        if not server.authorized(self.headers.get('X-Webhook-Secret', '')):
+            self._reply(403, {'error': 'Неверный секрет'})
+            return
+        authorization = self.headers.get('Authorization', '')
+        if not authorization.startswith('OAuth '):
+            self._reply(401, {'error': 'Нет токена Практикума'})
+            return
+        subscriptions = server.subscriptions_for(authorization[6:])
+        if not subscriptions:
+            self._reply(401, {'error': 'Токен не подписан'})
+            return
+        try:
+            response = json.loads(body)
+            changes = sum(
+                server.engine.ingest(subscription, response)
+                for subscription in subscriptions
+            )
+        except NotShardOwnerError as error:
+            logging.info(f'Push для чужого шарда: {error}')
+            self._reply(421, {'error': str(error)})
+            return
+        except (TypeError, ValueError) as error:
+            logging.warning(f'Отклонён push: {error}')
+            self._reply(400, {'error': str(error)})
+            return
+        server.count(changes)
+        self._reply(202, {'accepted': changes})
+
+    def log_message(self, format, *args):
+        """Запросы пишем в лог только на уровне DEBUG."""
+        logging.debug(f'Webhook: {format % args}')
+
+
+class WebhookServer(ThreadingHTTPServer):
+    """Встроенный HTTP-сервер для push-уведомлений о статусах.
+
+    Ретранслятор отправляет POST на path с телом в формате ответа
+    ENDPOINT и токеном студента в заголовке Authorization, как при
+    запросе к API. Если задан secret, он же должен прийти в заголовке
+    X-Webhook-Secret. Ответ проверяется и рассылается через
+    engine.ingest, поэтому дубли с опросом отсекаются общим
+    состоянием подписок, а сам опрос остаётся запасным каналом.
+    В режиме шардов push для токена, аренда которого у другого
+    воркера, отклоняется с кодом 421, чтобы ретранслятор повторил
+    его на другом воркере.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, engine, host='0.0.0.0', port=8080, path='/webhook',
+                 secret=None):
+        super().__init__((host, port), WebhookHandler)
+        self.engine = engine
+        self.path = path
+        self.secret = secret
+        self.by_token = {}
+        for subscription in engine.subscriptions:
+            self.by_token.setdefault(
+                token_digest(subscription.practicum_token), []
+            ).append(subscription)
+        self.received = 0
+        self.changes = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self):
+        """Адрес для ретранслятора."""
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}{self.path}'
+
+    def authorized(self, secret):
+        """Сверяем секрет ретранслятора."""
+        if not self.secret:
+            return True
+        return hmac.compare_digest(secret.encode(), self.secret.encode())
+
+    def subscriptions_for(self, token):
+        """Подписки с этим токеном Практикума."""
+        return self.by_token.get(token_digest(token), [])
+
+    def count(self, changes):
+        """Учитываем принятый push."""
+        with self._lock:
+            self.received += 1
+            self.changes += changes
+
+    def start(self):
+        """Запускаем сервер в фоновом потоке."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Останавливаем сервер."""
+        self.shutdown()
+        self.server_close()